@@ -0,0 +1,48 @@
+"""
+Compare two benchmark result files:
+
+    python -m benchmarks.compare benchmarks/results/base.json benchmarks/results/new.json
+
+Targets are matched on (target, rows) and compared on their best time.
+Exits with status 1 when any target is slower than --threshold.
+"""
+import argparse
+import json
+import sys
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        report = json.load(f)
+    return {(r["target"], r["rows"]): r for r in report["results"]}, report["meta"]
+
+
+def compare(base_path: str, new_path: str, threshold: float) -> int:
+    base, base_meta = load(base_path)
+    new, new_meta = load(new_path)
+    print(f"base: {base_meta['commit']} ({base_meta['timestamp']})")
+    print(f"new:  {new_meta['commit']} ({new_meta['timestamp']})\n")
+    print(f"{'target':<28}{'rows':>10}{'base s':>12}{'new s':>12}{'change':>10}")
+
+    regressions = 0
+    for key in sorted(set(base) & set(new)):
+        old_s, new_s = base[key]["best_s"], new[key]["best_s"]
+        change = (new_s - old_s) / old_s if old_s else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{key[0]:<28}{key[1]:>10}{old_s:>12.4f}{new_s:>12.4f}{change:>+10.1%}{flag}")
+
+    for key in sorted(set(base) ^ set(new)):
+        print(f"{key[0]:<28}{key[1]:>10}  only in {'base' if key in base else 'new'}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare two benchmark runs")
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed slowdown before flagging (0.10 = 10%%)")
+    args = parser.parse_args()
+    sys.exit(compare(args.base, args.new, args.threshold))
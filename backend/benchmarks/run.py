@@ -0,0 +1,256 @@
+"""
+Reproducible performance benchmarks.
+
+Run from the backend directory:
+
+    python -m benchmarks.run                       # 10k / 100k / 1M rows
+    python -m benchmarks.run --full                # adds 10M rows
+    python -m benchmarks.run --sizes 10000 10000000
+    python -m benchmarks.run --targets feature_engineering predict_batch_stream
+
+10M rows are opt-in: the synthetic frame alone takes about 3 GB, and the
+targets that score a whole frame in memory (run_batch_prediction,
+predict_batch) need several times that.
+
+Every target is timed on synthetic customers (benchmarks/synthetic.py)
+and the results are written as JSON to benchmarks/results/, named by
+UTC time and git commit. Compare two runs with benchmarks/compare.py.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generate_customers, load_source
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+FULL_SIZES = DEFAULT_SIZES + [10_000_000]
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Targets whose cost does not depend on the batch size are run once
+SIZED_TARGETS = ["feature_engineering", "run_batch_prediction", "predict_batch", "predict_batch_stream"]
+FIXED_TARGETS = ["predict", "generate_churn_pdf"]
+ALL_TARGETS = SIZED_TARGETS + FIXED_TARGETS
+
+
+# ==================================================
+# HELPERS
+# ==================================================
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return "unknown"
+
+
+def _timed(fn, repeat: int) -> list:
+    seconds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        seconds.append(time.perf_counter() - started)
+    return seconds
+
+
+def _record(target: str, rows: int, seconds: list, **extra) -> dict:
+    best = min(seconds)
+    result = {
+        "target": target,
+        "rows": rows,
+        "repeat": len(seconds),
+        "seconds": seconds,
+        "best_s": best,
+        "median_s": statistics.median(seconds),
+        "rows_per_second": rows / best if rows and best > 0 else None,
+    }
+    result.update(extra)
+    print(f"{target:<28} rows={rows:<10} best={best:.4f}s median={result['median_s']:.4f}s")
+    return result
+
+
+def _app():
+    from src.api.main import app
+    return app
+
+
+async def _post_many(app, requests) -> list:
+    import httpx
+    latencies = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for kwargs in requests:
+            started = time.perf_counter()
+            response = await client.post(**kwargs)
+            latencies.append(time.perf_counter() - started)
+            response.raise_for_status()
+    return latencies
+
+
+# ==================================================
+# TARGETS
+# ==================================================
+def bench_feature_engineering(df, repeat):
+    # apply_feature_engineering and feature.feature_engineering are both
+    # aliases of build_features, so one target covers all three names
+    from src.utils.preprocessing import build_features
+    X = df.drop(columns=["customerID", "Churn"], errors="ignore")
+    return _timed(lambda: build_features(X), repeat)
+
+
+def bench_run_batch_prediction(df, repeat):
+    from src.utils.batch_predict import run_batch_prediction
+    return _timed(lambda: run_batch_prediction(df), repeat)
+
+
+def _upload_file(df) -> str:
+    # The upload is written to disk once and posted from the file, so no
+    # second in-memory copy of the CSV is part of the measurement
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    os.close(fd)
+    df.drop(columns=["Churn"], errors="ignore").to_csv(path, index=False, chunksize=100_000)
+    return path
+
+
+def _bench_upload(df, repeat, url):
+    path = _upload_file(df)
+    app = _app()
+
+    async def post_all():
+        latencies = []
+        for _ in range(repeat):
+            with open(path, "rb") as f:
+                latencies += await _post_many(app, [{"url": url, "files": {"file": ("customers.csv", f, "text/csv")}}])
+        return latencies
+
+    try:
+        return asyncio.run(post_all())
+    finally:
+        os.unlink(path)
+
+
+def bench_predict_batch(df, repeat):
+    # Whole-file path: the upload is parsed and scored as one frame
+    return _bench_upload(df, repeat, "/predict-batch")
+
+
+def bench_predict_batch_stream(df, repeat):
+    # Chunked path: scored chunk by chunk, the response streamed back
+    return _bench_upload(df, repeat, "/predict-batch/stream")
+
+
+def bench_predict(df, requests):
+    payloads = df.drop(columns=["customerID", "Churn"], errors="ignore").head(requests).to_dict(orient="records")
+    app = _app()
+    asyncio.run(_post_many(app, [{"url": "/predict", "json": payloads[0]}]))  # warm-up
+    return asyncio.run(_post_many(app, [{"url": "/predict", "json": p} for p in payloads]))
+
+
+def bench_generate_churn_pdf(df, repeat):
+    from src.utils.pdf_report import generate_churn_pdf
+
+    scored = df.head(1000).copy()
+    scored["churn_probability"] = np.linspace(0.01, 0.99, len(scored))
+    scored["risk_segment"] = pd.cut(scored["churn_probability"], [0, 0.4, 0.7, 1.0],
+                                    labels=["Low Risk", "Medium Risk", "High Risk"])
+    scored["revenue_at_risk"] = scored["MonthlyCharges"] * scored["churn_probability"] * 6
+    scored["customerName"] = "Synthetic"
+    summary_df = (
+        scored.groupby("risk_segment", observed=False)
+        .agg(customers=("customerID", "count"), revenue_at_risk=("revenue_at_risk", "sum"))
+        .reset_index()
+    )
+    customer_lists = {
+        segment: group[["customerID", "customerName", "churn_probability", "revenue_at_risk"]].to_dict(orient="records")
+        for segment, group in scored.groupby("risk_segment", observed=True)
+    }
+    company = {"name": "Benchmark Co", "location": "-", "email": "-", "website": "-"}
+
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    os.close(fd)
+    try:
+        return _timed(lambda: generate_churn_pdf(company, summary_df, customer_lists, path), repeat)
+    finally:
+        os.unlink(path)
+
+
+# ==================================================
+# MAIN
+# ==================================================
+def run(sizes, targets, repeat, predict_requests, seed, output, keep_cache):
+    if not keep_cache:
+        # Measure the scoring path itself, not prediction cache hits
+        os.environ.setdefault("CHURN_CACHE_SIZE", "0")
+
+    source = load_source()
+    results = []
+
+    for n in sizes:
+        sized = [t for t in targets if t in SIZED_TARGETS]
+        if not sized:
+            break
+        df = generate_customers(n, source, seed=seed)
+        for target in sized:
+            seconds = globals()[f"bench_{target}"](df, repeat)
+            results.append(_record(target, n, seconds))
+        del df
+
+    fixed_df = generate_customers(max(predict_requests, 1000), source, seed=seed)
+    if "predict" in targets:
+        latencies = bench_predict(fixed_df, predict_requests)
+        results.append(_record(
+            "predict", 1, latencies,
+            p50_ms=1e3 * float(np.percentile(latencies, 50)),
+            p99_ms=1e3 * float(np.percentile(latencies, 99)),
+        ))
+    if "generate_churn_pdf" in targets:
+        results.append(_record("generate_churn_pdf", 1000, bench_generate_churn_pdf(fixed_df, repeat)))
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "seed": seed,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        output = os.path.join(RESULTS_DIR, f"{stamp}_{report['meta']['commit']}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {output}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Churn system performance benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--full", action="store_true", help="Run every size of the suite, including 10M rows")
+    parser.add_argument("--targets", nargs="+", default=ALL_TARGETS, choices=ALL_TARGETS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--predict-requests", type=int, default=200, help="Number of /predict calls timed")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Result JSON path (default: benchmarks/results/)")
+    parser.add_argument("--keep-cache", action="store_true", help="Leave the prediction cache enabled")
+    args = parser.parse_args()
+    if args.full:
+        args.sizes = FULL_SIZES
+    run(args.sizes, args.targets, args.repeat, args.predict_requests, args.seed, args.output, args.keep_cache)
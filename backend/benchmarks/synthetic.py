@@ -0,0 +1,98 @@
+"""
+Synthetic customer generator with the schema and category distributions
+of data/raw/Dataset.csv.
+
+Columns are resampled in blocks taken from independent source rows so
+that within-block dependencies hold (InternetService and its add-on
+services and charges, PhoneService and MultipleLines) while blocks mix
+freely between customers:
+
+- demographics: gender, SeniorCitizen, Partner, Dependents
+- account:      tenure, Contract, PaperlessBilling, PaymentMethod, Churn
+- services:     phone / internet services and MonthlyCharges
+
+TotalCharges is rebuilt from tenure x MonthlyCharges with some noise and
+is written as text (blank for new customers), like the source file.
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+SOURCE_PATH = "data/raw/Dataset.csv"
+
+DEMOGRAPHIC_COLUMNS = ["gender", "SeniorCitizen", "Partner", "Dependents"]
+ACCOUNT_COLUMNS = ["tenure", "Contract", "PaperlessBilling", "PaymentMethod", "Churn"]
+SERVICE_BLOCK_COLUMNS = [
+    "PhoneService", "MultipleLines", "InternetService", "OnlineSecurity", "OnlineBackup",
+    "DeviceProtection", "TechSupport", "StreamingTV", "StreamingMovies", "MonthlyCharges"
+]
+
+COLUMN_ORDER = [
+    "customerID", "gender", "SeniorCitizen", "Partner", "Dependents", "tenure", "PhoneService",
+    "MultipleLines", "InternetService", "OnlineSecurity", "OnlineBackup", "DeviceProtection",
+    "TechSupport", "StreamingTV", "StreamingMovies", "Contract", "PaperlessBilling",
+    "PaymentMethod", "MonthlyCharges", "TotalCharges", "Churn"
+]
+
+
+def load_source(path: str = SOURCE_PATH) -> pd.DataFrame:
+    return pd.read_csv(path)
+
+
+def generate_customers(n: int, source: pd.DataFrame = None, seed: int = 42,
+                       id_offset: int = 0, with_churn: bool = True) -> pd.DataFrame:
+    """
+    Generate n synthetic customers
+    """
+    source = load_source() if source is None else source
+    rng = np.random.default_rng(seed)
+    size = len(source)
+
+    out = {"customerID": [f"SYN-{i:08d}" for i in range(id_offset + 1, id_offset + n + 1)]}
+    for block in (DEMOGRAPHIC_COLUMNS, ACCOUNT_COLUMNS, SERVICE_BLOCK_COLUMNS):
+        rows = rng.integers(0, size, n)
+        for col in block:
+            out[col] = source[col].to_numpy()[rows]
+
+    tenure = out["tenure"].astype(float)
+    monthly = out["MonthlyCharges"].astype(float)
+    total = np.round(tenure * monthly * rng.uniform(0.9, 1.1, n), 2)
+    total_text = total.astype(str).astype(object)
+    total_text[tenure == 0] = " "
+    out["TotalCharges"] = total_text
+
+    df = pd.DataFrame(out)[COLUMN_ORDER]
+    if not with_churn:
+        df = df.drop(columns=["Churn"])
+    return df
+
+
+def write_customers_csv(path: str, n: int, chunk_rows: int = 500_000, seed: int = 42,
+                        with_churn: bool = False) -> str:
+    """
+    Write n synthetic customers to CSV in chunks, so 10M-row files can be
+    produced without holding them in memory
+    """
+    source = load_source()
+    written = 0
+    with open(path, "w", newline="") as f:
+        while written < n:
+            rows = min(chunk_rows, n - written)
+            chunk = generate_customers(rows, source, seed=seed + written, id_offset=written, with_churn=with_churn)
+            chunk.to_csv(f, header=written == 0, index=False)
+            written += rows
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic churn customers")
+    parser.add_argument("rows", type=int)
+    parser.add_argument("output")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--with-churn", action="store_true", help="Include a sampled Churn label")
+    args = parser.parse_args()
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    write_customers_csv(args.output, args.rows, seed=args.seed, with_churn=args.with_churn)
+    print(f"Wrote {args.rows} customers to {args.output}")
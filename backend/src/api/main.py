@@ -1,22 +1,64 @@
-from fastapi import FastAPI, UploadFile, File, BackgroundTasks
-from fastapi.responses import FileResponse
+import asyncio
+import time
+_IMPORT_STARTED = time.perf_counter()
+
+from contextlib import asynccontextmanager
+import threading
+from fastapi import FastAPI, UploadFile, File
+from fastapi.responses import FileResponse, StreamingResponse, JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from typing import Dict, Any, List
+from pydantic import BaseModel
 import pandas as pd
-import joblib
+import numpy as np
 import tempfile
 import os
-from src.utils.preprocessing import apply_feature_engineering
-from src.utils.schema import REQUIRED_COLUMNS
-from src.utils.pdf_report import generate_churn_pdf
+import json
+import shutil
+from src.utils.schema import REQUIRED_COLUMNS, schema_validator
+from src.utils.batch_scoring import (
+    PREDICTION_COLUMNS, RISK_LABELS, DedupStats, risk_segment, SegmentSummary, TopRevenueAtRisk, missing_columns,
+    predict_feature_probabilities, prepare_frame, score_frame, validate_frame
+)
+from src.utils.model_registry import ModelRegistry, VersionNotFound
+from src.utils.model_serving import ModelServer
+from src.utils.coalescer import PredictionCoalescer
+from src.utils.retention import STRATEGY_MESSAGES, strategy_code
+from src.utils.prediction_cache import PredictionCache
+from src.utils.parallel_scoring import ShardedScorer
+from src.utils.jobs import JobManager, JobNotFound
+from src.utils.feature_store import FeatureStore
+from src.utils.scenarios import ScenarioEngine
+from src.utils.explain import explainer_for
+from src.utils.metrics import SlowRequestProfiler, metrics
+from src.utils.report_renderer import ReportQueueFull, ReportRenderer
+from src.utils.file_io import (
+    RESPONSE_MEDIA_TYPES, detect_format, encode_predictions, iter_upload_frames, read_upload
+)
+
+# Seconds spent in each startup phase, reported by /ready
+STARTUP_TIMINGS = {"imports": time.perf_counter() - _IMPORT_STARTED}
 
 # ==================================================
 # APP INITIALIZATION
 # ==================================================
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm the model off the event loop so the server accepts connections
+    # immediately; /ready turns 200 once the dummy prediction is done
+    threading.Thread(target=warm_up, name="model-warmup", daemon=True).start()
+    yield
+    model_server.stop()
+    sharded_scorer.shutdown()
+    job_manager.shutdown()
+    report_renderer.shutdown()
+
 app = FastAPI(
     title="Customer Churn Decision Intelligence API",
     description="Predict churn, quantify revenue risk, and support enterprise decision-making",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -29,184 +71,774 @@ app.add_middleware(
 
 # Use absolute path to ensure successful deployment on Render regardless of working directory
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Fixed model path, served while the registry has no versions yet
 MODEL_PATH = os.path.join(BASE_DIR, "model", "churn_model.pkl")
-model = joblib.load(MODEL_PATH)
+# Flattened tree ensemble exported by train_models.py (absent for non-tree models)
+TREE_ENGINE_PATH = os.getenv("CHURN_TREE_ENGINE_PATH", os.path.join(BASE_DIR, "model", "churn_model.trees.npz"))
+# Versioned models written by train_models.py; CURRENT names the served one
+MODEL_REGISTRY_DIR = os.getenv("CHURN_MODEL_REGISTRY", os.path.join(BASE_DIR, "model", "registry"))
+
+# Typical customer used for the warm-up prediction
+WARMUP_PAYLOAD = {
+    "gender": "Female", "SeniorCitizen": 0, "Partner": "Yes", "Dependents": "No",
+    "tenure": 12, "PhoneService": "Yes", "MultipleLines": "No",
+    "InternetService": "Fiber optic", "OnlineSecurity": "No", "OnlineBackup": "Yes",
+    "DeviceProtection": "No", "TechSupport": "No", "StreamingTV": "Yes",
+    "StreamingMovies": "No", "Contract": "Month-to-month", "PaperlessBilling": "Yes",
+    "PaymentMethod": "Electronic check", "MonthlyCharges": 79.85, "TotalCharges": 958.2
+}
+
+# Compiled pandas-free scorer for /predict (set CHURN_COMPILED_SCORER=0 to use the full pipeline)
+USE_COMPILED_SCORER = os.getenv("CHURN_COMPILED_SCORER", "1") != "0"
+# Batches up to CHURN_TREE_ENGINE_MAX_ROWS rows use the array tree engine (0 disables it)
+TREE_ENGINE_MAX_ROWS = int(os.getenv("CHURN_TREE_ENGINE_MAX_ROWS", "64"))
+
+model_server = ModelServer(
+    ModelRegistry(MODEL_REGISTRY_DIR),
+    legacy_model_path=MODEL_PATH,
+    legacy_engine_path=TREE_ENGINE_PATH,
+    warmup_payload=WARMUP_PAYLOAD,
+    compiled=USE_COMPILED_SCORER,
+    engine_max_rows=TREE_ENGINE_MAX_ROWS,
+)
+
+# Memory-mapped load: numpy arrays inside the (uncompressed) joblib dump stay
+# backed by the file, so worker processes share the read-only pages.
+# The first version is served right away and warmed in the background.
+_phase_started = time.perf_counter()
+model_server.reload(warm=False)
+STARTUP_TIMINGS["model_load"] = time.perf_counter() - _phase_started
+
+# Prediction cache keyed by customer features, bound to the model file fingerprint
+_phase_started = time.perf_counter()
+prediction_cache = PredictionCache(
+    max_size=int(os.getenv("CHURN_CACHE_SIZE", "100000")),
+    ttl_seconds=float(os.getenv("CHURN_CACHE_TTL", "3600")),
+    model_path=model_server.current.model_path,
+)
+STARTUP_TIMINGS["cache_init"] = time.perf_counter() - _phase_started
+
+# Process pool for large batches; smaller frames are scored in-process
+sharded_scorer = ShardedScorer(
+    model_server.current.model_path,
+    workers=int(os.getenv("CHURN_POOL_WORKERS", str(os.cpu_count() or 1))),
+    min_rows=int(os.getenv("CHURN_POOL_MIN_ROWS", "50000")),
+    shard_rows=int(os.getenv("CHURN_POOL_SHARD_ROWS", "25000")),
+    fingerprint=model_server.current.fingerprint,
+)
+
+# Opt-in micro-batching of concurrent /predict calls (CHURN_COALESCE=1)
+coalescer = None
+if os.getenv("CHURN_COALESCE", "0") == "1":
+    coalescer = PredictionCoalescer(
+        lambda payloads: model_server.current.scorer.predict_many(payloads),
+        max_batch_size=int(os.getenv("CHURN_COALESCE_MAX_BATCH", "64")),
+        max_wait_ms=float(os.getenv("CHURN_COALESCE_MAX_WAIT_MS", "2")),
+    )
 # ==================================================
 # HELPERS
 # ==================================================
-def risk_segment(prob: float) -> str:
-    if prob < 0.4:
-        return "Low Risk"
-    elif prob < 0.7:
-        return "Medium Risk"
-    else:
-        return "High Risk"
-def generate_retention_strategy(payload: dict, churn_prob: float) -> str:
-    tenure = float(payload.get('tenure', 0))
-    monthly_charges = float(payload.get('MonthlyCharges', 0))
-    contract = payload.get('Contract', 'Month-to-month')
-    tech_support = payload.get('TechSupport', 'No')
-    payment_method = payload.get('PaymentMethod', 'Electronic check')
-    
-    if churn_prob > 0.7:  # High Risk
-        if monthly_charges > 80:
-            return "VIP Intervention Required: Premium customer at critical churn risk. Assign a dedicated retention specialist to call immediately. Offer a customized 20% loyalty discount or a complimentary service upgrade for 6 months."
-        elif tenure < 6:
-            return "Early-Stage Rescue: Customer is highly likely to churn early, indicating poor onboarding. Deploy an automated 'We Miss You' campaign offering a 1-month free credit and schedule a proactive technical check-in."
-        elif contract == 'Month-to-month':
-            return "Contract Lock-In Motivation: High volatility due to lack of commitment. Send a targeted email offering an exclusive 'Price Lock Guarantee' and free device protection if they upgrade to a 1-year contract today."
-        else:
-            return "Urgent Account Review: Dispatch an immediate personalized email from the account manager with a survey to identify dissatisfaction points, accompanied by a $25 no-strings-attached account credit."
-            
-    elif churn_prob > 0.4:  # Medium Risk
-        if tech_support == 'No':
-            return "Service Confidence Boost: Customer shows distress and lacks technical support. Proactively grant complimentary priority Tech Support for 3 months and email a 'Top Ways to Optimize Your Connection' guide."
-        elif tenure > 24:
-            return "Loyalty Appreciation: Veteran customer experiencing mid-tier risk. Avoid discounts; instead, send a personalized 'Thank You' package acknowledging their loyalty alongside a free speed upgrade as a token of appreciation."
-        elif payment_method in ['Electronic check', 'Mailed check']:
-            return "Payment Friction Reduction: Manual payment methods often cause accidental churn. Trigger a campaign offering a $10 one-time credit if they switch their payment method to Auto-Pay via Credit Card."
-        else:
-            return "Engagement Nudge: Monitor usage patterns over 30 days. Send a targeted 'Did you know?' newsletter highlighting underutilized features of their current plan to increase daily platform reliance."
-            
-    else:  # Low Risk
-        if monthly_charges < 50:
-            return "Growth & Upsell Opportunity: Highly stable customer on a low-tier plan. Add them to the targeted marketing cadence for premium packages, highlighting the benefits of Fiber Optic internet at a marginal price increase."
-        elif tenure > 12 and monthly_charges > 70:
-            return "Advocacy Activation: Highly satisfied premium customer. Leverage their satisfaction by inviting them to an exclusive Customer Advisory Board or sending a Referral Code to earn $50 for every friend they bring."
-        else:
-            return "Maintain Satisfaction: No immediate retention intervention needed. Continue delivering excellent service and include them in general seasonal promotional communications to maintain brand positivity."
+def remove_file(path: str):
+    try:
+        os.unlink(path)
+    except Exception:
+        pass
+
+# Rejected rows (with reasons) listed in batch responses; all are counted
+REJECTED_SAMPLE_ROWS = int(os.getenv("CHURN_REJECTED_SAMPLE_ROWS", "100"))
+
+def batch_probabilities(df: pd.DataFrame, dedup: DedupStats = None):
+    """
+    Churn probabilities for a raw frame; only cache misses reach the model,
+    and identical feature vectors among them are scored once
+    """
+    served = model_server.current
+    with metrics.span("cache_lookup", rows=len(df)):
+        keys = prediction_cache.frame_keys(df)
+        probs = prediction_cache.get_many(keys)
+    miss = np.flatnonzero(np.isnan(probs))
+    if len(miss):
+        probs[miss] = sharded_scorer.predict(df.iloc[miss], served.model, dedup, served.fingerprint)
+        prediction_cache.put_many([keys[i] for i in miss], probs[miss], served.fingerprint)
+    return probs
+
 # ==================================================
-# HEALTH CHECK
+# HEALTH CHECK & READINESS
 # ==================================================
+model_ready = threading.Event()
+
+def warm_up():
+    """
+    Run one dummy prediction through the single and batch paths, then
+    start watching the registry for new versions
+    """
+    started = time.perf_counter()
+    model_server.warm(model_server.current)
+    STARTUP_TIMINGS["warmup"] = time.perf_counter() - started
+    model_ready.set()
+    model_server.start_watcher(float(os.getenv("CHURN_MODEL_POLL_SECONDS", "10")))
+
+def _bind_served_model(loaded):
+    prediction_cache.bind_model(loaded.fingerprint, loaded.model_path)
+    if loaded.fingerprint != sharded_scorer.fingerprint:
+        sharded_scorer.reset(loaded.model_path, loaded.fingerprint)
+
+model_server.on_swap(_bind_served_model)
+
 @app.get("/")
 def health_check():
     return {"status": "API is running"}
 
+@app.get("/ready")
+def readiness():
+    body = {
+        "ready": model_ready.is_set(),
+        "model_version": model_server.current.version,
+        "scorer": model_server.current.scorer.name,
+        "startup_timings": STARTUP_TIMINGS
+    }
+    return JSONResponse(body, status_code=200 if model_ready.is_set() else 503)
+
 # ==================================================
 # SINGLE CUSTOMER PREDICTION
 # ==================================================
 @app.post("/predict")
-def predict_single(payload: Dict):
+async def predict_single(payload: Dict):
     """
     Predict churn probability for a single customer
     """
+    with metrics.request("predict") as request:
+        try:
+            # Schema validation
+            with request.span("validate"):
+                missing = [col for col in REQUIRED_COLUMNS if col not in payload]
+                invalid = schema_validator.check_record(payload)
+            if missing:
+                request.outcome = "invalid"
+                return {
+                    "error": "Dataset missing required columns",
+                    "missing_columns": missing
+                }
+            if invalid:
+                request.outcome = "invalid"
+                return {"error": "Invalid values", "invalid_values": invalid}
+            request.rows = 1
+
+            served = model_server.current
+            with request.span("cache_lookup"):
+                key = prediction_cache.payload_key(payload)
+                churn_prob = prediction_cache.get(key)
+            if churn_prob is None:
+                with request.span("predict_proba"):
+                    if coalescer is not None:
+                        churn_prob = await coalescer.submit(payload)
+                    else:
+                        churn_prob = await run_in_threadpool(served.scorer.predict_one, payload)
+                prediction_cache.put(key, churn_prob, served.fingerprint)
+            model_server.shadow_score(payload, churn_prob)
+
+            with request.span("risk_scoring"):
+                risk = risk_segment(churn_prob)
+                code = strategy_code(payload, churn_prob)
+
+            return {
+                "churn_probability": churn_prob,
+                "risk_level": risk,
+                "churn_prediction": "Yes" if churn_prob >= 0.5 else "No",
+                "strategy_code": code,
+                "recommended_action": STRATEGY_MESSAGES[code]
+            }
+
+        except Exception as e:
+            request.error(e)
+            return {"error": str(e)}
+
+@app.post("/explain")
+def explain_single(payload: Dict, top_k: int = 5):
+    """
+    Per-column contributions to one customer's churn score
+    """
     try:
-        df = pd.DataFrame([payload])
-        # Schema validation
-        missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+        missing = [col for col in REQUIRED_COLUMNS if col not in payload]
         if missing:
             return {
                 "error": "Dataset missing required columns",
                 "missing_columns": missing
             }
+        invalid = schema_validator.check_record(payload)
+        if invalid:
+            return {"error": "Invalid values", "invalid_values": invalid}
 
-        # Ensure customerID exists for reporting
-        if "customerID" not in df.columns:
-            df["customerID"] = df.index.astype(str)
-        # Force numeric safety
-        for col in ["tenure", "MonthlyCharges", "TotalCharges"]:
-            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0)
-        # Feature engineering
+        served = model_server.current
+        explainer = explainer_for(served.model)
         df = pd.DataFrame([payload])
+        base_value, contributions = explainer.explain_frame(df)
+        return {
+            "churn_probability": served.scorer.predict_one(payload),
+            "method": explainer.method,
+            "units": explainer.units,
+            "base_value": base_value,
+            "contributions": contributions.iloc[0].to_dict(),
+            "top_drivers": explainer.top_drivers(df, top_k)[0]
+        }
+    except Exception as e:
+        return {"error": str(e)}
 
-        # APPLY FEATURE ENGINEERING
-        df = apply_feature_engineering(df)
+@app.get("/stats/cache")
+def cache_stats():
+    return prediction_cache.stats()
 
-        churn_prob = model.predict_proba(df)[0][1]
+@app.get("/stats/pool")
+def pool_stats():
+    return sharded_scorer.stats()
 
-        risk = risk_segment(churn_prob)
+@app.get("/stats/coalescer")
+def coalescer_stats():
+    if coalescer is None:
+        return {"enabled": False}
+    return coalescer.stats()
 
-        return {
-            "churn_probability": churn_prob,
-            "risk_level": risk,
-            "churn_prediction": "Yes" if churn_prob >= 0.5 else "No",
-            "recommended_action": generate_retention_strategy(payload, churn_prob)
-        }
+@app.get("/stats/shadow")
+def shadow_stats():
+    return model_server.shadow_stats()
+
+# ==================================================
+# METRICS (PROMETHEUS) & SLOW-REQUEST PROFILING
+# ==================================================
+# Requests slower than CHURN_PROFILE_SLOW_MS dump a sampled stack profile
+# (collapsed format) to CHURN_PROFILE_DIR; unset or 0 keeps sampling off
+PROFILE_SLOW_MS = float(os.getenv("CHURN_PROFILE_SLOW_MS", "0"))
+if PROFILE_SLOW_MS > 0:
+    metrics.profiler = SlowRequestProfiler(
+        metrics,
+        threshold_seconds=PROFILE_SLOW_MS / 1000.0,
+        out_dir=os.getenv("CHURN_PROFILE_DIR", os.path.join(os.path.dirname(BASE_DIR), "data", "profiles")),
+        interval=float(os.getenv("CHURN_PROFILE_INTERVAL_MS", "5")) / 1000.0,
+    )
+
+def _component_metrics():
+    cache = prediction_cache.stats()
+    pool = sharded_scorer.stats()
+    yield "churn_cache_hits_total", "counter", cache["hits"], {}
+    yield "churn_cache_misses_total", "counter", cache["misses"], {}
+    yield "churn_cache_entries", "gauge", cache["size"], {}
+    yield "churn_pool_batches_total", "counter", pool["pooled_batches"], {"mode": "pooled"}
+    yield "churn_pool_batches_total", "counter", pool["inline_batches"], {"mode": "inline"}
+    yield "churn_model_ready", "gauge", int(model_ready.is_set()), {"version": model_server.current.version}
+
+metrics.register_collector(_component_metrics)
+
+@app.get("/metrics")
+def prometheus_metrics():
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# ==================================================
+# MODEL REGISTRY (VERSIONS, HOT RELOAD, SHADOW)
+# ==================================================
+@app.get("/model")
+def model_info():
+    return {
+        **model_server.current.info(),
+        "registry_versions": model_server.registry.versions(),
+        "registry_current": model_server.registry.current_version(),
+        "swaps": model_server.swaps,
+        "last_error": model_server.last_error
+    }
+
+@app.post("/model/reload")
+def reload_model(version: str = None, promote: bool = True):
+    """
+    Load and warm a registry version (CURRENT by default), then swap it in.
+    Requests keep using the previous version until the swap. With promote
+    the version becomes CURRENT once it loaded; without it, the registry
+    watcher moves back to CURRENT on its next poll.
+    """
+    try:
+        return model_server.reload(version, promote=promote)
+    except VersionNotFound:
+        return JSONResponse({"error": f"Model version not found: {version}"}, status_code=404)
+    except Exception as e:
+        return {"error": str(e)}
 
+@app.post("/model/shadow")
+def start_shadow(version: str, sample_rate: float = 0.1):
+    """
+    Score a sample of /predict traffic with a candidate version in the background
+    """
+    try:
+        return model_server.set_shadow(version, sample_rate)
+    except VersionNotFound:
+        return JSONResponse({"error": f"Model version not found: {version}"}, status_code=404)
     except Exception as e:
         return {"error": str(e)}
 
+@app.delete("/model/shadow")
+def stop_shadow():
+    model_server.clear_shadow()
+    return {"enabled": False}
+
 # ==================================================
 # BATCH PREDICTION (ENTERPRISE)
 # ==================================================
 @app.post("/predict-batch")
-async def predict_batch(file: UploadFile = File(...)):
+async def predict_batch(
+    file: UploadFile = File(...),
+    response_format: str = "json",
+    top_k: int = None,
+    per_segment: bool = False
+):
+    """
+    Score an upload. With top_k only the top_k customers by revenue at
+    risk (per risk segment with per_segment) are returned with the
+    segment summary, instead of every row.
+    """
+    with metrics.request("predict_batch") as request:
+        try:
+            if response_format not in ("json", "arrow", "parquet"):
+                request.outcome = "invalid"
+                return {"error": "response_format must be 'json', 'arrow' or 'parquet'"}
+            if top_k is not None and top_k < 1:
+                request.outcome = "invalid"
+                return {"error": "top_k must be at least 1"}
+
+            # CSV / Excel / Parquet / Arrow IPC, read straight from the spooled upload
+            with request.span("parse"):
+                df = read_upload(file.file, detect_format(file.filename, file.content_type))
+            request.rows = len(df)
+
+            # -------------------------------
+            # GUARANTEE customerID & customerName + SCHEMA VALIDATION
+            # -------------------------------
+            with request.span("validate", rows=len(df)):
+                df = prepare_frame(df)
+                missing = missing_columns(df)
+            if missing:
+                request.outcome = "invalid"
+                return {
+                    "error": f"Dataset missing required columns: {', '.join(missing)}",
+                    "missing_columns": missing
+                }
+
+            # Rows with invalid values are set aside with their reasons
+            df, validation = validate_frame(df)
+            rejected = validation.records(REJECTED_SAMPLE_ROWS)
+
+            # -------------------------------
+            # FEATURE ENGINEERING + PREDICTIONS
+            # -------------------------------
+            dedup = DedupStats()
+            with request.span("scoring", rows=len(df)):
+                df = score_frame(df, lambda frame: batch_probabilities(frame, dedup))
+
+            # -------------------------------
+            # SUMMARY
+            # -------------------------------
+            with request.span("summary"):
+                summary = SegmentSummary()
+                summary.add(df)
+
+            top = None
+            if top_k is not None:
+                with request.span("top_k", rows=len(df)):
+                    top = TopRevenueAtRisk(top_k, per_segment)
+                    top.add(df)
+
+            with request.span("serialize", rows=len(df) if top is None else top_k):
+                if response_format != "json":
+                    return Response(
+                        content=encode_predictions(df if top is None else top.frame(), response_format, summary.records()),
+                        media_type=RESPONSE_MEDIA_TYPES[response_format],
+                        headers={
+                            "X-Dedup-Ratio": f"{dedup.records()['dedup_ratio']:.6f}",
+                            "X-Rejected-Rows": str(rejected["rows"])
+                        }
+                    )
 
+                if top is not None:
+                    return {
+                        "summary": summary.records(),
+                        "dedup": dedup.records(),
+                        "rejected": rejected,
+                        "top_k": top_k,
+                        "top_customers": top.records(),
+                        "strategies": STRATEGY_MESSAGES
+                    }
+
+                all_preds = df[PREDICTION_COLUMNS].to_dict(orient="records")
+
+                return {
+                    "summary": summary.records(),
+                    "dedup": dedup.records(),
+                    "rejected": rejected,
+                    "sample_predictions": df.head(20).to_dict(orient="records"),
+                    "all_predictions": all_preds,
+                    "strategies": STRATEGY_MESSAGES
+                }
+
+        except Exception as e:
+            request.error(e)
+            return {"error": str(e)}
+
+# ==================================================
+# STREAMING BATCH PREDICTION (BOUNDED MEMORY)
+# ==================================================
+STREAM_CHUNK_SIZE = int(os.getenv("CHURN_STREAM_CHUNK_SIZE", "50000"))
+
+def _merge_rejections(total: dict, chunk: dict):
+    total["rows"] += chunk["rows"]
+    for col, count in chunk["by_column"].items():
+        total["by_column"][col] = total["by_column"].get(col, 0) + count
+    total["sample"].extend(chunk["sample"])
+
+def _stream_predictions(path: str, first_chunk: pd.DataFrame, chunks, output_format: str,
+                        top: TopRevenueAtRisk = None):
+    """
+    Score an upload chunk by chunk, yielding NDJSON or CSV text.
+    Only one chunk is held in memory at a time; the segment summary is
+    kept as running totals and sent as the last NDJSON line. With top,
+    only its top rows are written, once the whole upload is scored.
+    """
     try:
-        import io
-        contents = await file.read()
-        if file.filename.endswith(".csv"):
-            df = pd.read_csv(io.BytesIO(contents))
-        else:
-            df = pd.read_excel(io.BytesIO(contents))
-
-        # -------------------------------
-        # GUARANTEE customerID & customerName
-        # -------------------------------
-        df.columns = df.columns.str.strip()
-        
-        if "customerID" not in df.columns:
-            df.insert(0, "customerID", ["CUST_" + str(i) for i in range(1, len(df) + 1)])
-        if "customerName" not in df.columns:
-            df.insert(1, "customerName", ["Unknown" for i in range(len(df))])
-
-        # -------------------------------
-        # SCHEMA VALIDATION
-        # -------------------------------
-        missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+        summary = SegmentSummary()
+        dedup = DedupStats()
+        rejected = {"rows": 0, "by_column": {}, "sample": []}
+        offset = 0
+        chunk = first_chunk
+        while chunk is not None:
+            rows = len(chunk)
+            chunk, validation = validate_frame(prepare_frame(chunk, id_offset=offset))
+            if validation.rejected:
+                _merge_rejections(rejected, validation.records(REJECTED_SAMPLE_ROWS - len(rejected["sample"]), offset))
+            chunk = score_frame(chunk, lambda frame: batch_probabilities(frame, dedup))
+            summary.add(chunk)
+            if top is not None:
+                top.add(chunk)
+            elif output_format == "csv":
+                yield chunk[PREDICTION_COLUMNS].to_csv(index=False, header=offset == 0)
+            elif len(chunk):
+                yield chunk[PREDICTION_COLUMNS].to_json(orient="records", lines=True, double_precision=15).rstrip("\n") + "\n"
+            offset += rows
+            chunk = next(chunks, None)
+
+        if top is not None:
+            kept = top.frame()
+            if output_format == "csv":
+                yield kept.to_csv(index=False)
+            elif len(kept):
+                yield kept.to_json(orient="records", lines=True, double_precision=15).rstrip("\n") + "\n"
+
+        if output_format != "csv":
+            footer = {
+                "summary": summary.records(), "rows": offset, "dedup": dedup.records(), "rejected": rejected,
+                "strategies": STRATEGY_MESSAGES
+            }
+            if top is not None:
+                footer["top_k"] = top.k
+            yield json.dumps(footer) + "\n"
+    finally:
+        chunks.close()
+        remove_file(path)
+
+@app.post("/predict-batch/stream")
+def predict_batch_stream(
+    file: UploadFile = File(...),
+    format: str = "ndjson",
+    chunk_size: int = STREAM_CHUNK_SIZE,
+    top_k: int = None,
+    per_segment: bool = False
+):
+    """
+    Streaming variant of /predict-batch for large CSV, Parquet or Arrow
+    uploads. Peak memory is set by chunk_size, not by the file size.
+    With top_k only the top_k customers by revenue at risk (per risk
+    segment with per_segment) are written.
+    """
+    if format not in ("ndjson", "csv"):
+        return {"error": "format must be 'ndjson' or 'csv'"}
+    if top_k is not None and top_k < 1:
+        return {"error": "top_k must be at least 1"}
+    input_format = detect_format(file.filename, file.content_type)
+    if input_format not in ("csv", "parquet", "arrow"):
+        return {"error": "Streaming mode supports CSV, Parquet and Arrow uploads"}
+
+    # Spool the upload to our own file so it outlives the request handler
+    fd, path = tempfile.mkstemp(suffix="." + input_format)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            shutil.copyfileobj(file.file, out)
+
+        chunks = iter_upload_frames(path, input_format, max(1, chunk_size))
+        first_chunk = next(chunks, None)
+        if first_chunk is None:
+            chunks.close()
+            remove_file(path)
+            return {"error": "Uploaded file is empty"}
+
+        first_chunk.columns = first_chunk.columns.str.strip()
+        missing = missing_columns(first_chunk)
         if missing:
+            chunks.close()
+            remove_file(path)
             return {
                 "error": f"Dataset missing required columns: {', '.join(missing)}",
                 "missing_columns": missing
             }
+    except Exception as e:
+        remove_file(path)
+        return {"error": str(e)}
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _stream_predictions(
+            path, first_chunk, chunks, format,
+            TopRevenueAtRisk(top_k, per_segment) if top_k is not None else None
+        ),
+        media_type=media_type
+    )
+
+# ==================================================
+# BATCH JOBS (SUBMIT, POLL, PAGINATE)
+# ==================================================
+def score_job_chunk(chunk: pd.DataFrame, offset: int):
+    chunk = prepare_frame(chunk, id_offset=offset)
+    missing = missing_columns(chunk)
+    if missing:
+        raise ValueError(f"Dataset missing required columns: {', '.join(missing)}")
+    chunk, validation = validate_frame(chunk)
+    return score_frame(chunk, batch_probabilities), validation
+
+job_manager = JobManager(
+    os.getenv("CHURN_JOB_DIR", os.path.join(os.path.dirname(BASE_DIR), "data", "jobs")),
+    score_job_chunk,
+    max_workers=int(os.getenv("CHURN_JOB_WORKERS", "2")),
+    chunk_size=STREAM_CHUNK_SIZE,
+)
+
+def job_not_found(job_id: str):
+    return JSONResponse({"error": f"Job not found: {job_id}"}, status_code=404)
+
+@app.post("/jobs")
+def submit_job(file: UploadFile = File(...)):
+    """
+    Queue a batch file for scoring and return its job ID immediately
+    """
+    try:
+        state = job_manager.submit(file.file, detect_format(file.filename, file.content_type), file.filename)
+        return {"job_id": state["job_id"], "status": state["status"]}
+    except Exception as e:
+        return {"error": str(e)}
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    try:
+        state = job_manager.status(job_id)
+    except JobNotFound:
+        return job_not_found(job_id)
+    state.pop("summary", None)
+    return state
+
+@app.get("/jobs/{job_id}/summary")
+def job_summary(job_id: str):
+    try:
+        state = job_manager.status(job_id)
+    except JobNotFound:
+        return job_not_found(job_id)
+    if state["status"] != "completed":
+        return {"job_id": job_id, "status": state["status"], "error": state["error"]}
+    return {
+        "job_id": job_id,
+        "status": state["status"],
+        "rows": state["total_rows"],
+        "rejected_rows": state.get("rejected_rows", 0),
+        "summary": state["summary"],
+        "strategies": STRATEGY_MESSAGES
+    }
 
-        # -------------------------------
-        # FEATURE ENGINEERING (NO ID)
-        # -------------------------------
-        df_features = apply_feature_engineering(
-            df.drop(columns=["customerID", "customerName"], errors="ignore")
+@app.get("/jobs/{job_id}/results")
+def job_results(
+    job_id: str,
+    risk_segment: str = None,
+    sort_by: str = "revenue_at_risk",
+    order: str = "desc",
+    limit: int = 100,
+    offset: int = 0,
+    include_features: bool = False
+):
+    """
+    Paginated results of a job, optionally filtered by risk segment
+    """
+    try:
+        return job_manager.results(
+            job_id, risk_segment=risk_segment, sort_by=sort_by, order=order,
+            limit=min(limit, 10000), offset=offset, include_features=include_features
         )
+    except JobNotFound:
+        return job_not_found(job_id)
+    except Exception as e:
+        return {"error": str(e)}
 
-        # -------------------------------
-        # PREDICTIONS
-        # -------------------------------
-        df["churn_probability"] = model.predict_proba(df_features)[:, 1]
+@app.get("/jobs/{job_id}/top")
+def job_top_customers(job_id: str, k: int = 100, per_segment: bool = False):
+    """
+    The k customers of a job with the highest revenue at risk, with the
+    segment summary
+    """
+    try:
+        return job_manager.top_customers(job_id, k=min(k, 10000), per_segment=per_segment)
+    except JobNotFound:
+        return job_not_found(job_id)
+    except Exception as e:
+        return {"error": str(e)}
 
-        df["risk_segment"] = pd.cut(
-            df["churn_probability"],
-            bins=[0, 0.4, 0.7, 1.0],
-            labels=["Low Risk", "Medium Risk", "High Risk"]
+@app.get("/jobs/{job_id}/rejections")
+def job_rejections(job_id: str, limit: int = 100, offset: int = 0):
+    """
+    Rows of a job that failed value validation, with the reasons
+    """
+    try:
+        return job_manager.rejections(job_id, limit=min(limit, 10000), offset=offset)
+    except JobNotFound:
+        return job_not_found(job_id)
+    except Exception as e:
+        return {"error": str(e)}
+
+@app.get("/jobs/{job_id}/explanations")
+def job_explanations(
+    job_id: str,
+    risk_segment: str = "High Risk",
+    top_k: int = 5,
+    limit: int = 100,
+    offset: int = 0
+):
+    """
+    Top drivers of every customer in a segment of a completed job (all
+    segments with risk_segment=""), highest revenue at risk first.
+    A page is explained on its first request and stored with the job's
+    results.
+    """
+    try:
+        served = model_server.current
+        explainer = explainer_for(served.model)
+        return job_manager.explanations(
+            job_id,
+            lambda frame: explainer.top_drivers(frame, len(REQUIRED_COLUMNS)),
+            served.fingerprint,
+            risk_segment=risk_segment or None,
+            top_k=top_k,
+            limit=min(limit, 10000),
+            offset=offset
         )
+    except JobNotFound:
+        return job_not_found(job_id)
+    except Exception as e:
+        return {"error": str(e)}
 
-        df["revenue_at_risk"] = df["MonthlyCharges"] * df["churn_probability"] * 6
+# ==================================================
+# WHAT-IF SCENARIOS (STORED JOB RESULTS)
+# ==================================================
+scenario_engine = ScenarioEngine(
+    job_manager.results_frame,
+    max_portfolios=int(os.getenv("CHURN_SCENARIO_PORTFOLIOS", "2")),
+)
 
-        # -------------------------------
-        # SUMMARY
-        # -------------------------------
-        summary = (
-            df.groupby("risk_segment")
-            .agg(
-                customers=("customerID", "count"),
-                revenue_at_risk=("revenue_at_risk", "sum")
-            )
-            .reset_index()
+class ScenarioRequest(BaseModel):
+    scenarios: List[Dict[str, Any]]
+
+@app.post("/jobs/{job_id}/scenarios")
+def run_scenarios(job_id: str, payload: ScenarioRequest):
+    """
+    Apply declarative interventions to a completed job's portfolio and
+    return the change in churn probability and revenue at risk per
+    segment. Only the rows an intervention actually changes are re-scored.
+    """
+    try:
+        served = model_server.current
+        results = scenario_engine.run(
+            job_id,
+            payload.scenarios,
+            lambda features: predict_feature_probabilities(features, served.model),
+            served.fingerprint
         )
+        return {"job_id": job_id, "model_version": served.version, "scenarios": results}
+    except JobNotFound:
+        return job_not_found(job_id)
+    except Exception as e:
+        return {"error": str(e)}
+
+# ==================================================
+# FEATURE STORE (SCORE BY CUSTOMER ID)
+# ==================================================
+feature_store = FeatureStore(
+    os.getenv("CHURN_FEATURE_STORE", os.path.join(os.path.dirname(BASE_DIR), "data", "feature_store.sqlite"))
+)
+
+@app.post("/customers")
+def load_customers(file: UploadFile = File(...)):
+    """
+    Load a batch upload into the feature store. Known customers are
+    updated; rows that did not change keep their cached score.
+    """
+    try:
+        df = read_upload(file.file, detect_format(file.filename, file.content_type))
+        return feature_store.upsert(df)
+    except Exception as e:
+        return {"error": str(e)}
 
-        all_preds = df[["customerID", "customerName", "risk_segment", "churn_probability", "revenue_at_risk"]].to_dict(orient="records")
+@app.patch("/customers")
+def update_customers(payload: List[Dict]):
+    """
+    Partial updates: each item needs a customerID and only the changed columns
+    """
+    try:
+        return feature_store.upsert(pd.DataFrame(payload))
+    except Exception as e:
+        return {"error": str(e)}
+
+@app.get("/customers/{customer_id}")
+def customer_features(customer_id: str):
+    frame = feature_store.lookup([customer_id])
+    if frame.empty:
+        return JSONResponse({"error": f"Customer not found: {customer_id}"}, status_code=404)
+    return json.loads(frame.iloc[0].to_json(double_precision=15))
+
+class ScoreByIdRequest(BaseModel):
+    customer_ids: List[str]
+
+@app.post("/customers/score")
+def score_customers(payload: ScoreByIdRequest):
+    """
+    Score stored customers by ID; only customers whose features changed
+    since their last score (or that were scored by another model) are
+    re-scored
+    """
+    try:
+        served = model_server.current
+        frame = feature_store.score(
+            payload.customer_ids,
+            lambda features: predict_feature_probabilities(features, served.model),
+            served.fingerprint
+        )
+        df = score_frame(frame, lambda df: df["churn_probability"].to_numpy())
 
+        summary = SegmentSummary()
+        summary.add(df)
+        found = set(df["customerID"])
         return {
-            "summary": summary.to_dict(orient="records"),
-            "sample_predictions": df.head(20).to_dict(orient="records"),
-            "all_predictions": all_preds
+            "summary": summary.records(),
+            "predictions": df[PREDICTION_COLUMNS].to_dict(orient="records"),
+            "missing_ids": [cid for cid in payload.customer_ids if cid not in found],
+            "strategies": STRATEGY_MESSAGES
         }
-
     except Exception as e:
         return {"error": str(e)}
 
+@app.get("/stats/feature-store")
+def feature_store_stats():
+    return feature_store.stats()
+
 # ==================================================
 # GENERATE PDF REPORT
 # ==================================================
-from pydantic import BaseModel
 
 class ReportRequest(BaseModel):
     company_name: str = ""
@@ -216,42 +848,105 @@ class ReportRequest(BaseModel):
     summary_data: List[Dict[str, Any]]
     customer_lists: Dict[str, List[Dict[str, Any]]] = {}
 
-def remove_file(path: str):
-    try:
-        os.unlink(path)
-    except Exception:
-        pass
+# Reports render in CHURN_REPORT_WORKERS processes (0 = one background
+# thread); identical requests are served from the PDF cache on disk
+report_renderer = ReportRenderer(
+    os.getenv("CHURN_REPORT_CACHE_DIR", os.path.join(os.path.dirname(BASE_DIR), "data", "reports")),
+    workers=int(os.getenv("CHURN_REPORT_WORKERS", "1")),
+    max_pending=int(os.getenv("CHURN_REPORT_MAX_PENDING", "8")),
+    max_files=int(os.getenv("CHURN_REPORT_CACHE_FILES", "256")),
+)
+
+def _report_metrics():
+    stats = report_renderer.stats()
+    yield "churn_report_queue_depth", "gauge", stats["queue_depth"], {}
+    yield "churn_reports_total", "counter", stats["rendered"], {"result": "rendered"}
+    yield "churn_reports_total", "counter", stats["cache_hits"], {"result": "cache_hit"}
+    yield "churn_reports_total", "counter", stats["shared_renders"], {"result": "shared"}
+    yield "churn_reports_total", "counter", stats["rejected"], {"result": "rejected"}
+    yield "churn_reports_total", "counter", stats["failed"], {"result": "failed"}
+
+metrics.register_collector(_report_metrics)
 
 @app.post("/generate-report")
-def generate_report(payload: ReportRequest, background_tasks: BackgroundTasks):
-    try:
-        company_info = {
-            "name": payload.company_name,
-            "location": payload.company_location,
-            "email": payload.company_email,
-            "website": payload.company_website
-        }
-        
-        summary_df = pd.DataFrame(payload.summary_data)
-        
-        # Create temp file for PDF
-        fd, temp_pdf_path = tempfile.mkstemp(suffix=".pdf")
-        os.close(fd)
-        
-        generate_churn_pdf(
-            company_info=company_info,
-            summary_df=summary_df,
-            customer_lists=payload.customer_lists,
-            output_path=temp_pdf_path
-        )
-        
-        # Delete the temp file after returning
-        background_tasks.add_task(remove_file, temp_pdf_path)
-        
-        return FileResponse(
-            temp_pdf_path, 
-            media_type="application/pdf", 
-            filename="Churn_Decision_Intelligence_Report.pdf"
-        )
-    except Exception as e:
-        return {"error": str(e)}
+async def generate_report(payload: ReportRequest):
+    with metrics.request("generate_report") as request:
+        try:
+            request.rows = sum(len(customers) for customers in payload.customer_lists.values())
+
+            with request.span("render", rows=request.rows):
+                future, cached = report_renderer.submit(payload.model_dump())
+                path = await asyncio.wrap_future(future)
+
+            return FileResponse(
+                path,
+                media_type="application/pdf",
+                filename="Churn_Decision_Intelligence_Report.pdf",
+                headers={"X-Report-Cache": "hit" if cached else "miss"}
+            )
+        except ReportQueueFull as e:
+            request.outcome = "rejected"
+            return JSONResponse({"error": str(e)}, status_code=503)
+        except Exception as e:
+            request.error(e)
+            return {"error": str(e)}
+
+class JobReportRequest(BaseModel):
+    company_name: str = ""
+    company_location: str = ""
+    company_email: str = ""
+    company_website: str = ""
+    segments: List[str] = ["High Risk", "Medium Risk", "Low Risk"]
+
+@app.post("/jobs/{job_id}/report")
+async def generate_job_report(job_id: str, payload: JobReportRequest):
+    """
+    Report over a completed batch job with every customer of the chosen
+    segments listed in an appendix, read from the stored results
+    """
+    with metrics.request("generate_job_report") as request:
+        try:
+            try:
+                state = job_manager.status(job_id)
+                results_path = job_manager.completed_results_path(job_id)
+            except JobNotFound:
+                request.outcome = "invalid"
+                return job_not_found(job_id)
+
+            unknown = [segment for segment in payload.segments if segment not in RISK_LABELS]
+            if unknown:
+                request.outcome = "invalid"
+                return {"error": f"Unknown risk segments: {', '.join(unknown)}"}
+
+            report = {
+                **payload.model_dump(exclude={"segments"}),
+                "summary_data": state["summary"],
+                "appendix_segments": list(dict.fromkeys(payload.segments)),
+                # Completed results never change, so the job and its finish
+                # time identify the appendix for the cache
+                "job_id": job_id,
+                "finished_at": state["finished_at"],
+            }
+            counts = {row["risk_segment"]: row["customers"] for row in state["summary"]}
+            request.rows = sum(counts.get(segment, 0) for segment in report["appendix_segments"])
+
+            with request.span("render", rows=request.rows):
+                future, cached = report_renderer.submit(report, appendix_path=results_path)
+                path = await asyncio.wrap_future(future)
+
+            return FileResponse(
+                path,
+                media_type="application/pdf",
+                filename=f"Churn_Portfolio_Report_{job_id}.pdf",
+                headers={"X-Report-Cache": "hit" if cached else "miss"}
+            )
+        except ReportQueueFull as e:
+            request.outcome = "rejected"
+            return JSONResponse({"error": str(e)}, status_code=503)
+        except Exception as e:
+            request.error(e)
+            return {"error": str(e)}
+
+@app.get("/stats/reports")
+def report_stats():
+    return report_renderer.stats()
@@ -0,0 +1,86 @@
+import argparse
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+
+import joblib
+import pandas as pd
+
+# Add root to python path to import src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.utils.batch_scoring import predict_probabilities
+from src.utils.event_stream import FileTailSource, JsonLinesSink, StreamScorer, UnixSocketSource
+from src.utils.model_registry import ModelRegistry
+
+REGISTRY_DIR = os.getenv("CHURN_MODEL_REGISTRY", "src/model/registry")
+LEGACY_MODEL_PATH = "src/model/churn_model.pkl"
+
+
+def load_model():
+    registry = ModelRegistry(REGISTRY_DIR)
+    version = registry.current_version()
+    path = registry.model_path(version) if version else LEGACY_MODEL_PATH
+    print(f"Scoring with {version or path}", file=sys.stderr)
+    return joblib.load(path, mmap_mode="r")
+
+
+def main(args):
+    model = load_model()
+
+    if args.source == "file":
+        source = FileTailSource(args.path, from_start=args.from_start)
+    else:
+        source = UnixSocketSource(args.path)
+    sink = JsonLinesSink(args.output)
+    error_sink = JsonLinesSink(args.errors) if args.errors else None
+
+    worker = StreamScorer(
+        source,
+        lambda frame: predict_probabilities(frame, model),
+        sink,
+        max_batch=args.max_batch,
+        max_wait_ms=args.max_wait_ms,
+        error_sink=error_sink,
+    )
+    if args.snapshot:
+        worker.load_snapshot(pd.read_csv(args.snapshot))
+        print(f"Loaded {len(worker.rows)} customers from {args.snapshot}", file=sys.stderr)
+
+    def report():
+        while not stopped.wait(args.stats_interval):
+            print(json.dumps(worker.stats()), file=sys.stderr)
+
+    stopped = threading.Event()
+    if args.stats_interval > 0:
+        threading.Thread(target=report, name="stream-stats", daemon=True).start()
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stopped.set()
+        source.close()
+        sink.close()
+        if error_sink is not None:
+            error_sink.close()
+        print(json.dumps(worker.stats()), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Score customer change events as they arrive")
+    parser.add_argument("--source", choices=["file", "socket"], default="file")
+    parser.add_argument("--path", required=True, help="NDJSON file to follow, or Unix socket path to listen on")
+    parser.add_argument("--from-start", action="store_true", help="Read the file from the beginning")
+    parser.add_argument("--snapshot", default=None, help="CSV of known customers to seed the state with")
+    parser.add_argument("--output", default=None, help="Append alerts to this NDJSON file (default: stdout)")
+    parser.add_argument("--errors", default=None, help="Append events that failed to score to this NDJSON file")
+    parser.add_argument("--max-batch", type=int, default=1000, help="Events per micro-batch")
+    parser.add_argument("--max-wait-ms", type=float, default=50.0, help="Longest wait to fill a micro-batch")
+    parser.add_argument("--stats-interval", type=float, default=10.0, help="Seconds between stats lines (0: off)")
+    main(parser.parse_args())
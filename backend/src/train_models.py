@@ -1,4 +1,5 @@
 import pandas as pd
+import numpy as np
 import joblib
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler, OneHotEncoder
@@ -9,7 +10,7 @@ from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
 # 10 Models
 from sklearn.linear_model import LogisticRegression, RidgeClassifier
 from sklearn.ensemble import (
-    RandomForestClassifier, GradientBoostingClassifier, 
+    RandomForestClassifier, GradientBoostingClassifier,
     AdaBoostClassifier, ExtraTreesClassifier
 )
 from sklearn.tree import DecisionTreeClassifier
@@ -18,99 +19,349 @@ from sklearn.svm import SVC
 from sklearn.naive_bayes import GaussianNB
 from sklearn.neural_network import MLPClassifier
 
+import argparse
+import hashlib
+import json
+import math
+import multiprocessing
 import sys
 import os
+import time
 
 # Add root to python path to import src
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from src.utils.preprocessing import apply_feature_engineering
+from src.utils.preprocessing import build_features
 from src.utils.schema import REQUIRED_COLUMNS
+from src.utils.tree_engine import TreeEnsemble, check_exactness, export_ensemble, supports
+from src.utils.model_registry import ENGINE_FILE, MODEL_FILE, ModelRegistry
+
+DATA_PATH = "data/raw/Dataset.csv"
+CACHE_DIR = "data/processed"
+REGISTRY_DIR = os.getenv("CHURN_MODEL_REGISTRY", "src/model/registry")
+RESULTS_PATH = "src/model/tournament_results.json"
+
+NUM_COLS = ["tenure", "MonthlyCharges", "TotalCharges", "charge_per_tenure", "num_services"]
+
+
+def build_models():
+    return {
+        "Logistic Regression": LogisticRegression(max_iter=1000),
+        "Random Forest": RandomForestClassifier(random_state=42),
+        "Gradient Boosting": GradientBoostingClassifier(random_state=42),
+        "AdaBoost": AdaBoostClassifier(random_state=42),
+        "Decision Tree": DecisionTreeClassifier(random_state=42),
+        "K-Nearest Neighbors": KNeighborsClassifier(),
+        "Extra Trees": ExtraTreesClassifier(random_state=42),
+        "MLP Classifier": MLPClassifier(max_iter=1000, random_state=42),
+        "Ridge Classifier": RidgeClassifier(),
+        "SVM (Linear)": SVC(kernel='linear', probability=True, random_state=42)
+    }
+
+
+# ==================================================
+# PREPROCESSING CACHE
+# ==================================================
+def prepare_matrices(data_path):
+    """
+    Fit the preprocessor once and cache the transformed train/test matrices
+    on disk, keyed by the dataset contents
+    """
+    with open(data_path, "rb") as f:
+        data_hash = hashlib.blake2b(f.read(), digest_size=8).hexdigest()
+    cache_path = os.path.join(CACHE_DIR, f"tournament_{data_hash}.joblib")
+
+    if os.path.exists(cache_path):
+        print(f"Using cached preprocessed matrices ({cache_path})")
+        return cache_path, joblib.load(cache_path, mmap_mode="r")
 
-def train_and_evaluate():
     print("Loading data...")
-    df = pd.read_csv("data/raw/Dataset.csv")
-    
+    df = pd.read_csv(data_path)
+
     print("Applying Feature Engineering...")
     # Drop target variable for preprocessing if it exists
     y = df['Churn'].map({'Yes': 1, 'No': 0})
     X = df.drop(columns=['Churn', 'customerID'], errors='ignore')
-    
+
     # Fill defaults and numeric features
-    X = apply_feature_engineering(X)
-    
+    X = build_features(X)
+
     # Categorical and numerical columns
-    num_cols = ["tenure", "MonthlyCharges", "TotalCharges", "charge_per_tenure", "num_services"]
-    cat_cols = [col for col in X.columns if col not in num_cols]
-    
-    print(f"Num Cols: {num_cols}")
+    cat_cols = [col for col in X.columns if col not in NUM_COLS]
+
+    print(f"Num Cols: {NUM_COLS}")
     print(f"Cat Cols: {cat_cols}")
-    
+
     preprocessor = ColumnTransformer(
         transformers=[
-            ('num', StandardScaler(), num_cols),
+            ('num', StandardScaler(), NUM_COLS),
             ('cat', OneHotEncoder(handle_unknown='ignore'), cat_cols)
         ])
-    
+
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    
-    models = {
-        "Logistic Regression": LogisticRegression(max_iter=1000),
-        "Random Forest": RandomForestClassifier(random_state=42),
-        "Gradient Boosting": GradientBoostingClassifier(random_state=42),
-        "AdaBoost": AdaBoostClassifier(random_state=42),
-        "Decision Tree": DecisionTreeClassifier(random_state=42),
-        "K-Nearest Neighbors": KNeighborsClassifier(),
-        "Extra Trees": ExtraTreesClassifier(random_state=42),
-        "MLP Classifier": MLPClassifier(max_iter=1000, random_state=42),
-        "Ridge Classifier": RidgeClassifier(),
-        "SVM (Linear)": SVC(kernel='linear', probability=True, random_state=42)
+
+    print("Fitting preprocessor once for all candidates...")
+    cache = {
+        "preprocessor": preprocessor.fit(X_train),
+        "X_train": preprocessor.transform(X_train),
+        "X_test": preprocessor.transform(X_test),
+        "y_train": y_train.to_numpy(),
+        "y_test": y_test.to_numpy(),
     }
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    joblib.dump(cache, cache_path)
+    return cache_path, cache
+
+
+# ==================================================
+# WORKER SIDE
+# ==================================================
+_matrices = None
+
+
+def _load_matrices(cache_path):
+    # Each worker memory-maps the cached matrices once
+    global _matrices
+    _matrices = joblib.load(cache_path, mmap_mode="r")
+
+
+def _fit_candidate(name, model, n_rows, keep_model):
+    X_train, y_train = _matrices["X_train"][:n_rows], _matrices["y_train"][:n_rows]
+    X_test, y_test = _matrices["X_test"], _matrices["y_test"]
+
+    result = {"name": name, "rows": int(n_rows)}
+    try:
+        started = time.perf_counter()
+        model.fit(X_train, y_train)
+        result["fit_time_s"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        y_pred = model.predict(X_test)
+        result["accuracy"] = accuracy_score(y_test, y_pred)
+        result["f1"] = f1_score(y_test, y_pred)
+
+        if hasattr(model, "predict_proba"):
+            started = time.perf_counter()
+            y_prob = model.predict_proba(X_test)[:, 1]
+            result["latency_us_per_row"] = 1e6 * (time.perf_counter() - started) / len(X_test)
+            result["auc"] = roc_auc_score(y_test, y_prob)
+
+            single = []
+            for i in range(20):
+                started = time.perf_counter()
+                model.predict_proba(X_test[i:i + 1])
+                single.append(time.perf_counter() - started)
+            result["single_row_latency_ms"] = 1e3 * float(np.median(single))
+        else:
+            result["latency_us_per_row"] = 1e6 * (time.perf_counter() - started) / len(X_test)
+            result["auc"] = None
+            result["single_row_latency_ms"] = None
+
+        if keep_model:
+            result["model"] = model
+    except Exception as e:
+        result["error"] = str(e)
+    return result
+
+
+# ==================================================
+# TOURNAMENT
+# ==================================================
+def _run_rung(cache_path, candidates, n_rows, workers, time_budget, keep_model):
+    """
+    Fit every candidate on the first n_rows training rows in parallel.
+    Candidates still running when the rung deadline passes are dropped.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    pool = ctx.Pool(processes=workers, initializer=_load_matrices, initargs=(cache_path,))
+    try:
+        pending = {
+            name: pool.apply_async(_fit_candidate, (name, model, n_rows, keep_model))
+            for name, model in candidates.items()
+        }
+        # Every task gets time_budget seconds once a worker slot frees up
+        deadline = time.perf_counter() + time_budget * math.ceil(len(pending) / workers) + 5
+        results = {}
+        for name, async_result in pending.items():
+            try:
+                results[name] = async_result.get(timeout=max(0.0, deadline - time.perf_counter()))
+            except multiprocessing.TimeoutError:
+                results[name] = {"name": name, "rows": int(n_rows), "error": "time budget exceeded"}
+    finally:
+        pool.terminate()
+    return results
+
+
+def export_tree_engine(classifier, X_test, path, float32=False):
+    """
+    Flatten a winning tree ensemble for the API and check it against sklearn
+    on the holdout set; returns the max probability gap (None if not a tree model)
+    """
+    if not supports(classifier):
+        return None
+
+    export_ensemble(classifier, path, float32=float32)
+    gap = check_exactness(TreeEnsemble.load(path), classifier, X_test)
+    print(f"Exported tree engine (max holdout gap vs sklearn: {gap:.3g})")
+    return gap
+
+
+def publish_model(pipeline, classifier, X_test, metadata, float32=False, promote=True, registry_dir=REGISTRY_DIR):
+    """
+    Write the pipeline (and tree engine) as a new registry version
+    """
+    registry = ModelRegistry(registry_dir)
+    staging = registry.stage()
+    try:
+        joblib.dump(pipeline, os.path.join(staging, MODEL_FILE))
+        metadata = dict(metadata, tree_engine_max_gap=export_tree_engine(
+            classifier, X_test, os.path.join(staging, ENGINE_FILE), float32=float32
+        ))
+        version = registry.commit(staging, metadata, promote=promote)
+    except Exception:
+        registry.discard(staging)
+        raise
+    print(f"Published model version {version}" + (" (now CURRENT)" if promote else ""))
+    return version
+
+
+def train_and_evaluate(data_path=DATA_PATH, workers=None, time_budget=300.0, halving=True,
+                       min_fraction=0.25, max_latency_us=None, tree_float32=False, promote=True):
+    started = time.perf_counter()
+    cache_path, cache = prepare_matrices(data_path)
+    n_train = len(cache["y_train"])
+    workers = workers or os.cpu_count() or 1
+
+    candidates = build_models()
+
+    # Successive halving: start on a fraction of the rows, keep the better
+    # half (by accuracy) each rung, and double the rows until the full set
+    fractions = [1.0]
+    if halving:
+        fractions = []
+        fraction = 1.0
+        while fraction >= min_fraction:
+            fractions.insert(0, fraction)
+            fraction /= 2
+
+    print(f"\nTraining and evaluating {len(candidates)} models on {workers} worker(s)...")
+    eliminated = {}
+    results = {}
+    for i, fraction in enumerate(fractions):
+        n_rows = max(1, int(n_train * fraction))
+        last_rung = i == len(fractions) - 1
+        print(f"-> Rung {i + 1}/{len(fractions)}: {len(candidates)} candidate(s) on {n_rows} rows")
+        results = _run_rung(cache_path, candidates, n_rows, workers, time_budget, keep_model=last_rung)
+
+        survivors = {}
+        for name, result in results.items():
+            if "error" in result:
+                print(f"   {name}: {result['error']}")
+                eliminated[name] = result
+                continue
+            print(f"   {name}: acc={result['accuracy']:.4f} fit={result['fit_time_s']:.2f}s")
+            if not last_rung and result["auc"] is None:
+                # Reported once, but cannot be deployed: the API needs predict_proba
+                result["error"] = "no predict_proba"
+                eliminated[name] = result
+                continue
+            # Fit time roughly scales with rows; drop candidates that would blow the budget
+            if not last_rung and result["fit_time_s"] * fractions[i + 1] / fraction > time_budget:
+                result["error"] = "projected to exceed time budget"
+                eliminated[name] = result
+                continue
+            survivors[name] = result
+
+        if last_rung:
+            break
+
+        keep = sorted(survivors, key=lambda n: survivors[n]["accuracy"], reverse=True)
+        keep = keep[:max(1, math.ceil(len(keep) / 2))]
+        for name in survivors:
+            if name not in keep:
+                eliminated[name] = survivors[name]
+        candidates = {name: candidates[name] for name in keep}
+
+    finalists = {name: r for name, r in results.items() if "error" not in r}
+
+    # --------------------------------------------------
+    # TIMING / METRIC TABLE
+    # --------------------------------------------------
+    rows = []
+    for name, r in list(finalists.items()) + list(eliminated.items()):
+        rows.append({
+            "model": name,
+            "rows": r.get("rows"),
+            "fit_time_s": r.get("fit_time_s"),
+            "latency_us_per_row": r.get("latency_us_per_row"),
+            "single_row_latency_ms": r.get("single_row_latency_ms"),
+            "auc": r.get("auc"),
+            "accuracy": r.get("accuracy"),
+            "status": "finalist" if name in finalists else r.get("error", "eliminated"),
+        })
+    table = pd.DataFrame(rows).sort_values(["status", "accuracy"], ascending=[True, False])
+    print("\n" + table.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
 
-    best_model = None
     best_score = 0
     best_name = ""
-    best_pipeline = None
-
-    print("\nTraining and evaluating 10 models...")
-    for name, model in models.items():
-        print(f"-> Training {name}...")
-        pipeline = Pipeline(steps=[('preprocessor', preprocessor), ('classifier', model)])
-        
-        try:
-            pipeline.fit(X_train, y_train)
-            
-            # Predict
-            if name == "Ridge Classifier":
-                # Ridge doesn't support predict_proba, we handle it if needed
-                y_pred = pipeline.predict(X_test)
-                acc = accuracy_score(y_test, y_pred)
-            else:
-                y_pred = pipeline.predict(X_test)
-                if hasattr(model, "predict_proba"):
-                    y_prob = pipeline.predict_proba(X_test)[:, 1]
-                    auc = roc_auc_score(y_test, y_prob)
-                acc = accuracy_score(y_test, y_pred)
-            
-            print(f"   Accuracy: {acc:.4f}")
-            
-            if acc > best_score:
-                if name != "Ridge Classifier":  # we need predict_proba in the API
-                    best_score = acc
-                    best_model = model
-                    best_name = name
-                    best_pipeline = pipeline
-                    
-        except Exception as e:
-            print(f"   Error training {name}: {e}")
-            
+    best_model = None
+    for name, r in finalists.items():
+        if r["auc"] is None:
+            continue  # we need predict_proba in the API
+        if max_latency_us is not None and r["latency_us_per_row"] > max_latency_us:
+            continue
+        if r["accuracy"] > best_score:
+            best_score = r["accuracy"]
+            best_name = name
+            best_model = r["model"]
+
+    if best_model is None:
+        raise RuntimeError("No candidate model finished within the constraints")
+
     print(f"\n=============================================")
     print(f"🏆 Best Model: {best_name} (Accuracy: {best_score:.4f})")
     print(f"=============================================")
-    
-    model_path = "src/model/churn_model.pkl"
-    os.makedirs(os.path.dirname(model_path), exist_ok=True)
-    joblib.dump(best_pipeline, model_path)
-    print(f"Saved best model pipeline to {model_path}!")
+
+    best_pipeline = Pipeline(steps=[('preprocessor', cache["preprocessor"]), ('classifier', best_model)])
+
+    best = finalists[best_name]
+    metadata = {
+        "model": best_name,
+        "trained_by": "train_models",
+        "metrics": {key: best.get(key) for key in ("accuracy", "auc", "f1", "latency_us_per_row", "single_row_latency_ms")},
+        "input_columns": list(cache["preprocessor"].feature_names_in_),
+        "features": list(cache["preprocessor"].get_feature_names_out()),
+        "train_rows": int(n_train),
+        "fit_time_s": best.get("fit_time_s"),
+        "training_time_s": time.perf_counter() - started,
+        "data_path": data_path,
+        "data_hash": os.path.basename(cache_path).split("_")[-1].split(".")[0],
+    }
+    version = publish_model(best_pipeline, best_model, cache["X_test"], metadata,
+                            float32=tree_float32, promote=promote)
+
+    # Metrics a model has no value for (AUC and latency without
+    # predict_proba) are written as null; NaN is not valid JSON
+    records = table.astype(object).where(table.notna(), None).to_dict(orient="records")
+    os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+    with open(RESULTS_PATH, "w") as f:
+        json.dump({
+            "best_model": best_name,
+            "version": version,
+            "results": records
+        }, f, indent=2, default=str, allow_nan=False)
+    print(f"Saved tournament results to {RESULTS_PATH}")
+    return best_pipeline
+
 
 if __name__ == "__main__":
-    train_and_evaluate()
+    parser = argparse.ArgumentParser(description="Train and select the churn model")
+    parser.add_argument("--data", dest="data_path", default=DATA_PATH)
+    parser.add_argument("--workers", type=int, default=None, help="Parallel training processes (default: CPU count)")
+    parser.add_argument("--time-budget", type=float, default=300.0, help="Seconds allowed per model fit")
+    parser.add_argument("--no-halving", dest="halving", action="store_false", help="Train every model on all rows")
+    parser.add_argument("--min-fraction", type=float, default=0.25, help="Training fraction of the first halving rung")
+    parser.add_argument("--max-latency-us", type=float, default=None, help="Skip models slower than this per scored row")
+    parser.add_argument("--tree-float32", action="store_true", help="Store exported tree node values as float32")
+    parser.add_argument("--no-promote", dest="promote", action="store_false",
+                        help="Publish the version without making it CURRENT (e.g. to shadow it first)")
+    train_and_evaluate(**vars(parser.parse_args()))
@@ -0,0 +1,179 @@
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import joblib
+import numpy as np
+from sklearn.ensemble import ExtraTreesClassifier, GradientBoostingClassifier, RandomForestClassifier
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
+from sklearn.model_selection import train_test_split
+
+# Add root to python path to import src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.train_models import REGISTRY_DIR, publish_model
+from src.utils.file_io import detect_format, read_upload
+from src.utils.model_registry import ModelRegistry
+from src.utils.preprocessing import build_features
+from src.utils.schema import REQUIRED_COLUMNS
+
+LEGACY_MODEL_PATH = "src/model/churn_model.pkl"
+
+# Ensembles that can grow extra trees fitted on the new rows only
+WARM_START_TYPES = (RandomForestClassifier, ExtraTreesClassifier, GradientBoostingClassifier)
+
+# Linear models take a few SGD log-loss epochs over the new rows, starting
+# from their current coefficients; a small constant step keeps the update
+# close to the model fitted on the full history
+LINEAR_TYPES = (LogisticRegression,)
+LINEAR_LEARNING_RATE = 0.001
+
+
+# ==================================================
+# DATA
+# ==================================================
+def load_labelled(path: str, preprocessor):
+    """
+    New labelled rows (REQUIRED_COLUMNS + Churn) as a transformed matrix,
+    using the already-fitted preprocessor of the served model
+    """
+    df = read_upload(path, detect_format(path))
+    df.columns = df.columns.str.strip()
+    missing = [col for col in REQUIRED_COLUMNS + ["Churn"] if col not in df.columns]
+    if missing:
+        raise ValueError(f"Labelled data missing columns: {', '.join(missing)}")
+
+    y = df["Churn"].map({"Yes": 1, "No": 0, 1: 1, 0: 0})
+    if y.isna().any():
+        raise ValueError("Churn must be Yes/No or 1/0")
+
+    X = build_features(df[REQUIRED_COLUMNS])
+    return preprocessor.transform(X), y.to_numpy(dtype=int)
+
+
+def evaluate(classifier, X, y) -> dict:
+    prob = classifier.predict_proba(X)[:, 1]
+    pred = (prob >= 0.5).astype(int)
+    return {
+        "accuracy": accuracy_score(y, pred),
+        "f1": f1_score(y, pred, zero_division=0),
+        "auc": roc_auc_score(y, prob) if len(np.unique(y)) == 2 else None,
+    }
+
+
+# ==================================================
+# UPDATE STRATEGIES
+# ==================================================
+def _update_linear(classifier, X, y, epochs: int):
+    # Same L2 strength as the LogisticRegression objective (C over the batch)
+    sgd = SGDClassifier(
+        loss="log_loss", alpha=1.0 / (classifier.C * len(y)), fit_intercept=classifier.fit_intercept,
+        learning_rate="constant", eta0=LINEAR_LEARNING_RATE, max_iter=epochs, tol=None, random_state=42
+    )
+    with warnings.catch_warnings():
+        # A fixed number of epochs is the point, not convergence
+        warnings.simplefilter("ignore", ConvergenceWarning)
+        sgd.fit(X, y, coef_init=classifier.coef_.copy(), intercept_init=np.array(classifier.intercept_, dtype=float))
+    # Stays a LogisticRegression for the scorer, explainer and metadata
+    classifier.coef_ = sgd.coef_.copy()
+    classifier.intercept_ = np.array(sgd.intercept_, dtype=float)
+
+
+def update_classifier(classifier, X, y, add_trees: int, epochs: int = 5) -> str:
+    """
+    Fit the classifier further on the new rows in place; returns the method used
+    """
+    if hasattr(classifier, "partial_fit"):
+        classifier.partial_fit(X, y, classes=classifier.classes_)
+        return "partial_fit"
+
+    # New trees or a fit on a single class would only know that class
+    # (a forest even drops the other one from classes_)
+    classes = np.unique(y)
+    if len(classes) < 2:
+        raise ValueError(
+            f"The new rows only contain Churn={classes.tolist()}; "
+            f"updating a {type(classifier).__name__} needs churned and retained customers"
+        )
+
+    if isinstance(classifier, WARM_START_TYPES):
+        # Old trees are kept as they are; add_trees new ones are fitted on
+        # the new rows (boosting: on the residuals of the existing stages)
+        classifier.set_params(warm_start=True, n_estimators=len(classifier.estimators_) + add_trees)
+        classifier.fit(X, y)
+        return f"warm_start (+{add_trees} trees)"
+
+    if isinstance(classifier, LINEAR_TYPES):
+        _update_linear(classifier, X, y, epochs)
+        return f"sgd_log_loss ({epochs} epochs from current coefficients)"
+
+    raise ValueError(
+        f"{type(classifier).__name__} supports neither partial_fit, warm-start tree additions "
+        "nor linear coefficient updates; "
+        "retrain with train_models.py instead"
+    )
+
+
+def update_model(data_path: str, base_version: str = None, holdout: float = 0.2, add_trees: int = 10,
+                 epochs: int = 5, promote: bool = True, tree_float32: bool = False, registry_dir: str = REGISTRY_DIR):
+    started = time.perf_counter()
+    registry = ModelRegistry(registry_dir)
+    base_version = base_version or registry.current_version()
+    if base_version:
+        model_path = registry.model_path(base_version)
+        base_metadata = registry.metadata(base_version)
+    else:
+        model_path, base_metadata = LEGACY_MODEL_PATH, {}
+    print(f"Updating model {base_version or model_path}")
+
+    pipeline = joblib.load(model_path)
+    preprocessor = pipeline.named_steps["preprocessor"]
+    classifier = pipeline.steps[-1][1]
+
+    X, y = load_labelled(data_path, preprocessor)
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=holdout, random_state=42, stratify=y if len(np.unique(y)) == 2 else None
+    )
+    print(f"{len(y)} new labelled rows ({len(y_train)} train / {len(y_test)} holdout)")
+
+    before = evaluate(classifier, X_test, y_test)
+
+    fit_started = time.perf_counter()
+    method = update_classifier(classifier, X_train, y_train, add_trees, epochs)
+    fit_time = time.perf_counter() - fit_started
+
+    after = evaluate(classifier, X_test, y_test)
+    print(f"Holdout accuracy {before['accuracy']:.4f} -> {after['accuracy']:.4f} ({method}, {fit_time:.2f}s)")
+
+    metadata = {
+        "model": base_metadata.get("model", type(classifier).__name__),
+        "trained_by": "update_model",
+        "parent_version": base_version,
+        "update_method": method,
+        "metrics": after,
+        "parent_metrics_on_holdout": before,
+        "input_columns": base_metadata.get("input_columns", list(preprocessor.feature_names_in_)),
+        "features": base_metadata.get("features", list(preprocessor.get_feature_names_out())),
+        "rows_added": int(len(y_train)),
+        "train_rows": int(base_metadata.get("train_rows", 0)) + int(len(y_train)),
+        "fit_time_s": fit_time,
+        "training_time_s": time.perf_counter() - started,
+        "data_path": data_path,
+    }
+    return publish_model(pipeline, classifier, X_test, metadata, float32=tree_float32,
+                         promote=promote, registry_dir=registry_dir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Update the churn model with newly labelled rows")
+    parser.add_argument("data_path", help="CSV / Excel / Parquet / Arrow file with REQUIRED_COLUMNS and Churn")
+    parser.add_argument("--base-version", default=None, help="Registry version to update (default: CURRENT)")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Fraction of the new rows kept for evaluation")
+    parser.add_argument("--add-trees", type=int, default=10, help="Trees added to forests / boosting per update")
+    parser.add_argument("--epochs", type=int, default=5, help="SGD epochs over the new rows for linear models")
+    parser.add_argument("--no-promote", dest="promote", action="store_false", help="Publish without making it CURRENT")
+    parser.add_argument("--tree-float32", action="store_true", help="Store exported tree node values as float32")
+    update_model(**vars(parser.parse_args()))
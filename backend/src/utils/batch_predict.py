@@ -1,32 +1,26 @@
+import os
 import pandas as pd
 import joblib
-from src.feature.feature_engineering import feature_engineering
 from src.utils.schema import REQUIRED_COLUMNS
+from src.utils.batch_scoring import risk_segments
+from src.utils.retention import STRATEGY_MESSAGES, assign_strategy_codes
+from src.utils.parallel_scoring import ShardedScorer
+from src.utils.model_registry import ModelRegistry
 
-MODEL_PATH = "src/model/churn_model.pkl"
-model = joblib.load(MODEL_PATH)
+REGISTRY_DIR = os.getenv("CHURN_MODEL_REGISTRY", "src/model/registry")
+LEGACY_MODEL_PATH = "src/model/churn_model.pkl"
 
-# ------------------------
-# Risk Bucketing
-# ------------------------
-def risk_bucket(prob):
-    if prob < 0.3:
-        return "Low Risk"
-    elif prob < 0.6:
-        return "Medium Risk"
-    else:
-        return "High Risk"
+# The registry's CURRENT version, or the fixed path before the first publish
+_registry = ModelRegistry(REGISTRY_DIR)
+MODEL_PATH = _registry.model_path(_registry.current_version()) if _registry.current_version() else LEGACY_MODEL_PATH
+model = joblib.load(MODEL_PATH, mmap_mode="r")
 
-# ------------------------
-# Action Recommendation
-# ------------------------
-def recommend_action(risk):
-    if risk == "High Risk":
-        return "Immediate retention offer & contract upgrade"
-    elif risk == "Medium Risk":
-        return "Engagement campaign & personalized discount"
-    else:
-        return "Upsell & loyalty rewards"
+# Large frames are sharded across a persistent process pool
+sharded_scorer = ShardedScorer(
+    MODEL_PATH,
+    workers=int(os.getenv("CHURN_POOL_WORKERS", str(os.cpu_count() or 1))),
+    min_rows=int(os.getenv("CHURN_POOL_MIN_ROWS", "50000")),
+)
 
 # ------------------------
 # MAIN FUNCTION
@@ -44,20 +38,21 @@ def run_batch_prediction(df: pd.DataFrame) -> pd.DataFrame:
     df["MonthlyCharges"] = pd.to_numeric(df["MonthlyCharges"], errors="coerce").fillna(0)
     df["TotalCharges"] = pd.to_numeric(df["TotalCharges"], errors="coerce").fillna(0)
 
-    # Feature engineering
-    df_fe = feature_engineering(df)
-
-    # Prediction
-    probs = model.predict_proba(df_fe)[:, 1]
+    # Feature engineering + prediction (in-process or sharded)
+    probs = sharded_scorer.predict(df, model)
 
     df["Churn_Probability"] = probs
-    df["Risk_Level"] = df["Churn_Probability"].apply(risk_bucket)
+    # Same cut-offs as the API and the retention rule table
+    df["Risk_Level"] = risk_segments(probs)
 
     # Revenue risk (12 months)
     df["Revenue_At_Risk"] = df["Churn_Probability"] * df["MonthlyCharges"] * 12
 
-    # Actions
-    df["Recommended_Action"] = df["Risk_Level"].apply(recommend_action)
+    # Actions (shared rule table with the API)
+    codes = assign_strategy_codes(df, probs)
+    df["Recommended_Action"] = codes.rename_categories(
+        [STRATEGY_MESSAGES[code] for code in codes.categories]
+    )
 
     return df[
         [
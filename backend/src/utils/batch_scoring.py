@@ -0,0 +1,322 @@
+import numpy as np
+import pandas as pd
+
+from src.utils.metrics import metrics
+from src.utils.preprocessing import build_features
+from src.utils.retention import assign_strategy_codes
+from src.utils.scorer import frame_scorer
+from src.utils.schema import REQUIRED_COLUMNS, ValidationResult, schema_validator
+
+RISK_LABELS = ["Low Risk", "Medium Risk", "High Risk"]
+# A segment includes its upper bound: [0, 0.4], (0.4, 0.7], (0.7, 1], the
+# same tiers as the retention rules' "churn_probability > x" conditions
+RISK_BINS = [0, 0.4, 0.7, 1.0]
+
+# Revenue at risk is projected over this many months of MonthlyCharges
+REVENUE_HORIZON_MONTHS = 6
+
+# Rows with identical engineered feature vectors are scored once per batch,
+# unless the batch is small or a sample shows too few duplicates to pay off
+DEDUP_MIN_ROWS = 1_000
+DEDUP_SAMPLE_ROWS = 10_000
+DEDUP_MAX_UNIQUE_RATIO = 0.9
+
+PREDICTION_COLUMNS = [
+    "customerID", "customerName", "risk_segment", "churn_probability", "revenue_at_risk", "strategy_code"
+]
+
+
+# ------------------------
+# Frame preparation
+# ------------------------
+def prepare_frame(df: pd.DataFrame, id_offset: int = 0) -> pd.DataFrame:
+    """
+    Strip column names and guarantee customerID & customerName.
+    id_offset keeps generated IDs unique across chunks of one upload.
+    """
+    df.columns = df.columns.str.strip()
+
+    if "customerID" not in df.columns:
+        df.insert(0, "customerID", ["CUST_" + str(i) for i in range(id_offset + 1, id_offset + len(df) + 1)])
+    if "customerName" not in df.columns:
+        df.insert(1, "customerName", ["Unknown"] * len(df))
+    return df
+
+
+def missing_columns(df: pd.DataFrame) -> list:
+    return [col for col in REQUIRED_COLUMNS if col not in df.columns]
+
+
+# ------------------------
+# Risk segments
+# ------------------------
+def risk_segment_codes(probabilities) -> np.ndarray:
+    """
+    Index into RISK_LABELS of each probability (-1 for NaN)
+    """
+    probabilities = np.asarray(probabilities, dtype=float)
+    codes = np.searchsorted(RISK_BINS[1:-1], probabilities, side="left")
+    return np.where(np.isnan(probabilities), -1, codes)
+
+
+def risk_segments(probabilities) -> pd.Categorical:
+    return pd.Categorical.from_codes(risk_segment_codes(probabilities), categories=RISK_LABELS, ordered=True)
+
+
+def risk_segment(probability: float) -> str:
+    return RISK_LABELS[int(risk_segment_codes(probability))]
+
+
+def validate_frame(df: pd.DataFrame):
+    """
+    (rows of a prepared frame whose values pass schema.COLUMN_SPECS,
+    ValidationResult). The returned rows carry the checked columns in the
+    dtypes build_features uses, so validation replaces its conversions
+    rather than repeating them.
+    """
+    with metrics.span("validate_values", rows=len(df)):
+        result = schema_validator.validate(df)
+        valid = df.copy(deep=False)
+        for col, values in result.columns.items():
+            valid[col] = values
+        if result.rejected:
+            valid = valid[result.valid]
+    return valid, result
+
+
+# ------------------------
+# Scoring
+# ------------------------
+def predict_probabilities(df: pd.DataFrame, model, dedup: "DedupStats" = None) -> np.ndarray:
+    """
+    Feature engineering + predict_proba on a raw customer frame
+    """
+    with metrics.span("feature_engineering", rows=len(df)):
+        df_features = build_features(
+            df.drop(columns=["customerID", "customerName"], errors="ignore")
+        )
+    return predict_feature_probabilities(df_features, model, dedup)
+
+
+def feature_groups(df_features: pd.DataFrame) -> np.ndarray:
+    """
+    Group number of every row's engineered feature vector. Category codes
+    are packed into one integer key, so rows share a group only if all
+    their features are equal.
+    """
+    packed = np.zeros(len(df_features), dtype=np.int64)
+    radix = 1
+    keys = {}
+    for col in df_features.columns:
+        values = df_features[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            size = len(values.cat.categories) + 1
+            codes = values.cat.codes.to_numpy().astype(np.int64) + 1
+            if radix * size < 2 ** 62:
+                packed += codes * radix
+                radix *= size
+                continue
+            values = codes
+        keys[col] = np.asarray(values)
+    keys["_categories"] = packed
+    frame = pd.DataFrame(keys)
+    return frame.groupby(list(keys), sort=False, dropna=False).ngroup().to_numpy()
+
+
+def predict_feature_probabilities(df_features: pd.DataFrame, model, dedup: "DedupStats" = None) -> np.ndarray:
+    """
+    predict_proba on an already engineered frame. Identical feature vectors
+    are scored once and their result is copied to every matching row.
+    """
+    n = len(df_features)
+    groups = None
+    if n >= DEDUP_MIN_ROWS:
+        with metrics.span("dedup", rows=n):
+            # The distinct share of a sample overestimates the batch's, so a
+            # skipped batch never had enough duplicates to be worth grouping
+            sample = df_features
+            if n > DEDUP_SAMPLE_ROWS:
+                rows = np.random.default_rng(0).choice(n, DEDUP_SAMPLE_ROWS, replace=False)
+                sample = df_features.iloc[rows]
+            if feature_groups(sample).max() + 1 <= DEDUP_MAX_UNIQUE_RATIO * len(sample):
+                groups = feature_groups(df_features)
+
+    if groups is None:
+        if dedup is not None:
+            dedup.add(n, n, grouped=False)
+        return _predict_features(df_features, model)
+
+    representative = np.empty(groups.max() + 1, dtype=np.int64)
+    representative[groups] = np.arange(n)
+    if dedup is not None:
+        dedup.add(n, len(representative), grouped=True)
+    return _predict_features(df_features.iloc[representative], model)[groups]
+
+
+def _predict_features(df_features: pd.DataFrame, model) -> np.ndarray:
+    with metrics.span("predict_proba", rows=len(df_features)):
+        scorer = frame_scorer(model)
+        if scorer is not None:
+            return scorer.predict_frame(df_features)
+        return model.predict_proba(df_features)[:, 1]
+
+
+def score_frame(df: pd.DataFrame, predict) -> pd.DataFrame:
+    """
+    Add churn_probability, risk_segment, revenue_at_risk and strategy_code
+    to a prepared frame. predict maps a raw frame to churn probabilities.
+    """
+    df["churn_probability"] = predict(df)
+
+    with metrics.span("risk_scoring", rows=len(df)):
+        df["risk_segment"] = risk_segments(df["churn_probability"])
+
+        df["revenue_at_risk"] = df["MonthlyCharges"] * df["churn_probability"] * REVENUE_HORIZON_MONTHS
+
+        df["strategy_code"] = assign_strategy_codes(df, df["churn_probability"])
+    return df
+
+
+# ------------------------
+# Summary
+# ------------------------
+class SegmentSummary:
+    """
+    Running per-segment customer count and revenue at risk.
+    Memory is constant no matter how many chunks are added.
+    """
+
+    def __init__(self):
+        self.customers = np.zeros(len(RISK_LABELS), dtype=np.int64)
+        self.revenue_at_risk = np.zeros(len(RISK_LABELS))
+
+    def add(self, df: pd.DataFrame):
+        codes = df["risk_segment"].cat.codes.to_numpy()
+        valid = codes >= 0
+        codes = codes[valid]
+        revenue = df["revenue_at_risk"].to_numpy(dtype=float)[valid]
+        self.customers += np.bincount(codes, minlength=len(RISK_LABELS))
+        self.revenue_at_risk += np.bincount(
+            codes,
+            weights=np.nan_to_num(revenue, nan=0.0),
+            minlength=len(RISK_LABELS)
+        )
+
+    def records(self) -> list:
+        return [
+            {
+                "risk_segment": label,
+                "customers": int(self.customers[i]),
+                "revenue_at_risk": float(self.revenue_at_risk[i]),
+            }
+            for i, label in enumerate(RISK_LABELS)
+        ]
+
+
+def top_k_positions(values: np.ndarray, k: int) -> np.ndarray:
+    """
+    Positions of the k largest values, largest first (equal values keep
+    their order). Partial selection keeps this linear in len(values).
+    """
+    if k < 1:
+        return np.array([], dtype=np.intp)
+    values = np.where(np.isnan(values), -np.inf, values)
+    if k < len(values):
+        # Everything above the k-th largest value, then the earliest ties
+        kth = -np.partition(-values, k - 1)[k - 1]
+        above = np.flatnonzero(values > kth)
+        candidates = np.concatenate([above, np.flatnonzero(values == kth)[:k - len(above)]])
+    else:
+        candidates = np.arange(len(values))
+    return candidates[np.lexsort((candidates, -values[candidates]))]
+
+
+class TopRevenueAtRisk:
+    """
+    Running top k customers by revenue_at_risk, over the whole batch or
+    per risk segment. Each added chunk is cut down to its own top k rows
+    and merged with the k rows kept so far, so memory and output size
+    depend on k, not on how many rows are added.
+    """
+
+    def __init__(self, k: int, per_segment: bool = False, columns: list = None):
+        self.k = max(1, int(k))
+        self.per_segment = per_segment
+        self.columns = list(columns or PREDICTION_COLUMNS)
+        self._kept = {}
+
+    def add(self, df: pd.DataFrame):
+        if not len(df):
+            return
+        revenue = df["revenue_at_risk"].to_numpy(dtype=float)
+        if self.per_segment:
+            codes = df["risk_segment"].cat.codes.to_numpy()
+            groups = [(label, np.flatnonzero(codes == i)) for i, label in enumerate(RISK_LABELS)]
+        else:
+            groups = [(None, np.arange(len(df)))]
+
+        for group, rows in groups:
+            if not len(rows):
+                continue
+            top = df.iloc[rows[top_k_positions(revenue[rows], self.k)]][self.columns]
+            kept = self._kept.get(group)
+            if kept is not None:
+                # Kept rows come first, so ties still favour earlier rows
+                top = pd.concat([kept, top], ignore_index=True)
+                top = top.iloc[top_k_positions(top["revenue_at_risk"].to_numpy(dtype=float), self.k)]
+            self._kept[group] = top.reset_index(drop=True)
+
+    def frame(self) -> pd.DataFrame:
+        groups = RISK_LABELS[::-1] if self.per_segment else [None]
+        frames = [self._kept[group] for group in groups if group in self._kept]
+        if not frames:
+            return pd.DataFrame(columns=self.columns)
+        return pd.concat(frames, ignore_index=True)
+
+    def records(self):
+        """
+        The kept rows, highest revenue at risk first: a list, or a list per
+        risk segment (highest risk first) with per_segment
+        """
+        if not self.per_segment:
+            kept = self._kept.get(None)
+            return [] if kept is None else kept.to_dict(orient="records")
+        return {
+            label: self._kept[label].to_dict(orient="records") if label in self._kept else []
+            for label in RISK_LABELS[::-1]
+        }
+
+
+class DedupStats:
+    """
+    Running totals of rows received vs feature vectors actually scored
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.scored_rows = 0
+        self.grouped_batches = 0
+        self.skipped_batches = 0
+
+    def add(self, rows: int, scored_rows: int, grouped: bool):
+        self.rows += rows
+        self.scored_rows += scored_rows
+        if grouped:
+            self.grouped_batches += 1
+        else:
+            self.skipped_batches += 1
+
+    def merge(self, other: "DedupStats"):
+        self.rows += other.rows
+        self.scored_rows += other.scored_rows
+        self.grouped_batches += other.grouped_batches
+        self.skipped_batches += other.skipped_batches
+
+    def records(self) -> dict:
+        return {
+            "rows": self.rows,
+            "scored_rows": self.scored_rows,
+            "dedup_ratio": 1.0 - self.scored_rows / self.rows if self.rows else 0.0,
+            "grouped_batches": self.grouped_batches,
+            "skipped_batches": self.skipped_batches,
+        }
@@ -0,0 +1,113 @@
+import asyncio
+import time
+
+
+class PredictionCoalescer:
+    """
+    Collects concurrent single-customer predictions into one vectorized call.
+
+    Payloads are queued and flushed together as soon as either max_batch_size
+    requests are waiting or the oldest request has waited max_wait_ms. Each
+    caller gets back its own probability.
+    """
+
+    def __init__(self, predict_many, max_batch_size: int = 64, max_wait_ms: float = 2.0):
+        self.predict_many = predict_many
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._queue = None
+        self._loop = None
+        self._worker = None
+
+        self.requests = 0
+        self.batches = 0
+        self.max_batch_seen = 0
+        self.total_queue_delay = 0.0
+        self.max_queue_delay = 0.0
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, payload: dict) -> float:
+        self._ensure_worker()
+        future = self._loop.create_future()
+        await self._queue.put((payload, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self) -> list:
+        batch = [await self._queue.get()]
+        deadline = batch[0][2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                # Take whatever is already waiting without blocking
+                while len(batch) < self.max_batch_size and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def _score(self, payloads: list) -> list:
+        try:
+            return [float(p) for p in self.predict_many(payloads)]
+        except Exception:
+            if len(payloads) == 1:
+                raise
+        # Isolate the failing payload(s) instead of failing the whole batch
+        results = []
+        for payload in payloads:
+            try:
+                results.append(float(self.predict_many([payload])[0]))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            flushed_at = time.perf_counter()
+
+            self.batches += 1
+            self.requests += len(batch)
+            self.max_batch_seen = max(self.max_batch_seen, len(batch))
+            for _, _, enqueued_at in batch:
+                delay = flushed_at - enqueued_at
+                self.total_queue_delay += delay
+                self.max_queue_delay = max(self.max_queue_delay, delay)
+
+            payloads = [payload for payload, _, _ in batch]
+            try:
+                results = await loop.run_in_executor(None, self._score, payloads)
+            except Exception as e:
+                results = [e] * len(batch)
+
+            for (_, future, _), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": True,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "requests": self.requests,
+            "batches": self.batches,
+            "avg_batch_size": self.requests / self.batches if self.batches else 0.0,
+            "max_batch_size_seen": self.max_batch_seen,
+            "avg_queue_delay_ms": 1000.0 * self.total_queue_delay / self.requests if self.requests else 0.0,
+            "max_queue_delay_ms": 1000.0 * self.max_queue_delay,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+        }
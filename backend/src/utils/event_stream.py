@@ -0,0 +1,392 @@
+import json
+import logging
+import os
+import queue
+import socket
+import sys
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from src.utils.batch_scoring import RISK_LABELS, risk_segment_codes
+from src.utils.schema import REQUIRED_COLUMNS, schema_validator
+
+logger = logging.getLogger(__name__)
+
+
+# ==================================================
+# SOURCES
+# ==================================================
+# A source yields change events: dicts with a customerID, any subset of
+# REQUIRED_COLUMNS and optionally event_time (epoch seconds, used for lag).
+# poll() returns up to max_events events, waiting at most timeout seconds.
+
+class QueueSource:
+    """
+    In-process source; producers put event dicts on .queue
+    """
+
+    def __init__(self, maxsize: int = 0):
+        self.queue = queue.Queue(maxsize=maxsize)
+
+    def put(self, event: dict):
+        self.queue.put(dict(event, _received_at=time.time()))
+
+    def poll(self, max_events: int, timeout: float) -> list:
+        events = []
+        try:
+            events.append(self.queue.get(timeout=timeout))
+            while len(events) < max_events:
+                events.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        return events
+
+    def close(self):
+        pass
+
+
+def _parse_line(line: bytes):
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        event = json.loads(line)
+    except ValueError:
+        logger.warning("Skipping malformed event: %.200r", line)
+        return None
+    if not isinstance(event, dict) or "customerID" not in event:
+        logger.warning("Skipping event without customerID: %.200r", line)
+        return None
+    event["_received_at"] = time.time()
+    return event
+
+
+class FileTailSource:
+    """
+    Follows a newline-delimited JSON file like `tail -f`. Starts at the end
+    of the file unless from_start; a partially written last line is kept
+    until its newline arrives.
+    """
+
+    def __init__(self, path: str, from_start: bool = False, poll_interval: float = 0.05):
+        self.path = path
+        self.poll_interval = poll_interval
+        self._file = open(path, "rb")
+        if not from_start:
+            self._file.seek(0, os.SEEK_END)
+        self._partial = b""
+
+    def poll(self, max_events: int, timeout: float) -> list:
+        deadline = time.monotonic() + timeout
+        events = []
+        while len(events) < max_events:
+            line = self._file.readline()
+            if line.endswith(b"\n"):
+                event = _parse_line(self._partial + line)
+                self._partial = b""
+                if event is not None:
+                    events.append(event)
+                continue
+            self._partial += line
+            if events or time.monotonic() >= deadline:
+                break
+            time.sleep(self.poll_interval)
+        return events
+
+    def close(self):
+        self._file.close()
+
+
+class UnixSocketSource(QueueSource):
+    """
+    Listens on a Unix socket; every connected client streams
+    newline-delimited JSON events
+    """
+
+    def __init__(self, path: str, maxsize: int = 100_000):
+        super().__init__(maxsize=maxsize)
+        self.path = path
+        if os.path.exists(path):
+            os.unlink(path)
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(path)
+        self._server.listen()
+        self._closed = threading.Event()
+        threading.Thread(target=self._accept, name="event-socket", daemon=True).start()
+
+    def _accept(self):
+        while not self._closed.is_set():
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._read, args=(conn,), daemon=True).start()
+
+    def _read(self, conn):
+        with conn, conn.makefile("rb") as stream:
+            for line in stream:
+                event = _parse_line(line)
+                if event is not None:
+                    self.queue.put(event)
+
+    def close(self):
+        self._closed.set()
+        self._server.close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+
+# ==================================================
+# SINKS
+# ==================================================
+class JsonLinesSink:
+    """
+    Writes threshold-crossing (or failed) events as JSON lines (stdout by default)
+    """
+
+    def __init__(self, path: str = None):
+        self._stream = open(path, "a") if path else sys.stdout
+        self._owned = path is not None
+
+    def __call__(self, event: dict):
+        self._stream.write(json.dumps(event, default=str) + "\n")
+        self._stream.flush()
+
+    def close(self):
+        if self._owned:
+            self._stream.close()
+
+
+# ==================================================
+# WORKER
+# ==================================================
+def _segment(probabilities: np.ndarray) -> np.ndarray:
+    # Same buckets as the batch risk_segment
+    return risk_segment_codes(probabilities)
+
+
+class StreamScorer:
+    """
+    Keeps the latest attributes of every customer, re-scores only the
+    customers changed by each micro-batch of events and emits an alert
+    whenever a customer moves to another risk segment.
+
+    predict maps a raw frame of REQUIRED_COLUMNS to churn probabilities.
+    Customers are scored once all REQUIRED_COLUMNS are known; their first
+    score is the baseline and does not alert.
+
+    Event fields are checked against schema.COLUMN_SPECS before they are
+    merged, like every other ingestion path; an event with an invalid
+    value is rejected as a whole. A micro-batch that fails to score is
+    retried one event at a time. Rejected and failed events are logged,
+    counted and passed to error_sink (if any) without changing the state,
+    and the worker keeps running.
+    """
+
+    def __init__(self, source, predict, sink, max_batch: int = 1000, max_wait_ms: float = 50.0,
+                 lag_window: int = 10_000, error_sink=None):
+        self.source = source
+        self.predict = predict
+        self.sink = sink
+        self.error_sink = error_sink
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self.rows = {}
+        self.probabilities = {}
+        self._stop = threading.Event()
+
+        self.started_at = time.time()
+        self.events = 0
+        self.batches = 0
+        self.rescored = 0
+        self.alerts = 0
+        self.incomplete = 0
+        self.failed_batches = 0
+        self.failed_events = 0
+        self.invalid_events = 0
+        self._lags = deque(maxlen=lag_window)
+
+    def load_snapshot(self, df: pd.DataFrame):
+        """
+        Seed the state from a frame of known customers (no alerts); rows
+        with invalid values are skipped
+        """
+        validation = schema_validator.validate(df[REQUIRED_COLUMNS])
+        if validation.rejected:
+            logger.warning("Skipping %d snapshot rows with invalid values: %s",
+                           validation.rejected, validation.by_column())
+            df = df[validation.valid]
+        records = df[["customerID"] + REQUIRED_COLUMNS].to_dict(orient="records")
+        for record in records:
+            self.rows[str(record.pop("customerID"))] = record
+        self._score(list(self.rows), [None] * len(self.rows), alert=False)
+
+    def _score(self, customer_ids: list, event_times: list, alert: bool = True):
+        ready = [cid for cid in customer_ids if len(self.rows[cid]) >= len(REQUIRED_COLUMNS)]
+        self.incomplete += len(customer_ids) - len(ready)
+        if not ready:
+            return
+
+        frame = pd.DataFrame([self.rows[cid] for cid in ready], columns=REQUIRED_COLUMNS)
+        probs = np.asarray(self.predict(frame), dtype=float)
+        scored_at = time.time()
+        self.rescored += len(ready)
+
+        previous = np.array([self.probabilities.get(cid, np.nan) for cid in ready])
+        known = ~np.isnan(previous)
+        new_segment = _segment(probs)
+        old_segment = _segment(np.where(known, previous, 0.0))
+        crossed = np.flatnonzero(known & (new_segment != old_segment)) if alert else []
+
+        times = dict(zip(customer_ids, event_times))
+        for cid, prob in zip(ready, probs):
+            self.probabilities[cid] = float(prob)
+            if times.get(cid) is not None:
+                self._lags.append(scored_at - times[cid])
+
+        for i in crossed:
+            cid = ready[i]
+            self.alerts += 1
+            self.sink({
+                "type": "risk_threshold_crossed",
+                "customerID": cid,
+                "previous_probability": float(previous[i]),
+                "churn_probability": float(probs[i]),
+                "previous_segment": RISK_LABELS[old_segment[i]],
+                "risk_segment": RISK_LABELS[new_segment[i]],
+                "direction": "up" if new_segment[i] > old_segment[i] else "down",
+                "event_time": times.get(cid),
+                "scored_at": scored_at,
+            })
+
+    def _validate(self, events: list) -> list:
+        """
+        Events whose fields pass the column specs; the others are rejected
+        """
+        valid = []
+        for event in events:
+            reasons = schema_validator.check_record(event) if isinstance(event, dict) else ["not an object"]
+            if reasons:
+                self.invalid_events += 1
+                self._reject(event, ValueError("; ".join(reasons)), "invalid_event")
+            else:
+                valid.append(event)
+        return valid
+
+    def process(self, events: list):
+        """
+        Apply one micro-batch of change events and re-score the customers
+        it touched (each once, with its latest attributes)
+        """
+        events = self._validate(events)
+        if events:
+            self._apply(events)
+
+    def _apply(self, events: list):
+        changed = {}
+        previous_rows = {}
+        try:
+            for event in events:
+                cid = str(event["customerID"])
+                if cid not in previous_rows:
+                    previous_rows[cid] = dict(self.rows[cid]) if cid in self.rows else None
+                row = self.rows.setdefault(cid, {})
+                for col in REQUIRED_COLUMNS:
+                    if col in event:
+                        row[col] = event[col]
+                # Lag is measured from the oldest unscored change of a customer
+                event_time = event.get("event_time") or event.get("_received_at")
+                if cid not in changed or changed[cid] is None:
+                    changed[cid] = event_time
+                elif event_time is not None:
+                    changed[cid] = min(changed[cid], event_time)
+
+            self._score(list(changed), list(changed.values()))
+        except Exception:
+            # Roll the rows back so a bad value does not fail later batches
+            for cid, row in previous_rows.items():
+                if row is None:
+                    self.rows.pop(cid, None)
+                else:
+                    self.rows[cid] = row
+            raise
+
+        self.events += len(events)
+        self.batches += 1
+
+    def _process_safely(self, events: list):
+        events = self._validate(events)
+        if not events:
+            return
+        try:
+            self._apply(events)
+            return
+        except Exception as e:
+            self.failed_batches += 1
+            if len(events) == 1:
+                self._reject(events[0], e)
+                return
+            logger.warning("Scoring a batch of %d events failed (%s), retrying one by one", len(events), e)
+
+        for event in events:
+            try:
+                self._apply([event])
+            except Exception as e:
+                self._reject(event, e)
+
+    def _reject(self, event, error: Exception, kind: str = "scoring_error"):
+        self.failed_events += 1
+        customer_id = event.get("customerID") if isinstance(event, dict) else None
+        logger.warning("Dropping event for customer %s: %s: %s", customer_id, type(error).__name__, error)
+        if self.error_sink is None:
+            return
+        try:
+            self.error_sink({
+                "type": kind,
+                "error": f"{type(error).__name__}: {error}",
+                "event": {k: v for k, v in event.items() if not k.startswith("_")} if isinstance(event, dict) else event,
+                "failed_at": time.time(),
+            })
+        except Exception:
+            logger.exception("Error sink failed")
+
+    def run(self, max_events: int = None):
+        """
+        Consume the source until stop() (or max_events have been processed)
+        """
+        while not self._stop.is_set():
+            events = self.source.poll(self.max_batch, self.max_wait)
+            if events:
+                self._process_safely(events)
+            if max_events is not None and self.events + self.failed_events >= max_events:
+                break
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self) -> dict:
+        elapsed = max(time.time() - self.started_at, 1e-9)
+        lags = np.array(self._lags) if self._lags else None
+        return {
+            "customers": len(self.rows),
+            "events": self.events,
+            "batches": self.batches,
+            "rescored": self.rescored,
+            "incomplete_rows": self.incomplete,
+            "alerts": self.alerts,
+            "failed_batches": self.failed_batches,
+            "failed_events": self.failed_events,
+            "invalid_events": self.invalid_events,
+            "events_per_second": self.events / elapsed,
+            "rescored_per_second": self.rescored / elapsed,
+            "lag_ms_p50": 1e3 * float(np.percentile(lags, 50)) if lags is not None else None,
+            "lag_ms_p99": 1e3 * float(np.percentile(lags, 99)) if lags is not None else None,
+            "lag_ms_max": 1e3 * float(lags.max()) if lags is not None else None,
+        }
@@ -0,0 +1,154 @@
+import weakref
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import OneHotEncoder
+
+from src.utils.preprocessing import SERVICE_COLUMNS, build_features
+from src.utils.schema import REQUIRED_COLUMNS
+from src.utils.scorer import frame_scorer
+from src.utils.tree_engine import TreeEnsemble, flatten_ensemble, supports
+
+# Input columns each engineered feature is derived from; its contribution
+# is shared evenly between them
+FEATURE_SOURCES = {
+    "charge_per_tenure": ["MonthlyCharges", "tenure"],
+    "num_services": SERVICE_COLUMNS,
+    "tenure_group": ["tenure"],
+}
+
+# Rows explained per vectorised pass (bounds the (rows x trees) work arrays)
+EXPLAIN_CHUNK_ROWS = 10_000
+
+
+class Explainer:
+    """
+    Per-customer feature contributions for a fitted pipeline, aggregated
+    back to REQUIRED_COLUMNS.
+
+    - linear classifiers: coefficient x transformed value, exact in
+      decision-function (log-odds) units
+    - tree ensembles: path attributions over the flattened trees, in
+      log-odds for gradient boosting and probability for forests
+
+    The bias plus the contributions of a row add up to its model output.
+    """
+
+    def __init__(self, model):
+        self.preprocessor = model.named_steps["preprocessor"]
+        self.classifier = model.steps[-1][1]
+        self.scorer = frame_scorer(model)
+
+        coef = getattr(self.classifier, "coef_", None)
+        if coef is not None and np.ndim(coef) == 2 and coef.shape[0] == 1:
+            self.method = "linear"
+            self.units = "log_odds"
+            self.coef = np.asarray(coef[0], dtype=float)
+            self.intercept = float(np.ravel(self.classifier.intercept_)[0])
+        elif supports(self.classifier):
+            self.method = "tree_path"
+            self.engine = TreeEnsemble(flatten_ensemble(self.classifier))
+            self.units = "log_odds" if self.engine.kind == "gbdt" else "probability"
+        else:
+            raise ValueError(f"No fast explanation method for {type(self.classifier).__name__}")
+
+        self.aggregation = self._aggregation_matrix()
+
+    def _aggregation_matrix(self) -> np.ndarray:
+        """
+        (transformed features x REQUIRED_COLUMNS) weights
+        """
+        n_features = sum(s.stop - s.start for s in self.preprocessor.output_indices_.values())
+        matrix = np.zeros((n_features, len(REQUIRED_COLUMNS)))
+        position = {col: i for i, col in enumerate(REQUIRED_COLUMNS)}
+
+        for name, transformer, columns in self.preprocessor.transformers_:
+            if name == "remainder" and transformer == "drop":
+                continue
+            index = self.preprocessor.output_indices_[name].start
+            for i, col in enumerate(columns):
+                width = len(transformer.categories_[i]) if isinstance(transformer, OneHotEncoder) else 1
+                sources = FEATURE_SOURCES.get(col, [col])
+                for source in sources:
+                    matrix[index:index + width, position[source]] = 1.0 / len(sources)
+                index += width
+        return matrix
+
+    def _transform(self, features: pd.DataFrame) -> np.ndarray:
+        if self.scorer is not None:
+            return self.scorer.transform_frame(features)
+        X = self.preprocessor.transform(features)
+        return X.toarray() if hasattr(X, "toarray") else np.asarray(X)
+
+    def explain_frame(self, df: pd.DataFrame):
+        """
+        (bias, contributions) for a raw customer frame; contributions is a
+        DataFrame with one column per REQUIRED_COLUMN
+        """
+        features = build_features(df[REQUIRED_COLUMNS])
+        blocks = []
+        for start in range(0, len(features), EXPLAIN_CHUNK_ROWS):
+            X = self._transform(features.iloc[start:start + EXPLAIN_CHUNK_ROWS])
+            if self.method == "linear":
+                contributions = X * self.coef
+            else:
+                _, contributions = self.engine.contributions(X)
+            blocks.append(contributions @ self.aggregation)
+
+        values = np.vstack(blocks) if blocks else np.zeros((0, len(REQUIRED_COLUMNS)))
+        return self.bias, pd.DataFrame(values, columns=REQUIRED_COLUMNS, index=df.index)
+
+    @property
+    def bias(self) -> float:
+        return self.intercept if self.method == "linear" else self.engine.bias
+
+    def top_drivers(self, df: pd.DataFrame, top_k: int = 5) -> list:
+        """
+        The top_k columns with the largest absolute contribution per row,
+        each as {"feature", "value", "contribution"}
+        """
+        _, contributions = self.explain_frame(df)
+        values = contributions.to_numpy()
+        k = max(1, min(int(top_k), values.shape[1]))
+        order = np.argsort(-np.abs(values), axis=1, kind="stable")[:, :k]
+
+        raw = df[REQUIRED_COLUMNS].astype(object).to_numpy()
+        return [
+            [
+                {
+                    "feature": REQUIRED_COLUMNS[j],
+                    "value": _plain(raw[i, j]),
+                    "contribution": float(values[i, j]),
+                }
+                for j in order[i]
+            ]
+            for i in range(len(values))
+        ]
+
+
+def _plain(value):
+    # JSON-safe scalar (NumPy scalars unwrapped, NaN as None)
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+
+_explainers = weakref.WeakKeyDictionary()
+
+
+def explainer_for(model) -> Explainer:
+    """
+    Cached Explainer of a loaded model
+    """
+    try:
+        return _explainers[model]
+    except (KeyError, TypeError):
+        pass
+    explainer = Explainer(model)
+    try:
+        _explainers[model] = explainer
+    except TypeError:
+        pass
+    return explainer
@@ -0,0 +1,272 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+from src.utils.preprocessing import ENGINEERED_COLUMNS, NUMERIC_COLUMNS, build_features, restore_features
+from src.utils.schema import REQUIRED_COLUMNS, schema_validator
+
+# Raw + engineered columns kept per customer
+FEATURE_COLUMNS = REQUIRED_COLUMNS + ENGINEERED_COLUMNS
+
+_COLUMN_TYPES = {
+    **{col: "REAL" for col in NUMERIC_COLUMNS + ["charge_per_tenure"]},
+    "SeniorCitizen": "INTEGER",
+    "num_services": "INTEGER",
+}
+
+# Rows scored per model call when many stored customers are stale
+SCORE_CHUNK_ROWS = 50_000
+
+# Invalid rows listed (with reasons) in an upsert response; all are counted
+INVALID_SAMPLE_ROWS = 100
+
+
+def _records(df: pd.DataFrame) -> list:
+    # Plain Python values (None for missing) that sqlite3 can bind
+    values = df.astype(object)
+    return list(values.where(values.notna(), None).itertuples(index=False, name=None))
+
+
+def _same_values(new: pd.Series, old: pd.Series) -> np.ndarray:
+    # Element-wise equality where two missing values also count as equal
+    new, old = new.astype(object), old.astype(object)
+    return ((new == old) | (new.isna() & old.isna())).to_numpy(dtype=bool)
+
+
+class FeatureStore:
+    """
+    Latest raw and engineered features of every customer, keyed by
+    customerID, in one SQLite file.
+
+    Uploads are merged in: a customer's missing values keep their stored
+    value, so partial updates only need the changed columns. Each row
+    also carries its last churn probability and the fingerprint of the
+    model that produced it; a score is reused until the row's features
+    change or another model is served. Lookups of any number of IDs are
+    one indexed query (the IDs are passed as a JSON array).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._write_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+        self.lookups = 0
+        self.score_hits = 0
+        self.score_misses = 0
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.rejected = 0
+        self.invalid = 0
+
+        columns = ",\n".join(f'"{col}" {_COLUMN_TYPES.get(col, "TEXT")}' for col in FEATURE_COLUMNS)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS customers (
+                    customerID TEXT PRIMARY KEY,
+                    customerName TEXT,
+                    {columns},
+                    revision INTEGER NOT NULL DEFAULT 1,
+                    updated_at REAL,
+                    churn_probability REAL,
+                    score_fingerprint TEXT,
+                    scored_at REAL
+                ) WITHOUT ROWID
+            """)
+            conn.commit()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    # ------------------------
+    # Reading
+    # ------------------------
+    @staticmethod
+    def _fetch(conn, customer_ids: list, columns: list) -> pd.DataFrame:
+        select = ", ".join(f'c."{col}"' for col in ["customerID"] + columns)
+        # CROSS JOIN keeps json_each as the outer loop: one primary key
+        # probe per requested ID, in request order
+        return pd.read_sql_query(
+            f"SELECT {select} FROM json_each(?) AS ids "
+            "CROSS JOIN customers AS c ON c.customerID = ids.value ORDER BY ids.key",
+            conn,
+            params=[json.dumps(customer_ids)]
+        )
+
+    def lookup(self, customer_ids) -> pd.DataFrame:
+        """
+        Stored rows for the given IDs (unknown IDs are left out)
+        """
+        customer_ids = list(dict.fromkeys(str(cid) for cid in customer_ids))
+        with closing(self._connect()) as conn:
+            frame = self._fetch(conn, customer_ids, [
+                "customerName", *FEATURE_COLUMNS, "revision", "updated_at", "churn_probability", "score_fingerprint"
+            ])
+        with self._stats_lock:
+            self.lookups += len(customer_ids)
+        return frame
+
+    def count(self) -> int:
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM customers").fetchone()[0]
+
+    # ------------------------
+    # Writing
+    # ------------------------
+    def upsert(self, df: pd.DataFrame) -> dict:
+        """
+        Merge customer rows into the store. Values that are missing keep
+        their stored value; new customers need every REQUIRED_COLUMN.
+        Merged rows must pass schema.COLUMN_SPECS; the others are not
+        stored and are listed with their reasons. Rows whose features
+        change get new engineered features and lose their cached score.
+        """
+        df = df.copy(deep=False)
+        df.columns = df.columns.str.strip()
+        if "customerID" not in df.columns:
+            raise ValueError("customerID column is required")
+        df["customerID"] = df["customerID"].astype(str).str.strip()
+        incoming = df.drop_duplicates("customerID", keep="last").set_index("customerID")
+        incoming = incoming.reindex(columns=["customerName"] + REQUIRED_COLUMNS)
+
+        with self._write_lock, closing(self._connect()) as conn:
+            existing = self._fetch(conn, incoming.index.tolist(), ["customerName"] + REQUIRED_COLUMNS + ["revision"])
+            old = existing.set_index("customerID").reindex(incoming.index)
+            is_new = old["revision"].isna().to_numpy()
+
+            merged = incoming.combine_first(old)[incoming.columns]
+            incomplete = is_new & merged[REQUIRED_COLUMNS].isna().any(axis=1).to_numpy()
+            rejected = merged.index[incomplete].tolist()
+            merged, old, is_new = merged[~incomplete], old[~incomplete], is_new[~incomplete]
+
+            # Checked after the merge, so a partial update is judged together
+            # with the stored values it keeps
+            validation = schema_validator.validate(merged[REQUIRED_COLUMNS].reset_index())
+            invalid_rows = [
+                {"customerID": row["customerID"], "reasons": row["reasons"]}
+                for row in validation.rejected_rows(INVALID_SAMPLE_ROWS)
+            ]
+            valid = validation.valid
+            rejected += merged.index[~valid].tolist()
+            merged, old, is_new = merged[valid], old[valid], is_new[valid]
+
+            # Numbers as feature engineering reads them (blank TotalCharges as 0)
+            for col in NUMERIC_COLUMNS:
+                merged[col] = validation.columns[col].fillna(0.0).to_numpy()[valid]
+            merged["customerName"] = merged["customerName"].fillna("Unknown")
+
+            # Compare the merged feature values with what is stored
+            same_features = ~is_new
+            for col in REQUIRED_COLUMNS:
+                same_features &= _same_values(merged[col], old[col])
+            same_name = (merged["customerName"] == old["customerName"]).to_numpy(dtype=bool)
+
+            changed = merged[~same_features]
+            now = time.time()
+            if len(changed):
+                features = build_features(changed[REQUIRED_COLUMNS])
+                rows = pd.concat([changed[["customerName"]], features[FEATURE_COLUMNS]], axis=1)
+                rows["tenure_group"] = rows["tenure_group"].astype(object)
+                rows = rows.reset_index()
+
+                columns = ["customerID", "customerName"] + FEATURE_COLUMNS
+                quoted = ", ".join(f'"{col}"' for col in columns)
+                updates = ", ".join(f'"{col}" = excluded."{col}"' for col in columns[1:])
+                conn.executemany(
+                    f"INSERT INTO customers ({quoted}, updated_at) VALUES ({', '.join('?' * (len(columns) + 1))}) "
+                    f"ON CONFLICT(customerID) DO UPDATE SET {updates}, revision = revision + 1, "
+                    "updated_at = excluded.updated_at, churn_probability = NULL, "
+                    "score_fingerprint = NULL, scored_at = NULL",
+                    [record + (now,) for record in _records(rows[columns])]
+                )
+
+            renamed = merged[same_features & ~same_name]
+            if len(renamed):
+                conn.executemany(
+                    "UPDATE customers SET customerName = ? WHERE customerID = ?",
+                    list(zip(renamed["customerName"].astype(str), renamed.index))
+                )
+            conn.commit()
+
+        counts = {
+            "inserted": int(is_new.sum()),
+            "updated": int(len(changed) - is_new.sum()),
+            "unchanged": int(same_features.sum()),
+            "rejected": len(rejected),
+            "invalid": validation.rejected,
+        }
+        with self._stats_lock:
+            self.inserted += counts["inserted"]
+            self.updated += counts["updated"]
+            self.unchanged += counts["unchanged"]
+            self.rejected += counts["rejected"]
+            self.invalid += counts["invalid"]
+        counts["rejected_ids"] = rejected[:100]
+        counts["invalid_rows"] = invalid_rows
+        return counts
+
+    def _save_scores(self, frame: pd.DataFrame, fingerprint: str):
+        # A row changed since it was read keeps its (cleared) score
+        now = time.time()
+        with self._write_lock, closing(self._connect()) as conn:
+            conn.executemany(
+                "UPDATE customers SET churn_probability = ?, score_fingerprint = ?, scored_at = ? "
+                "WHERE customerID = ? AND revision = ?",
+                [
+                    (float(prob), fingerprint, now, cid, int(revision))
+                    for prob, cid, revision in zip(frame["churn_probability"], frame["customerID"], frame["revision"])
+                ]
+            )
+            conn.commit()
+
+    # ------------------------
+    # Scoring
+    # ------------------------
+    def score(self, customer_ids, predict_features, fingerprint: str) -> pd.DataFrame:
+        """
+        Stored rows for the given IDs with an up-to-date churn_probability.
+        Only rows without a score from this model (fingerprint) reach
+        predict_features, which maps engineered features to probabilities;
+        their stored engineered features are reused as they are.
+        """
+        frame = self.lookup(customer_ids)
+        stale = (frame["score_fingerprint"] != fingerprint) | frame["churn_probability"].isna()
+        stale_index = np.flatnonzero(stale.to_numpy())
+
+        if len(stale_index):
+            probs = np.array(frame["churn_probability"], dtype=float)
+            for start in range(0, len(stale_index), SCORE_CHUNK_ROWS):
+                rows = stale_index[start:start + SCORE_CHUNK_ROWS]
+                probs[rows] = predict_features(restore_features(frame[FEATURE_COLUMNS].iloc[rows]))
+            frame["churn_probability"] = probs
+            self._save_scores(frame.iloc[stale_index], fingerprint)
+
+        with self._stats_lock:
+            self.score_hits += len(frame) - len(stale_index)
+            self.score_misses += len(stale_index)
+        return frame.drop(columns=["score_fingerprint"])
+
+    def stats(self) -> dict:
+        scored = self.score_hits + self.score_misses
+        return {
+            "path": self.path,
+            "customers": self.count(),
+            "lookups": self.lookups,
+            "score_hits": self.score_hits,
+            "score_misses": self.score_misses,
+            "score_hit_rate": self.score_hits / scored if scored else 0.0,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "unchanged": self.unchanged,
+            "rejected": self.rejected,
+            "invalid": self.invalid,
+        }
@@ -0,0 +1,187 @@
+import io
+import json
+
+import pandas as pd
+
+# ------------------------
+# Format detection
+# ------------------------
+FORMAT_EXTENSIONS = {
+    ".csv": "csv",
+    ".xlsx": "excel",
+    ".xls": "excel",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".arrow": "arrow",
+    ".arrows": "arrow",
+    ".feather": "arrow",
+    ".ipc": "arrow",
+}
+
+FORMAT_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/vnd.ms-excel": "excel",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": "excel",
+    "application/vnd.apache.parquet": "parquet",
+    "application/x-parquet": "parquet",
+    "application/vnd.apache.arrow.file": "arrow",
+    "application/vnd.apache.arrow.stream": "arrow",
+}
+
+RESPONSE_MEDIA_TYPES = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Columns carried by the columnar (Arrow / Parquet) batch response
+COLUMNAR_COLUMNS = ["customerID", "churn_probability", "risk_segment", "revenue_at_risk", "strategy_code"]
+
+ARROW_FILE_MAGIC = b"ARROW1"
+
+
+def detect_format(filename: str, content_type: str = None) -> str:
+    """
+    Pick the upload format from the file extension, then the content type.
+    Anything unrecognised is treated as Excel, as before.
+    """
+    name = (filename or "").lower()
+    for ext, fmt in FORMAT_EXTENSIONS.items():
+        if name.endswith(ext):
+            return fmt
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    return FORMAT_CONTENT_TYPES.get(content_type, "excel")
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ValueError("Parquet / Arrow support requires the 'pyarrow' package") from e
+    return pyarrow
+
+
+def _open_arrow(pa, source):
+    """
+    Open an Arrow IPC file or stream reader, sniffing the file magic
+    """
+    if isinstance(source, str):
+        source = pa.memory_map(source, "r")
+    head = source.read(len(ARROW_FILE_MAGIC))
+    source.seek(0)
+    if head == ARROW_FILE_MAGIC:
+        return pa.ipc.open_file(source)
+    return pa.ipc.open_stream(source)
+
+
+# ------------------------
+# Readers
+# ------------------------
+def read_upload(source, fmt: str) -> pd.DataFrame:
+    """
+    Read a whole upload. source is a binary file object or a path;
+    file objects are read in place instead of being copied to memory first.
+    """
+    if fmt == "csv":
+        return pd.read_csv(source)
+    if fmt == "excel":
+        return pd.read_excel(source)
+
+    pa = _pyarrow()
+    if fmt == "parquet":
+        table = pa.parquet.read_table(source)
+    elif fmt == "arrow":
+        table = _open_arrow(pa, source).read_all()
+    else:
+        raise ValueError(f"Unsupported input format: {fmt}")
+    return table.to_pandas()
+
+
+def iter_upload_frames(path: str, fmt: str, chunk_size: int):
+    """
+    Yield an upload on disk as DataFrames of at most chunk_size rows
+    """
+    if fmt == "csv":
+        with pd.read_csv(path, chunksize=chunk_size) as reader:
+            yield from reader
+        return
+
+    if fmt == "excel":
+        # Workbooks cannot be parsed incrementally; slice the parsed sheet
+        df = pd.read_excel(path)
+        for start in range(0, len(df), chunk_size):
+            yield df.iloc[start:start + chunk_size].reset_index(drop=True)
+        return
+
+    if fmt not in ("parquet", "arrow"):
+        raise ValueError(f"Unsupported input format: {fmt}")
+
+    pa = _pyarrow()
+    if fmt == "parquet":
+        batches = pa.parquet.ParquetFile(path).iter_batches(batch_size=chunk_size)
+    else:
+        reader = _open_arrow(pa, path)
+        if isinstance(reader, pa.ipc.RecordBatchFileReader):
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        else:
+            batches = iter(reader)
+
+    for batch in batches:
+        # IPC record batches can be larger than chunk_size; re-slice them
+        for start in range(0, batch.num_rows, chunk_size):
+            yield batch.slice(start, chunk_size).to_pandas()
+
+
+def count_rows(path: str, fmt: str):
+    """
+    Cheap row count of an upload on disk, used for progress reporting.
+    CSV counts line breaks (quoted multi-line fields over-count);
+    returns None when the count is not known up front.
+    """
+    if fmt == "csv":
+        lines = 0
+        last = b"\n"
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                lines += block.count(b"\n")
+                last = block[-1:]
+        if last != b"\n":
+            lines += 1
+        return max(0, lines - 1)
+
+    if fmt in ("parquet", "arrow"):
+        pa = _pyarrow()
+        if fmt == "parquet":
+            return pa.parquet.ParquetFile(path).metadata.num_rows
+        reader = _open_arrow(pa, path)
+        if isinstance(reader, pa.ipc.RecordBatchFileReader):
+            return sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+    return None
+
+
+# ------------------------
+# Columnar responses
+# ------------------------
+def encode_predictions(df: pd.DataFrame, fmt: str, summary: list = None) -> bytes:
+    """
+    Serialise batch predictions as an Arrow IPC stream or a Parquet file.
+    Categorical columns are kept as dictionary-encoded columns and the
+    segment summary travels in the schema metadata.
+    """
+    pa = _pyarrow()
+    table = pa.Table.from_pandas(df[COLUMNAR_COLUMNS], preserve_index=False)
+    if summary is not None:
+        metadata = dict(table.schema.metadata or {})
+        metadata[b"summary"] = json.dumps(summary).encode()
+        table = table.replace_schema_metadata(metadata)
+
+    sink = io.BytesIO()
+    if fmt == "arrow":
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    elif fmt == "parquet":
+        pa.parquet.write_table(table, sink)
+    else:
+        raise ValueError(f"Unsupported response format: {fmt}")
+    return sink.getvalue()
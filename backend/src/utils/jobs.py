@@ -0,0 +1,435 @@
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+from src.utils.batch_scoring import PREDICTION_COLUMNS, RISK_LABELS, SegmentSummary
+from src.utils.file_io import count_rows, iter_upload_frames
+from src.utils.schema import REQUIRED_COLUMNS
+
+# Result columns that may be used to sort a job's results
+SORTABLE_COLUMNS = ["revenue_at_risk", "churn_probability", "row_id"]
+
+# Rows explained per pass when a page of a job's explanations is computed
+EXPLAIN_BATCH_ROWS = 20_000
+
+# Raw feature columns are stored next to the predictions so a job can be
+# re-read (or re-scored with changed inputs) without the original upload
+STORED_COLUMNS = ["row_id"] + PREDICTION_COLUMNS + [c for c in REQUIRED_COLUMNS if c not in PREDICTION_COLUMNS]
+
+
+class JobNotFound(KeyError):
+    pass
+
+
+def iter_segment_rows(results_path: str, risk_segment: str, columns: list, chunk_rows: int = 5_000):
+    """
+    Stored rows of one risk segment, highest revenue at risk first, as
+    lists of at most chunk_rows tuples read lazily from a single cursor
+    """
+    select = ", ".join(f'"{c}"' for c in columns)
+    with closing(sqlite3.connect(f"file:{results_path}?mode=ro", uri=True)) as conn:
+        cursor = conn.execute(
+            f"SELECT {select} FROM predictions WHERE risk_segment = ? ORDER BY revenue_at_risk DESC, row_id",
+            (risk_segment,)
+        )
+        while True:
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows:
+                return
+            yield rows
+
+
+class JobManager:
+    """
+    Runs batch scoring jobs in the background and persists their results.
+
+    Each job lives in its own directory holding job.json (status, progress,
+    summary) and results.sqlite (one row per customer, indexed by segment
+    and revenue at risk). A fixed-size thread pool bounds how many jobs
+    score at the same time; extra submissions wait in the queue.
+
+    process_chunk(chunk, offset) returns the scored rows and the
+    ValidationResult of the chunk; rejected rows are stored with their
+    reasons instead of failing the job.
+    """
+
+    def __init__(self, root_dir: str, process_chunk, max_workers: int = 2, chunk_size: int = 50_000):
+        self.root_dir = root_dir
+        self.process_chunk = process_chunk
+        self.chunk_size = max(1, int(chunk_size))
+
+        os.makedirs(root_dir, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, int(max_workers)), thread_name_prefix="batch-job")
+        self._lock = threading.Lock()
+        self._explain_locks = {}
+        self._jobs = {}
+        self._recover()
+
+    # ------------------------
+    # Paths & state
+    # ------------------------
+    def _job_dir(self, job_id: str) -> str:
+        if not job_id or not all(c in "0123456789abcdef" for c in job_id):
+            raise JobNotFound(job_id)
+        return os.path.join(self.root_dir, job_id)
+
+    def results_path(self, job_id: str) -> str:
+        return os.path.join(self._job_dir(job_id), "results.sqlite")
+
+    def _save(self, state: dict):
+        path = os.path.join(self._job_dir(state["job_id"]), "job.json")
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, path)
+
+    def _update(self, job_id: str, **changes) -> dict:
+        with self._lock:
+            state = self._jobs[job_id]
+            state.update(changes)
+            snapshot = dict(state)
+        self._save(snapshot)
+        return snapshot
+
+    def _recover(self):
+        """
+        Load jobs from disk; jobs cut off by a restart are marked failed
+        """
+        for job_id in os.listdir(self.root_dir):
+            path = os.path.join(self.root_dir, job_id, "job.json")
+            if not os.path.exists(path):
+                continue
+            with open(path) as f:
+                state = json.load(f)
+            self._jobs[job_id] = state
+            if state["status"] in ("queued", "running"):
+                self._update(job_id, status="failed", error="Interrupted by a server restart", finished_at=time.time())
+
+    def status(self, job_id: str) -> dict:
+        with self._lock:
+            state = self._jobs.get(job_id)
+            if state is None:
+                raise JobNotFound(job_id)
+            return dict(state)
+
+    # ------------------------
+    # Submission & execution
+    # ------------------------
+    def submit(self, fileobj, input_format: str, filename: str = "") -> dict:
+        job_id = uuid.uuid4().hex
+        job_dir = self._job_dir(job_id)
+        os.makedirs(job_dir)
+
+        input_path = os.path.join(job_dir, "input." + input_format)
+        with open(input_path, "wb") as out:
+            shutil.copyfileobj(fileobj, out)
+
+        state = {
+            "job_id": job_id,
+            "status": "queued",
+            "filename": filename,
+            "input_format": input_format,
+            "rows_processed": 0,
+            "total_rows": None,
+            "progress": 0.0,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "error": None,
+            "summary": None,
+            "rejected_rows": 0,
+            "rejections_by_column": {},
+        }
+        with self._lock:
+            self._jobs[job_id] = state
+            # The worker updates state as soon as it starts
+            submitted = dict(state)
+        self._save(submitted)
+        self._executor.submit(self._run, job_id, input_path)
+        return submitted
+
+    def _run(self, job_id: str, input_path: str):
+        state = self._update(job_id, status="running", started_at=time.time())
+        fmt = state["input_format"]
+        db_path = self.results_path(job_id)
+        try:
+            total = count_rows(input_path, fmt)
+            self._update(job_id, total_rows=total)
+
+            summary = SegmentSummary()
+            offset = 0
+            rejected, by_column = 0, {}
+            with closing(sqlite3.connect(db_path)) as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("CREATE TABLE IF NOT EXISTS rejections (row_id INTEGER PRIMARY KEY, customerID TEXT, reasons TEXT)")
+                for chunk in iter_upload_frames(input_path, fmt, self.chunk_size):
+                    rows = len(chunk)
+                    # row_id is the position in the upload, kept by the rows that pass validation
+                    chunk["row_id"] = np.arange(offset, offset + rows)
+                    chunk, validation = self.process_chunk(chunk, offset)
+                    summary.add(chunk)
+
+                    if len(chunk):
+                        stored = chunk[STORED_COLUMNS].copy()
+                        for col in ("risk_segment", "strategy_code"):
+                            stored[col] = stored[col].astype(str)
+                        stored.to_sql("predictions", conn, if_exists="append", index=False)
+                    if validation.rejected:
+                        conn.executemany(
+                            "INSERT INTO rejections (row_id, customerID, reasons) VALUES (?, ?, ?)",
+                            [
+                                (item["row"], None if item["customerID"] is None else str(item["customerID"]),
+                                 json.dumps(item["reasons"]))
+                                for item in validation.rejected_rows(row_offset=offset)
+                            ]
+                        )
+                        rejected += validation.rejected
+                        for col, count in validation.by_column().items():
+                            by_column[col] = by_column.get(col, 0) + count
+                    conn.commit()
+
+                    offset += rows
+                    progress = min(1.0, offset / total) if total else None
+                    self._update(
+                        job_id, rows_processed=offset, progress=progress,
+                        rejected_rows=rejected, rejections_by_column=by_column
+                    )
+
+                # Indexes are built once after the bulk load
+                if offset:
+                    conn.execute("CREATE INDEX IF NOT EXISTS idx_segment_revenue ON predictions (risk_segment, revenue_at_risk DESC)")
+                    conn.execute("CREATE INDEX IF NOT EXISTS idx_revenue ON predictions (revenue_at_risk DESC)")
+                    conn.execute("CREATE INDEX IF NOT EXISTS idx_customer ON predictions (customerID)")
+                    conn.commit()
+
+            self._update(
+                job_id,
+                status="completed",
+                total_rows=offset,
+                scored_rows=offset - rejected,
+                progress=1.0,
+                summary=summary.records(),
+                finished_at=time.time()
+            )
+        except Exception as e:
+            self._update(job_id, status="failed", error=str(e), finished_at=time.time())
+        finally:
+            try:
+                os.unlink(input_path)
+            except OSError:
+                pass
+
+    # ------------------------
+    # Reading results
+    # ------------------------
+    def results(self, job_id: str, risk_segment: str = None, sort_by: str = "revenue_at_risk",
+                order: str = "desc", limit: int = 100, offset: int = 0, include_features: bool = False) -> dict:
+        state = self.status(job_id)
+        if sort_by not in SORTABLE_COLUMNS:
+            raise ValueError(f"sort_by must be one of: {', '.join(SORTABLE_COLUMNS)}")
+        if order not in ("asc", "desc"):
+            raise ValueError("order must be 'asc' or 'desc'")
+        if state["status"] not in ("running", "completed") or not os.path.exists(self.results_path(job_id)):
+            return {"job_id": job_id, "status": state["status"], "total": 0, "items": []}
+
+        columns = STORED_COLUMNS if include_features else ["row_id"] + PREDICTION_COLUMNS
+        where, params = "", []
+        if risk_segment:
+            where = "WHERE risk_segment = ?"
+            params.append(risk_segment)
+
+        select = ", ".join(f'"{c}"' for c in columns)
+        try:
+            with closing(sqlite3.connect(f"file:{self.results_path(job_id)}?mode=ro", uri=True)) as conn:
+                conn.row_factory = sqlite3.Row
+                total = conn.execute(f"SELECT COUNT(*) FROM predictions {where}", params).fetchone()[0]
+                rows = conn.execute(
+                    f"SELECT {select} FROM predictions {where} "
+                    f"ORDER BY {sort_by} {order.upper()}, row_id LIMIT ? OFFSET ?",
+                    params + [max(0, int(limit)), max(0, int(offset))]
+                ).fetchall()
+        except sqlite3.OperationalError:
+            # No chunk has been written yet
+            total, rows = 0, []
+
+        return {
+            "job_id": job_id,
+            "status": state["status"],
+            "total": total,
+            "limit": limit,
+            "offset": offset,
+            "items": [dict(row) for row in rows],
+        }
+
+    def top_customers(self, job_id: str, k: int = 100, per_segment: bool = False) -> dict:
+        """
+        The k stored customers with the highest revenue at risk (per risk
+        segment with per_segment), read through the revenue indexes
+        """
+        state = self.status(job_id)
+        if state["status"] != "completed":
+            return {"job_id": job_id, "status": state["status"], "error": state["error"]}
+
+        k = max(1, int(k))
+        select = ", ".join(f'"{c}"' for c in ["row_id"] + PREDICTION_COLUMNS)
+        with closing(sqlite3.connect(f"file:{self.results_path(job_id)}?mode=ro", uri=True)) as conn:
+            conn.row_factory = sqlite3.Row
+
+            def top(where: str = "", params: tuple = ()):
+                try:
+                    rows = conn.execute(
+                        f"SELECT {select} FROM predictions {where} ORDER BY revenue_at_risk DESC, row_id LIMIT ?",
+                        params + (k,)
+                    ).fetchall()
+                except sqlite3.OperationalError:
+                    # Every row of the job was rejected
+                    return []
+                return [dict(row) for row in rows]
+
+            if per_segment:
+                customers = {label: top("WHERE risk_segment = ?", (label,)) for label in RISK_LABELS[::-1]}
+            else:
+                customers = top()
+
+        return {
+            "job_id": job_id,
+            "status": state["status"],
+            "k": k,
+            "summary": state["summary"],
+            "top_customers": customers,
+        }
+
+    def rejections(self, job_id: str, limit: int = 100, offset: int = 0) -> dict:
+        """
+        Rows of a job rejected by validation, with their reasons, in upload order
+        """
+        state = self.status(job_id)
+        items = []
+        if os.path.exists(self.results_path(job_id)):
+            try:
+                with closing(sqlite3.connect(f"file:{self.results_path(job_id)}?mode=ro", uri=True)) as conn:
+                    rows = conn.execute(
+                        "SELECT row_id, customerID, reasons FROM rejections ORDER BY row_id LIMIT ? OFFSET ?",
+                        (max(0, int(limit)), max(0, int(offset)))
+                    ).fetchall()
+                items = [
+                    {"row_id": row_id, "customerID": customer_id, "reasons": json.loads(reasons)}
+                    for row_id, customer_id, reasons in rows
+                ]
+            except sqlite3.OperationalError:
+                # Jobs stored before validation have no rejections table
+                pass
+        return {
+            "job_id": job_id,
+            "status": state["status"],
+            "total": state.get("rejected_rows", 0),
+            "by_column": state.get("rejections_by_column", {}),
+            "limit": limit,
+            "offset": offset,
+            "items": items,
+        }
+
+    def results_frame(self, job_id: str, columns: list = None) -> pd.DataFrame:
+        """
+        All stored rows of a completed job, in upload order
+        """
+        path = self.completed_results_path(job_id)
+        select = ", ".join(f'"{c}"' for c in (columns or STORED_COLUMNS))
+        with closing(sqlite3.connect(f"file:{path}?mode=ro", uri=True)) as conn:
+            return pd.read_sql_query(f"SELECT {select} FROM predictions ORDER BY row_id", conn)
+
+    def completed_results_path(self, job_id: str) -> str:
+        """
+        results.sqlite of a job, once the job has completed
+        """
+        state = self.status(job_id)
+        if state["status"] != "completed":
+            raise ValueError(f"Job {job_id} is {state['status']}, not completed")
+        return self.results_path(job_id)
+
+    def _explain_lock(self, job_id: str) -> threading.Lock:
+        with self._lock:
+            return self._explain_locks.setdefault(job_id, threading.Lock())
+
+    def explanations(self, job_id: str, explain, fingerprint: str, risk_segment: str = "High Risk",
+                     top_k: int = 5, limit: int = 100, offset: int = 0) -> dict:
+        """
+        Top top_k drivers per customer of a completed job (one segment, or
+        all), one page at a time. explain maps a frame of stored rows to
+        the full driver list of each row, largest contribution first.
+        Only the rows of the requested page that have not been explained
+        by this model (fingerprint) yet are explained; the full lists are
+        stored next to the predictions, so each row is explained once per
+        model whatever top_k callers ask for. Pages of one job are
+        computed one at a time; other jobs are not blocked.
+        """
+        state = self.status(job_id)
+        if state["status"] != "completed":
+            raise ValueError(f"Job {job_id} is {state['status']}, not completed")
+
+        where, params = "", []
+        if risk_segment:
+            where = "AND p.risk_segment = ?"
+            params.append(risk_segment)
+        select = ", ".join(f'p."{c}"' for c in STORED_COLUMNS)
+        limit, offset = max(0, int(limit)), max(0, int(offset))
+
+        with self._explain_lock(job_id), closing(sqlite3.connect(self.results_path(job_id))) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS explanations (row_id INTEGER PRIMARY KEY, fingerprint TEXT, drivers TEXT)"
+            )
+            page = pd.read_sql_query(
+                f"SELECT {select}, e.drivers FROM predictions p LEFT JOIN explanations e "
+                f"ON e.row_id = p.row_id AND e.fingerprint = ? WHERE 1 = 1 {where} "
+                "ORDER BY p.revenue_at_risk DESC, p.row_id LIMIT ? OFFSET ?",
+                conn,
+                params=[fingerprint] + params + [limit, offset]
+            )
+            missing = np.flatnonzero(page["drivers"].isna().to_numpy())
+            page["drivers"] = page["drivers"].astype(object)
+            for start in range(0, len(missing), EXPLAIN_BATCH_ROWS):
+                rows = missing[start:start + EXPLAIN_BATCH_ROWS]
+                drivers = [json.dumps(items) for items in explain(page[STORED_COLUMNS].iloc[rows])]
+                conn.executemany(
+                    "INSERT OR REPLACE INTO explanations VALUES (?, ?, ?)",
+                    [(int(row_id), fingerprint, items) for row_id, items in zip(page["row_id"].iloc[rows], drivers)]
+                )
+                conn.commit()
+                page.iloc[rows, page.columns.get_loc("drivers")] = drivers
+
+            total = conn.execute(
+                f"SELECT COUNT(*) FROM predictions p WHERE 1 = 1 {where}", params
+            ).fetchone()[0]
+
+        rows = page[["row_id", "customerID", "customerName", "risk_segment", "churn_probability",
+                     "revenue_at_risk", "drivers"]].to_dict(orient="records")
+        computed = len(missing)
+
+        top_k = max(1, int(top_k))
+        items = []
+        for row in rows:
+            item = dict(row)
+            item["drivers"] = json.loads(item["drivers"])[:top_k]
+            items.append(item)
+        return {
+            "job_id": job_id,
+            "risk_segment": risk_segment,
+            "top_k": top_k,
+            "total": total,
+            "computed": computed,
+            "limit": limit,
+            "offset": offset,
+            "items": items,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,277 @@
+import bisect
+import contextvars
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets (seconds) shared by every histogram
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Endpoint of the request being handled; stages recorded deeper in the
+# call stack (feature engineering, predict_proba) are attributed to it
+_current_endpoint = contextvars.ContextVar("churn_endpoint", default=None)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram (Prometheus cumulative layout on export)
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """
+    In-process counters and latency histograms, rendered in the Prometheus
+    text format. Recording is a dict lookup and a few additions under one
+    lock, cheap enough for every request and stage.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._help = {}
+        self._collectors = []
+        self.profiler = None
+
+    # ------------------------
+    # Recording
+    # ------------------------
+    def observe(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def describe(self, name: str, help_text: str):
+        self._help[name] = help_text
+
+    def register_collector(self, collect):
+        """
+        collect() returns (name, type, value, labels dict) tuples read at
+        scrape time, e.g. cache sizes owned by other components
+        """
+        self._collectors.append(collect)
+
+    @contextmanager
+    def span(self, stage: str, rows: int = None):
+        """
+        Time one stage of the current request (endpoint="none" outside one)
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(stage, time.perf_counter() - started, rows=rows)
+
+    def current_endpoint(self) -> str:
+        return _current_endpoint.get() or "none"
+
+    def observe_stage(self, stage: str, seconds: float, endpoint: str = None, rows: int = None):
+        """
+        Record a stage timed elsewhere, e.g. in a worker process; endpoint
+        defaults to the current request's
+        """
+        endpoint = endpoint or self.current_endpoint()
+        self.observe("churn_stage_seconds", seconds, endpoint=endpoint, stage=stage)
+        if rows is not None:
+            self.inc("churn_stage_rows_total", rows, endpoint=endpoint, stage=stage)
+
+    @contextmanager
+    def request(self, endpoint: str):
+        """
+        Time a whole request; stages inside it are labelled with endpoint
+        """
+        tracker = RequestTracker(self, endpoint)
+        token = _current_endpoint.set(endpoint)
+        sampler = self.profiler.start() if self.profiler is not None else None
+        try:
+            yield tracker
+        except Exception as e:
+            tracker.error(e)
+            raise
+        finally:
+            elapsed = time.perf_counter() - tracker.started
+            _current_endpoint.reset(token)
+            self.observe("churn_request_seconds", elapsed, endpoint=endpoint, outcome=tracker.outcome)
+            self.inc("churn_requests_total", endpoint=endpoint, outcome=tracker.outcome)
+            if tracker.rows:
+                self.inc("churn_rows_total", tracker.rows, endpoint=endpoint)
+            if sampler is not None:
+                self.profiler.finish(sampler, endpoint, elapsed)
+
+    # ------------------------
+    # Export
+    # ------------------------
+    def render(self) -> str:
+        with self._lock:
+            histograms = {key: (list(h.counts), h.sum, h.count, h.buckets) for key, h in self._histograms.items()}
+            counters = dict(self._counters)
+
+        lines = []
+        described = set()
+
+        def header(name, kind):
+            if name not in described:
+                described.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in sorted(counters.items()):
+            header(name, "counter")
+            lines.append(f"{name}{_labels(labels)} {value:g}")
+
+        for (name, labels), (counts, total, count, buckets) in sorted(histograms.items()):
+            header(name, "histogram")
+            cumulative = 0
+            for bound, n in zip(buckets, counts):
+                cumulative += n
+                lines.append(f"{name}_bucket{_labels(labels + (('le', f'{bound:g}'),))} {cumulative}")
+            lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{_labels(labels)} {total:.9g}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+
+        for collect in self._collectors:
+            try:
+                samples = list(collect())
+            except Exception as e:
+                logger.warning("Metrics collector failed: %s", e)
+                continue
+            for name, kind, value, labels in samples:
+                header(name, kind)
+                lines.append(f"{name}{_labels(tuple(sorted(labels.items())))} {float(value):g}")
+
+        return "\n".join(lines) + "\n"
+
+
+class RequestTracker:
+    """
+    Handle for the request being timed: stages, row count and outcome
+    """
+
+    def __init__(self, metrics: Metrics, endpoint: str):
+        self.metrics = metrics
+        self.endpoint = endpoint
+        self.started = time.perf_counter()
+        self.outcome = "ok"
+        self.rows = 0
+
+    def span(self, stage: str, rows: int = None):
+        return self.metrics.span(stage, rows)
+
+    def error(self, exc: Exception):
+        """
+        Record an error the endpoint turns into an {"error": ...} body
+        """
+        self.outcome = "error"
+        self.metrics.inc("churn_errors_total", endpoint=self.endpoint, type=type(exc).__name__)
+        logger.warning("%s failed after %.3fs: %s", self.endpoint, time.perf_counter() - self.started, exc)
+
+
+# ==================================================
+# SAMPLING PROFILER (OPT-IN)
+# ==================================================
+class SlowRequestProfiler:
+    """
+    Samples the handling thread's stack every interval seconds while a
+    request runs; requests slower than threshold_seconds dump the sampled
+    stacks in collapsed (flamegraph.pl / speedscope) format to out_dir.
+    """
+
+    def __init__(self, metrics: Metrics, threshold_seconds: float, out_dir: str, interval: float = 0.005):
+        self.metrics = metrics
+        self.threshold = float(threshold_seconds)
+        self.out_dir = out_dir
+        self.interval = float(interval)
+        os.makedirs(out_dir, exist_ok=True)
+
+    def start(self) -> "_Sampler":
+        sampler = _Sampler(threading.get_ident(), self.interval)
+        sampler.start()
+        return sampler
+
+    def finish(self, sampler: "_Sampler", endpoint: str, elapsed: float):
+        stacks = sampler.stop()
+        if elapsed < self.threshold or not stacks:
+            return
+        path = os.path.join(self.out_dir, f"{endpoint}-{time.strftime('%Y%m%d-%H%M%S')}-{int(elapsed * 1e3)}ms.collapsed")
+        try:
+            with open(path, "w") as f:
+                for stack, count in stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+        except OSError as e:
+            logger.warning("Could not write profile %s: %s", path, e)
+            return
+        self.metrics.inc("churn_profiles_written_total", endpoint=endpoint)
+        logger.info("Slow %s request (%.3fs), profile written to %s", endpoint, elapsed, path)
+
+
+class _Sampler(threading.Thread):
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(name="request-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(names))] += 1
+
+    def stop(self) -> Counter:
+        self._done.set()
+        self.join()
+        return self.stacks
+
+
+# Process-wide registry used by the API and the scoring helpers
+metrics = Metrics()
+metrics.describe("churn_request_seconds", "End-to-end handler latency by endpoint and outcome")
+metrics.describe("churn_stage_seconds", "Latency of one processing stage within a request")
+metrics.describe("churn_rows_total", "Customer rows handled by endpoint")
+metrics.describe("churn_stage_rows_total", "Customer rows processed by a stage")
+metrics.describe("churn_requests_total", "Requests by endpoint and outcome")
+metrics.describe("churn_errors_total", "Errors returned as {\"error\": ...} bodies, by exception type")
+metrics.describe("churn_profiles_written_total", "Sampled stack profiles written for slow requests")
@@ -0,0 +1,129 @@
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+
+# Files inside one version directory
+MODEL_FILE = "churn_model.pkl"
+ENGINE_FILE = "churn_model.trees.npz"
+METADATA_FILE = "metadata.json"
+
+# Pointer to the version the API should serve
+CURRENT_FILE = "CURRENT"
+
+_VERSION_PATTERN = re.compile(r"^v\d{4,}$")
+
+
+class VersionNotFound(KeyError):
+    pass
+
+
+class ModelRegistry:
+    """
+    Local, versioned model store.
+
+        registry/
+            CURRENT              -> "v0003"
+            v0001/ churn_model.pkl, churn_model.trees.npz, metadata.json
+            v0002/ ...
+
+    A version is written to a private staging directory and renamed into
+    place in one step, and CURRENT is replaced atomically, so readers never
+    see a half-written version. Versions are never modified after commit.
+    """
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+
+    # ------------------------
+    # Reading
+    # ------------------------
+    def versions(self) -> list:
+        if not os.path.isdir(self.root_dir):
+            return []
+        return sorted(
+            (name for name in os.listdir(self.root_dir)
+             if _VERSION_PATTERN.match(name) and os.path.exists(os.path.join(self.root_dir, name, METADATA_FILE))),
+            key=lambda name: int(name[1:])
+        )
+
+    def version_dir(self, version: str) -> str:
+        if not version or not _VERSION_PATTERN.match(version):
+            raise VersionNotFound(version)
+        path = os.path.join(self.root_dir, version)
+        if not os.path.exists(os.path.join(path, METADATA_FILE)):
+            raise VersionNotFound(version)
+        return path
+
+    def model_path(self, version: str) -> str:
+        return os.path.join(self.version_dir(version), MODEL_FILE)
+
+    def engine_path(self, version: str) -> str:
+        return os.path.join(self.version_dir(version), ENGINE_FILE)
+
+    def metadata(self, version: str) -> dict:
+        with open(os.path.join(self.version_dir(version), METADATA_FILE)) as f:
+            return json.load(f)
+
+    def current_version(self):
+        """
+        Version named by CURRENT, or None for an empty registry
+        """
+        try:
+            with open(os.path.join(self.root_dir, CURRENT_FILE)) as f:
+                version = f.read().strip()
+        except OSError:
+            return None
+        return version or None
+
+    # ------------------------
+    # Writing
+    # ------------------------
+    def stage(self) -> str:
+        """
+        Fresh staging directory to write a new version's artifacts into
+        """
+        os.makedirs(self.root_dir, exist_ok=True)
+        path = os.path.join(self.root_dir, f".staging-{uuid.uuid4().hex}")
+        os.makedirs(path)
+        return path
+
+    def commit(self, staging_dir: str, metadata: dict, promote: bool = True) -> str:
+        """
+        Turn a staging directory into the next version; optionally make it
+        the served version
+        """
+        if not os.path.exists(os.path.join(staging_dir, MODEL_FILE)):
+            raise ValueError(f"Staging directory has no {MODEL_FILE}")
+
+        while True:
+            existing = self.versions()
+            number = int(existing[-1][1:]) + 1 if existing else 1
+            version = f"v{number:04d}"
+            metadata = dict(metadata, version=version, created_at=metadata.get("created_at", time.time()))
+            with open(os.path.join(staging_dir, METADATA_FILE), "w") as f:
+                json.dump(metadata, f, indent=2, default=str)
+            try:
+                os.rename(staging_dir, os.path.join(self.root_dir, version))
+                break
+            except OSError:
+                # Another trainer committed the same number first
+                if not os.path.exists(os.path.join(self.root_dir, version)):
+                    raise
+
+        if promote:
+            self.promote(version)
+        return version
+
+    def discard(self, staging_dir: str):
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+    def promote(self, version: str):
+        self.version_dir(version)
+        path = os.path.join(self.root_dir, CURRENT_FILE)
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "w") as f:
+            f.write(version + "\n")
+        os.replace(tmp, path)
@@ -0,0 +1,270 @@
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import joblib
+import pandas as pd
+
+from src.utils.batch_scoring import predict_probabilities
+from src.utils.model_registry import ModelRegistry
+from src.utils.prediction_cache import file_fingerprint
+from src.utils.scorer import build_scorer
+from src.utils.tree_engine import TreeEnsemble
+
+logger = logging.getLogger(__name__)
+
+# Version name used when the registry is empty and the fixed model path is served
+LEGACY_VERSION = "legacy"
+
+
+class LoadedModel:
+    """
+    Everything needed to serve one model version. Never mutated after
+    load, so a request that grabbed it keeps a consistent view.
+    """
+
+    def __init__(self, version: str, model_path: str, model, scorer, metadata: dict):
+        self.version = version
+        self.model_path = model_path
+        self.model = model
+        self.scorer = scorer
+        self.metadata = metadata
+        self.fingerprint = file_fingerprint(model_path)
+        self.loaded_at = time.time()
+
+    def info(self) -> dict:
+        return {
+            "version": self.version,
+            "model_path": self.model_path,
+            "scorer": self.scorer.name,
+            "fingerprint": self.fingerprint,
+            "loaded_at": self.loaded_at,
+            "metadata": self.metadata,
+        }
+
+
+class ModelServer:
+    """
+    Holds the served model and swaps in new registry versions without
+    downtime: a candidate is loaded and warmed on the caller's thread while
+    requests keep using the current one, then a single reference
+    assignment publishes it. on_swap callbacks (cache rebinding, pool reset)
+    run right after the swap.
+    """
+
+    def __init__(self, registry: ModelRegistry, legacy_model_path: str, warmup_payload: dict,
+                 compiled: bool = True, engine_max_rows: int = 64, legacy_engine_path: str = None):
+        self.registry = registry
+        self.legacy_model_path = legacy_model_path
+        self.legacy_engine_path = legacy_engine_path
+        self.warmup_payload = warmup_payload
+        self.compiled = compiled
+        self.engine_max_rows = engine_max_rows
+
+        self.current = None
+        self.swaps = 0
+        self.last_error = None
+        self._on_swap = []
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+        self._stop = threading.Event()
+
+        self.shadow = None
+        self.shadow_rate = 0.0
+        self._shadow_executor = None
+        self._shadow_lock = threading.Lock()
+        self._shadow_max_pending = 0
+        self._shadow_stats = {}
+
+    # ------------------------
+    # Loading
+    # ------------------------
+    def resolve(self, version: str = None):
+        """
+        (version, model path, engine path, metadata) for a registry version;
+        CURRENT by default, the fixed legacy path for an empty registry
+        """
+        version = version or self.registry.current_version()
+        if version is None:
+            return LEGACY_VERSION, self.legacy_model_path, self.legacy_engine_path, {}
+        return (version, self.registry.model_path(version), self.registry.engine_path(version),
+                self.registry.metadata(version))
+
+    def warm(self, loaded: LoadedModel):
+        """
+        One dummy prediction through the single and batch paths
+        """
+        loaded.scorer.predict_one(self.warmup_payload)
+        predict_probabilities(pd.DataFrame([self.warmup_payload]), loaded.model)
+
+    def load(self, version: str = None, warm: bool = True) -> LoadedModel:
+        version, model_path, engine_path, metadata = self.resolve(version)
+        model = joblib.load(model_path, mmap_mode="r")
+
+        tree_engine = None
+        if self.engine_max_rows > 0 and engine_path and os.path.exists(engine_path):
+            tree_engine = TreeEnsemble.load(engine_path)
+        scorer = build_scorer(model, compiled=self.compiled, tree_engine=tree_engine,
+                              engine_max_rows=self.engine_max_rows)
+
+        loaded = LoadedModel(version, model_path, model, scorer, metadata)
+        if warm:
+            # Warm both paths before the version takes traffic
+            self.warm(loaded)
+        return loaded
+
+    def on_swap(self, callback):
+        self._on_swap.append(callback)
+
+    def reload(self, version: str = None, force: bool = False, warm: bool = True, promote: bool = False) -> dict:
+        """
+        Load, warm and swap in a version (CURRENT by default). With promote
+        the version becomes the registry's CURRENT, only once it loaded.
+        """
+        with self._reload_lock:
+            previous = self.current
+            target = version or self.registry.current_version() or LEGACY_VERSION
+            if previous is not None and previous.version == target and not force:
+                if promote and version:
+                    # Already serving it, so it is known to load
+                    self.registry.promote(version)
+                return {"swapped": False, "version": target}
+
+            try:
+                loaded = self.load(version, warm=warm)
+            except Exception as e:
+                self.last_error = f"{target}: {e}"
+                raise
+
+            if promote and version:
+                self.registry.promote(version)
+            self.current = loaded
+            self.swaps += 1
+            self.last_error = None
+            for callback in self._on_swap:
+                try:
+                    callback(loaded)
+                except Exception:
+                    logger.exception("Model swap callback failed")
+
+            logger.info("Serving model %s", loaded.version)
+            return {
+                "swapped": True,
+                "previous": previous.version if previous else None,
+                "version": loaded.version
+            }
+
+    # ------------------------
+    # Registry watcher
+    # ------------------------
+    def start_watcher(self, interval: float):
+        """
+        Poll the registry's CURRENT pointer and reload when it moves
+        """
+        if interval <= 0 or self._watcher is not None:
+            return
+
+        def watch():
+            while not self._stop.wait(interval):
+                try:
+                    target = self.registry.current_version()
+                    if target and self.current is not None and target != self.current.version:
+                        self.reload(target)
+                except Exception as e:
+                    logger.warning("Model reload failed, keeping %s: %s",
+                                   self.current.version if self.current else None, e)
+
+        self._watcher = threading.Thread(target=watch, name="model-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop(self):
+        self._stop.set()
+        self.clear_shadow()
+
+    # ------------------------
+    # Shadow scoring
+    # ------------------------
+    def set_shadow(self, version: str, sample_rate: float = 0.1, max_pending: int = 1000) -> dict:
+        """
+        Score a sample of /predict traffic with a candidate version in the
+        background and compare it with the served answers
+        """
+        candidate = self.load(version)
+        with self._shadow_lock:
+            if self._shadow_executor is None:
+                self._shadow_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+            self.shadow = candidate
+            self.shadow_rate = min(1.0, max(0.0, float(sample_rate)))
+            self._shadow_max_pending = int(max_pending)
+            # A fresh counter set per candidate; late results of an earlier
+            # candidate only touch their own set
+            self._shadow_stats = {
+                "sampled": 0, "dropped": 0, "errors": 0, "pending": 0, "scored": 0,
+                "abs_diff_sum": 0.0, "max_abs_diff": 0.0, "label_flips": 0, "latency_s_sum": 0.0,
+            }
+        return self.shadow_stats()
+
+    def clear_shadow(self):
+        with self._shadow_lock:
+            self.shadow = None
+            executor, self._shadow_executor = self._shadow_executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def shadow_score(self, payload: dict, served_probability: float):
+        """
+        Queue a shadow prediction; never blocks the caller
+        """
+        if self.shadow is None or random.random() >= self.shadow_rate:
+            return
+        with self._shadow_lock:
+            shadow, executor, stats = self.shadow, self._shadow_executor, self._shadow_stats
+            if shadow is None or executor is None:
+                return
+            stats["sampled"] += 1
+            if stats["pending"] >= self._shadow_max_pending:
+                stats["dropped"] += 1
+                return
+            stats["pending"] += 1
+        executor.submit(self._run_shadow, shadow, stats, payload, served_probability)
+
+    def _run_shadow(self, shadow: LoadedModel, stats: dict, payload: dict, served_probability: float):
+        started = time.perf_counter()
+        try:
+            probability = shadow.scorer.predict_one(payload)
+        except Exception:
+            with self._shadow_lock:
+                stats["pending"] -= 1
+                stats["errors"] += 1
+            return
+        elapsed = time.perf_counter() - started
+
+        diff = abs(probability - served_probability)
+        with self._shadow_lock:
+            stats["pending"] -= 1
+            stats["scored"] += 1
+            stats["abs_diff_sum"] += diff
+            stats["max_abs_diff"] = max(stats["max_abs_diff"], diff)
+            stats["label_flips"] += (probability >= 0.5) != (served_probability >= 0.5)
+            stats["latency_s_sum"] += elapsed
+
+    def shadow_stats(self) -> dict:
+        with self._shadow_lock:
+            if self.shadow is None:
+                return {"enabled": False}
+            stats = dict(self._shadow_stats)
+            scored = stats.pop("scored")
+            abs_diff_sum = stats.pop("abs_diff_sum")
+            latency_s_sum = stats.pop("latency_s_sum")
+            return {
+                "enabled": True,
+                "version": self.shadow.version,
+                "sample_rate": self.shadow_rate,
+                "scored": scored,
+                "mean_abs_diff": abs_diff_sum / scored if scored else None,
+                "mean_latency_ms": 1e3 * latency_s_sum / scored if scored else None,
+                **stats,
+            }
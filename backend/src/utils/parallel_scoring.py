@@ -0,0 +1,159 @@
+import logging
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.utils.batch_scoring import DedupStats, predict_probabilities
+from src.utils.metrics import metrics
+from src.utils.prediction_cache import file_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# ------------------------
+# Worker side
+# ------------------------
+_worker_model = None
+_worker_fingerprint = None
+
+
+def _init_worker(model_path: str):
+    # Runs once per worker process: the model is loaded a single time,
+    # memory-mapped so the workers share the file's pages
+    global _worker_model, _worker_fingerprint
+    _worker_model = joblib.load(model_path, mmap_mode="r")
+    _worker_fingerprint = file_fingerprint(model_path)
+
+
+def _score_shard(df: pd.DataFrame):
+    dedup = DedupStats()
+    return predict_probabilities(df, _worker_model, dedup), dedup, _worker_fingerprint
+
+
+# ------------------------
+# Parent side
+# ------------------------
+class ShardedScorer:
+    """
+    Scores large frames across a persistent process pool.
+
+    Frames smaller than min_rows (or any frame when fewer than two workers
+    are configured) are scored in-process. Larger frames are split into
+    contiguous row shards, scored by workers that memory-map the model
+    file, and reassembled in the original row order.
+
+    Workers report the fingerprint of the model they loaded. A pool whose
+    workers hold another model than fingerprint (the file was replaced) is
+    restarted, and a batch is only taken from the pool when its workers
+    scored with the fingerprint the caller asked for.
+    """
+
+    def __init__(self, model_path: str, workers: int = None,
+                 min_rows: int = 50_000, shard_rows: int = 25_000, fingerprint: str = None):
+        self.model_path = model_path
+        self.fingerprint = fingerprint
+        self.workers = (os.cpu_count() or 1) if workers is None else int(workers)
+        self.min_rows = int(min_rows)
+        self.shard_rows = max(1, int(shard_rows))
+
+        self._executor = None
+        self._lock = threading.Lock()
+
+        self.pooled_batches = 0
+        self.inline_batches = 0
+        self.stale_batches = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 1
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.model_path,),
+                )
+            return self._executor
+
+    def shutdown(self):
+        """
+        Stop the workers; the next large batch starts a fresh pool
+        (e.g. after the model file has been replaced)
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def reset(self, model_path: str, fingerprint: str = None):
+        """
+        Serve another model file: the next large batch starts a fresh pool,
+        while shards already running on the old workers finish normally
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self.model_path = model_path
+            self.fingerprint = fingerprint
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def predict(self, df: pd.DataFrame, model, dedup: DedupStats = None, fingerprint: str = None) -> np.ndarray:
+        """
+        Probabilities of model for a raw frame. With fingerprint (of model),
+        pooled results from workers holding another model are not used.
+        """
+        if not self.enabled or len(df) < self.min_rows:
+            self.inline_batches += 1
+            return predict_probabilities(df, model, dedup)
+
+        n_shards = max(self.workers, math.ceil(len(df) / self.shard_rows))
+        bounds = np.linspace(0, len(df), n_shards + 1).astype(int)
+        shards = [df.iloc[start:stop] for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+        try:
+            # Stages inside the workers are not visible here; the pool round trip is
+            with metrics.span("pool_predict", rows=len(df)):
+                results = list(self._pool().map(_score_shard, shards))
+        except BrokenProcessPool:
+            logger.warning("Scoring pool crashed, scoring batch in-process")
+            self.shutdown()
+            self.inline_batches += 1
+            return predict_probabilities(df, model, dedup)
+
+        worker_fingerprints = {worker_fingerprint for _, _, worker_fingerprint in results}
+        if self.fingerprint is not None and worker_fingerprints != {self.fingerprint}:
+            logger.warning("Scoring pool holds another model than %s, restarting it", self.model_path)
+            self.reset(self.model_path, self.fingerprint)
+        if fingerprint is not None and worker_fingerprints != {fingerprint}:
+            # The model was swapped while the batch ran
+            self.stale_batches += 1
+            self.inline_batches += 1
+            return predict_probabilities(df, model, dedup)
+
+        self.pooled_batches += 1
+        if dedup is not None:
+            # Duplicates are grouped within each shard
+            for _, shard_dedup, _ in results:
+                dedup.merge(shard_dedup)
+        return np.concatenate([probs for probs, _, _ in results])
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "workers": self.workers,
+            "min_rows": self.min_rows,
+            "shard_rows": self.shard_rows,
+            "pool_running": self._executor is not None,
+            "pooled_batches": self.pooled_batches,
+            "inline_batches": self.inline_batches,
+            "stale_batches": self.stale_batches,
+        }
@@ -1,44 +1,163 @@
+import time
+from collections import deque
+
 from reportlab.platypus import (
-    SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
+    SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Flowable, PageBreak
 )
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
 from reportlab.lib.units import inch
+from reportlab.graphics.shapes import Drawing, Group, String
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+
+# Bar colour per risk segment (unknown segments are grey)
+SEGMENT_COLORS = {
+    "Low Risk": colors.HexColor("#22c55e"),
+    "Medium Risk": colors.HexColor("#f59e0b"),
+    "High Risk": colors.HexColor("#ef4444"),
+}
+
+
+# Header colour of each segment's customer table
+SEGMENT_HEADER_COLORS = {
+    "High Risk": colors.lightcoral,
+    "Medium Risk": colors.wheat,
+    "Low Risk": colors.lightgreen,
+}
+
+CUSTOMER_TABLE_HEADER = ["ID", "Name", "Probability", "Revenue at Risk"]
+CUSTOMER_TABLE_WIDTHS = [1.5 * inch, 2.5 * inch, 1.0 * inch, 1.5 * inch]
 
-import matplotlib.pyplot as plt
-from io import BytesIO
+# Fixed row height of the full appendix tables, so page breaks need no
+# measuring and long names are cut rather than wrapped
+APPENDIX_ROW_HEIGHT = 14
+APPENDIX_NAME_CHARS = 40
 
 
-def _create_risk_chart_image(summary_df):
+def _customer_row(customer_id, name, probability, revenue_at_risk) -> list:
+    return [
+        str(customer_id if customer_id is not None else ""),
+        str(name if name is not None else ""),
+        f"{(probability or 0) * 100:.1f}%",
+        f"${(revenue_at_risk or 0):,.2f}",
+    ]
+
+
+def _customer_table(rows: list, risk_level: str, row_height=None) -> Table:
+    table = Table(
+        [CUSTOMER_TABLE_HEADER] + rows,
+        colWidths=CUSTOMER_TABLE_WIDTHS,
+        rowHeights=row_height,
+        repeatRows=1,
+    )
+    table.setStyle(
+        TableStyle(
+            [
+                ("BACKGROUND", (0, 0), (-1, 0), SEGMENT_HEADER_COLORS.get(risk_level, colors.lightgrey)),
+                ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+                ("FONT", (0, 0), (-1, 0), "Helvetica-Bold"),
+                ("ALIGN", (2, 1), (-1, -1), "RIGHT"),
+            ]
+        )
+    )
+    return table
+
+
+class CustomerAppendix(Flowable):
     """
-    Create bar chart and return it as BytesIO (NO FILE SYSTEM)
+    Every customer of one risk segment as a page-by-page table.
+
+    chunks yields lists of (customerID, customerName, churn_probability,
+    revenue_at_risk) tuples. Platypus splits this flowable at each page
+    end; every split pulls just the rows that fit the page into a small
+    fixed-height table, so only about one page of rows is held at a time
+    whatever the segment size.
     """
-    fig, ax = plt.subplots(figsize=(5, 3))
 
-    ax.bar(
-        summary_df["risk_segment"],
-        summary_df["customers"],
-        color=["#22c55e", "#f59e0b", "#ef4444"]
-    )
+    def __init__(self, chunks, risk_level: str, buffer: deque = None):
+        super().__init__()
+        self._chunks = iter(chunks)
+        self._buffer = deque() if buffer is None else buffer
+        self.risk_level = risk_level
 
-    ax.set_title("Customer Risk Distribution")
-    ax.set_xlabel("Risk Segment")
-    ax.set_ylabel("Customers")
+    def _fill(self, rows: int):
+        while len(self._buffer) < rows:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return
+            self._buffer.extend(chunk)
 
-    buffer = BytesIO()
-    plt.tight_layout()
-    plt.savefig(buffer, format="png", dpi=200)
-    plt.close(fig)
+    def wrap(self, availWidth, availHeight):
+        # Taller than any frame while rows remain, so platypus always splits
+        self._fill(1)
+        return availWidth, (availHeight + 1 if self._buffer else 0)
 
-    buffer.seek(0)
-    return buffer
+    def split(self, availWidth, availHeight):
+        fits = int(availHeight // APPENDIX_ROW_HEIGHT) - 1
+        self._fill(fits + 1)
+        if fits < 1 or not self._buffer:
+            return []
+        rows = []
+        for _ in range(min(fits, len(self._buffer))):
+            customer_id, name, probability, revenue_at_risk = self._buffer.popleft()
+            name = "" if name is None else str(name)
+            if len(name) > APPENDIX_NAME_CHARS:
+                name = name[:APPENDIX_NAME_CHARS - 3] + "..."
+            rows.append(_customer_row(customer_id, name, probability, revenue_at_risk))
+        table = _customer_table(rows, self.risk_level, row_height=APPENDIX_ROW_HEIGHT)
+        if not self._buffer:
+            return [table]
+        # The remainder continues on a fresh flowable: platypus marks a
+        # flowable it had to postpone and refuses to postpone it twice
+        return [table, CustomerAppendix(self._chunks, self.risk_level, self._buffer)]
 
+    def draw(self):
+        pass
 
-def generate_churn_pdf(company_info, summary_df, customer_lists, output_path):
+
+def _create_risk_chart(summary_df, width=4.8 * inch, height=3 * inch):
+    """
+    Bar chart of customers per risk segment as reportlab vector graphics
+    (no raster image, no plotting library)
+    """
+    drawing = Drawing(width, height)
+    drawing.add(String(width / 2, height - 14, "Customer Risk Distribution",
+                       fontName="Helvetica-Bold", fontSize=11, textAnchor="middle"))
+
+    chart = VerticalBarChart()
+    chart.x, chart.y = 50, 36
+    chart.width, chart.height = width - 70, height - 66
+    chart.data = [[int(n) for n in summary_df["customers"]]]
+    chart.categoryAxis.categoryNames = [str(s) for s in summary_df["risk_segment"]]
+    chart.categoryAxis.labels.fontSize = 8
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.labels.fontSize = 8
+    chart.barWidth = 20
+    chart.bars.strokeColor = None
+    for i, segment in enumerate(chart.categoryAxis.categoryNames):
+        chart.bars[(0, i)].fillColor = SEGMENT_COLORS.get(segment, colors.grey)
+    drawing.add(chart)
+
+    drawing.add(String(chart.x + chart.width / 2, 4, "Risk Segment", fontSize=9, textAnchor="middle"))
+    y_label = Group(String(0, 0, "Customers", fontSize=9, textAnchor="middle"))
+    y_label.translate(12, chart.y + chart.height / 2)
+    y_label.rotate(90)
+    drawing.add(y_label)
+    return drawing
+
+
+def generate_churn_pdf(company_info, summary_df, customer_lists, output_path, appendix=None, timings=None):
     """
     Generate enterprise churn intelligence PDF (SAFE VERSION)
+
+    appendix optionally maps risk segments to row chunks (see
+    CustomerAppendix) listed in full after the insights. timings, if
+    given, receives the seconds spent per stage ("chart", "build"); the
+    caller reports them, since reports are usually built in a worker
+    process whose metrics are never scraped.
     """
+    timings = {} if timings is None else timings
 
     doc = SimpleDocTemplate(
         output_path,
@@ -120,19 +239,13 @@ def generate_churn_pdf(company_info, summary_df, customer_lists, output_path):
     elements.append(Spacer(1, 0.4 * inch))
 
     # --------------------------------------------------
-    # CHART (IN-MEMORY IMAGE)
+    # CHART (VECTOR DRAWING)
     # --------------------------------------------------
     elements.append(Paragraph("<b>Risk Distribution Chart</b>", styles["Heading2"]))
 
-    chart_buffer = _create_risk_chart_image(summary_df)
-
-    elements.append(
-        Image(
-            chart_buffer,
-            width=4.8 * inch,
-            height=3 * inch,
-        )
-    )
+    started = time.perf_counter()
+    elements.append(_create_risk_chart(summary_df))
+    timings["chart"] = time.perf_counter() - started
 
     elements.append(Spacer(1, 0.3 * inch))
 
@@ -152,37 +265,15 @@ def generate_churn_pdf(company_info, summary_df, customer_lists, output_path):
             # Limit to top 50 per category to avoid massive PDFs
             limited_customers = customers[:50]
             
-            list_table_data = [["ID", "Name", "Probability", "Revenue at Risk"]]
-            for c in limited_customers:
-                prob_str = f"{c.get('churn_probability', 0)*100:.1f}%"
-                rev_str = f"${c.get('revenue_at_risk', 0):,.2f}"
-                list_table_data.append([
-                    str(c.get("customerID", "")),
-                    str(c.get("customerName", "")),
-                    prob_str,
-                    rev_str
-                ])
-                
-            list_table = Table(list_table_data, colWidths=[1.5 * inch, 2.5 * inch, 1.0 * inch, 1.5 * inch])
-            
-            # Choose header color based on risk
-            header_color = colors.lightgrey
-            if risk_level == "High Risk":
-                header_color = colors.lightcoral
-            elif risk_level == "Medium Risk":
-                header_color = colors.wheat
-            elif risk_level == "Low Risk":
-                header_color = colors.lightgreen
-                
-            list_table.setStyle(
-                TableStyle(
-                    [
-                        ("BACKGROUND", (0, 0), (-1, 0), header_color),
-                        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-                        ("FONT", (0, 0), (-1, 0), "Helvetica-Bold"),
-                        ("ALIGN", (2, 1), (-1, -1), "RIGHT"),
-                    ]
-                )
+            list_table = _customer_table(
+                [
+                    _customer_row(
+                        c.get("customerID", ""), c.get("customerName", ""),
+                        c.get("churn_probability", 0), c.get("revenue_at_risk", 0)
+                    )
+                    for c in limited_customers
+                ],
+                risk_level
             )
             elements.append(list_table)
             elements.append(Spacer(1, 0.1 * inch))
@@ -208,7 +299,23 @@ def generate_churn_pdf(company_info, summary_df, customer_lists, output_path):
         )
     )
 
+    # --------------------------------------------------
+    # FULL CUSTOMER APPENDIX (STORED RESULTS)
+    # --------------------------------------------------
+    if appendix:
+        counts = dict(zip(summary_df["risk_segment"], summary_df["customers"]))
+        for i, (risk_level, chunks) in enumerate(appendix.items()):
+            elements.append(PageBreak())
+            if i == 0:
+                elements.append(Paragraph("<b>Appendix: Full Customer List</b>", styles["Heading2"]))
+            elements.append(
+                Paragraph(f"<b>{risk_level}</b> ({int(counts.get(risk_level, 0)):,} customers)", styles["Heading3"])
+            )
+            elements.append(CustomerAppendix(chunks, risk_level))
+
     # --------------------------------------------------
     # BUILD PDF
     # --------------------------------------------------
+    started = time.perf_counter()
     doc.build(elements)
+    timings["build"] = time.perf_counter() - started
@@ -0,0 +1,227 @@
+import hashlib
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from src.utils.preprocessing import NUMERIC_COLUMNS, to_number
+from src.utils.schema import REQUIRED_COLUMNS
+
+
+def file_fingerprint(path: str) -> str:
+    """
+    Content hash of a model artifact
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _canonical(value):
+    # Missing values (None / NaN) collapse to one key
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return value
+
+
+class PredictionCache:
+    """
+    In-process LRU + TTL cache of churn probabilities.
+
+    Keys are the canonical REQUIRED_COLUMNS values of a customer (numeric
+    columns coerced the same way as feature engineering, missing values
+    normalised), compared by full equality so distinct customers never
+    share an entry. The cache is bound to the fingerprint of the served
+    model (bind_model) and also empties itself when the watched model
+    file changes on disk.
+
+    Models are loaded with mmap_mode="r", so a model file must be replaced
+    atomically (write a new file, then os.replace it over the old one, or
+    publish a new registry version); rewriting it in place can crash the
+    process with SIGBUS.
+    """
+
+    def __init__(self, max_size: int = 100_000, ttl_seconds: float = 3600.0,
+                 model_path: str = None, check_interval: float = 5.0):
+        self.max_size = max(0, int(max_size))
+        self.ttl = float(ttl_seconds)
+        self.check_interval = float(check_interval)
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+        self.model_path = model_path
+        self.model_fingerprint = None
+        self._model_stat = None
+        self._checked_at = 0.0
+        if model_path:
+            self._model_stat = self._stat()
+            self.model_fingerprint = file_fingerprint(model_path)
+            self._checked_at = time.monotonic()
+
+    # ------------------------
+    # Keys
+    # ------------------------
+    @staticmethod
+    def payload_key(payload: dict) -> tuple:
+        return tuple(
+            to_number(payload.get(col)) if col in NUMERIC_COLUMNS else _canonical(payload.get(col))
+            for col in REQUIRED_COLUMNS
+        )
+
+    @staticmethod
+    def frame_keys(df: pd.DataFrame) -> list:
+        columns = []
+        for col in REQUIRED_COLUMNS:
+            values = df[col]
+            if col in NUMERIC_COLUMNS:
+                columns.append(pd.to_numeric(values, errors="coerce").fillna(0).astype(float).tolist())
+            else:
+                values = values.astype(object)
+                columns.append(values.where(values.notna(), None).tolist())
+        return list(zip(*columns))
+
+    # ------------------------
+    # Model invalidation
+    # ------------------------
+    def _stat(self):
+        try:
+            st = os.stat(self.model_path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def bind_model(self, fingerprint: str, model_path: str = None):
+        """
+        Point the cache at a (re)loaded model; entries from any other
+        model version are dropped. model_path switches the watched file
+        (e.g. to another registry version).
+        """
+        with self._lock:
+            if model_path is not None and model_path != self.model_path:
+                self.model_path = model_path
+                self._model_stat = self._stat()
+                self._checked_at = time.monotonic()
+            if fingerprint != self.model_fingerprint:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self.model_fingerprint = fingerprint
+
+    def _revalidate(self):
+        if not self.model_path:
+            return
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+
+        stat = self._stat()
+        if stat is None or stat == self._model_stat:
+            return
+        # The served model only changes through bind_model; its fingerprint
+        # is kept so writes from it are still accepted
+        with self._lock:
+            self._model_stat = stat
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+
+    # ------------------------
+    # Lookups
+    # ------------------------
+    def _lookup(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at < now:
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def get(self, key):
+        if self.max_size == 0:
+            return None
+        self._revalidate()
+        with self._lock:
+            value = self._lookup(key, time.monotonic())
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def get_many(self, keys: list) -> np.ndarray:
+        """
+        Cached probabilities for many keys at once; misses are NaN
+        """
+        out = np.full(len(keys), np.nan)
+        if self.max_size == 0:
+            return out
+        self._revalidate()
+        with self._lock:
+            now = time.monotonic()
+            for i, key in enumerate(keys):
+                value = self._lookup(key, now)
+                if value is not None:
+                    out[i] = value
+            found = int(np.count_nonzero(~np.isnan(out)))
+            self.hits += found
+            self.misses += len(keys) - found
+        return out
+
+    def put(self, key, value: float, fingerprint: str = None):
+        self.put_many([key], [value], fingerprint)
+
+    def put_many(self, keys: list, values, fingerprint: str = None):
+        """
+        Store probabilities; with fingerprint, values computed by a model
+        that has been swapped out in the meantime are discarded
+        """
+        if self.max_size == 0:
+            return
+        with self._lock:
+            if fingerprint is not None and fingerprint != self.model_fingerprint:
+                return
+            expires_at = time.monotonic() + self.ttl
+            for key, value in zip(keys, values):
+                self._entries[key] = (float(value), expires_at)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.max_size > 0,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "model_fingerprint": self.model_fingerprint,
+        }
@@ -1,43 +1,134 @@
+import math
+
+import numpy as np
 import pandas as pd
 
-def apply_feature_engineering(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-
-    # ---------------------------
-    # DEFAULT VALUES (CRITICAL)
-    # ---------------------------
-    defaults = {
-        "PhoneService": "Yes",
-        "MultipleLines": "No",
-        "OnlineBackup": "No",
-        "DeviceProtection": "No",
-        "StreamingMovies": "No",
-        "PaperlessBilling": "Yes"
-    }
-
-    for col, val in defaults.items():
+from src.utils.schema import CATEGORY_ALIASES, CATEGORY_VOCAB
+
+# ---------------------------
+# DEFAULT VALUES (CRITICAL)
+# ---------------------------
+DEFAULT_VALUES = {
+    "PhoneService": "Yes",
+    "MultipleLines": "No",
+    "OnlineBackup": "No",
+    "DeviceProtection": "No",
+    "StreamingMovies": "No",
+    "PaperlessBilling": "Yes"
+}
+
+NUMERIC_COLUMNS = ["tenure", "MonthlyCharges", "TotalCharges"]
+
+SERVICE_COLUMNS = [
+    "OnlineSecurity", "OnlineBackup", "DeviceProtection",
+    "TechSupport", "StreamingTV", "StreamingMovies"
+]
+
+# Columns added by build_features
+ENGINEERED_COLUMNS = ["charge_per_tenure", "num_services", "tenure_group"]
+
+TENURE_BINS = [0, 12, 24, 48, 72]
+TENURE_LABELS = ["0-1yr", "1-2yr", "2-4yr", "4-6yr"]
+
+CATEGORY_DTYPES = {col: pd.CategoricalDtype(vocab) for col, vocab in CATEGORY_VOCAB.items()}
+TENURE_GROUP_DTYPE = pd.CategoricalDtype(TENURE_LABELS, ordered=True)
+_YES_CODE = {col: CATEGORY_VOCAB[col].index("Yes") for col in SERVICE_COLUMNS}
+
+
+def to_number(value) -> float:
+    """
+    Scalar equivalent of pd.to_numeric(errors="coerce").fillna(0)
+    """
+    if isinstance(value, str):
+        try:
+            value = float(value.strip())
+        except ValueError:
+            return 0.0
+    else:
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return 0.0
+    return 0.0 if math.isnan(value) else value
+
+
+def _as_number(series: pd.Series) -> pd.Series:
+    # Already-numeric, complete columns (e.g. from the API models) pass through
+    if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+        return series if not series.hasnans else series.fillna(0)
+    return pd.to_numeric(series, errors="coerce").fillna(0)
+
+
+def _as_category(series: pd.Series, dtype: pd.CategoricalDtype, aliases: dict = None) -> pd.Series:
+    if series.dtype == dtype:
+        return series
+    # Hash the (long) column once, then map its few distinct values onto
+    # the vocabulary; much cheaper than a direct astype on string columns
+    codes, uniques = pd.factorize(series)
+    if aliases:
+        uniques = [aliases.get(value, value) for value in uniques]
+    lookup = np.append(dtype.categories.get_indexer(uniques), -1)
+    return pd.Series(pd.Categorical.from_codes(lookup[codes], dtype=dtype), index=series.index, name=series.name)
+
+
+def build_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The feature pipeline shared by training, the API and batch scoring.
+
+    Categorical columns are converted once to Categoricals with the fixed
+    vocabularies in schema.CATEGORY_VOCAB (known aliases included), and
+    num_services / tenure_group
+    are computed from integer codes. The input frame is not modified, but
+    its unchanged columns are shared rather than copied.
+    """
+    df = df.copy(deep=False)
+
+    for col, val in DEFAULT_VALUES.items():
         if col not in df.columns:
             df[col] = val
 
     # Safety casting
-    df["tenure"] = pd.to_numeric(df["tenure"], errors="coerce").fillna(0)
-    df["MonthlyCharges"] = pd.to_numeric(df["MonthlyCharges"], errors="coerce").fillna(0)
-    df["TotalCharges"] = pd.to_numeric(df["TotalCharges"], errors="coerce").fillna(0)
+    for col in NUMERIC_COLUMNS:
+        df[col] = _as_number(df[col])
+
+    for col, dtype in CATEGORY_DTYPES.items():
+        if col in df.columns:
+            df[col] = _as_category(df[col], dtype, CATEGORY_ALIASES.get(col))
 
     # Feature engineering
-    df["charge_per_tenure"] = df["MonthlyCharges"] / (df["tenure"] + 1)
+    tenure = df["tenure"].to_numpy(dtype=float)
+    df["charge_per_tenure"] = df["MonthlyCharges"] / (tenure + 1)
 
-    services = [
-        "OnlineSecurity", "OnlineBackup", "DeviceProtection",
-        "TechSupport", "StreamingTV", "StreamingMovies"
-    ]
-    df["num_services"] = (df[services] == "Yes").sum(axis=1)
+    num_services = np.zeros(len(df), dtype=np.int64)
+    for col in SERVICE_COLUMNS:
+        num_services += df[col].cat.codes.to_numpy() == _YES_CODE[col]
+    df["num_services"] = num_services
 
-    df["tenure_group"] = pd.cut(
-        df["tenure"],
-        bins=[0, 12, 24, 48, 72],
-        labels=["0-1yr", "1-2yr", "2-4yr", "4-6yr"],
-        include_lowest=True
-    )
+    # Same buckets as pd.cut(include_lowest=True): [0, 12], (12, 24], ...,
+    # except that tenures past the last edge stay in the last bucket
+    codes = np.searchsorted(TENURE_BINS, tenure, side="left") - 1
+    codes[tenure == TENURE_BINS[0]] = 0
+    codes[tenure > TENURE_BINS[-1]] = len(TENURE_LABELS) - 1
+    codes[tenure < TENURE_BINS[0]] = -1
+    df["tenure_group"] = pd.Categorical.from_codes(codes, dtype=TENURE_GROUP_DTYPE)
 
     return df
+
+
+def restore_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Model-ready frame from previously built features (e.g. read back from
+    the feature store): only the dtypes are restored, the engineered
+    columns are reused as they are
+    """
+    df = df.copy(deep=False)
+    for col in NUMERIC_COLUMNS + ["charge_per_tenure", "num_services"]:
+        df[col] = _as_number(df[col])
+    for col, dtype in CATEGORY_DTYPES.items():
+        df[col] = _as_category(df[col], dtype)
+    df["tenure_group"] = _as_category(df["tenure_group"], TENURE_GROUP_DTYPE)
+    return df
+
+
+# Historical names of the pipeline
+apply_feature_engineering = build_features
@@ -0,0 +1,230 @@
+import glob
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Part of every cache key: bump when the report layout changes so PDFs
+# rendered by an older layout are not served again
+REPORT_LAYOUT_VERSION = "3"
+
+# Stored result columns listed in the full customer appendix, and the
+# rows fetched from the results database per read
+APPENDIX_COLUMNS = ["customerID", "customerName", "churn_probability", "revenue_at_risk"]
+APPENDIX_CHUNK_ROWS = 5_000
+
+
+class ReportQueueFull(RuntimeError):
+    pass
+
+
+# ------------------------
+# Worker side
+# ------------------------
+def _render_report(report: dict, output_path: str, appendix_path: str = None):
+    # Runs in a worker process; returns (build seconds, seconds per stage)
+    import pandas as pd
+    from src.utils.jobs import iter_segment_rows
+    from src.utils.pdf_report import generate_churn_pdf
+
+    started = time.perf_counter()
+    timings = {}
+    appendix = None
+    if appendix_path is not None:
+        # Rows are read from the job's results as the pages are laid out
+        appendix = {
+            segment: iter_segment_rows(appendix_path, segment, APPENDIX_COLUMNS, APPENDIX_CHUNK_ROWS)
+            for segment in report["appendix_segments"]
+        }
+    generate_churn_pdf(
+        company_info={
+            "name": report.get("company_name", ""),
+            "location": report.get("company_location", ""),
+            "email": report.get("company_email", ""),
+            "website": report.get("company_website", ""),
+        },
+        summary_df=pd.DataFrame(report["summary_data"]),
+        customer_lists=report.get("customer_lists") or {},
+        output_path=output_path,
+        appendix=appendix,
+        timings=timings,
+    )
+    return time.perf_counter() - started, timings
+
+
+# ------------------------
+# Parent side
+# ------------------------
+class ReportRenderer:
+    """
+    Renders PDF reports off the request path and caches them on disk.
+
+    Reports are built by a small process pool (workers=0 renders on one
+    background thread instead). At most max_pending reports are queued
+    or rendering; further submissions are rejected rather than piling up
+    behind a slow queue. Finished PDFs are stored under a hash of the
+    report request, so an identical request is answered from disk, and
+    identical requests arriving while one renders share its result. The
+    max_files most recently used PDFs are kept.
+    """
+
+    def __init__(self, cache_dir: str, workers: int = 1, max_pending: int = 8, max_files: int = 256):
+        self.cache_dir = cache_dir
+        self.workers = max(0, int(workers))
+        self.max_pending = max(1, int(max_pending))
+        self.max_files = max(1, int(max_files))
+
+        os.makedirs(cache_dir, exist_ok=True)
+        # Leftovers of renders interrupted by a restart
+        for path in glob.glob(os.path.join(cache_dir, "*.tmp")):
+            os.unlink(path)
+
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = {}
+
+        self.rendered = 0
+        self.failed = 0
+        self.rejected = 0
+        self.cache_hits = 0
+        self.shared = 0
+        self.total_build_seconds = 0.0
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                if self.workers == 0:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="report-render")
+                else:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def cache_key(report: dict) -> str:
+        body = json.dumps(report, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(f"{REPORT_LAYOUT_VERSION}:{body}".encode()).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.pdf")
+
+    def submit(self, report: dict, appendix_path: str = None):
+        """
+        (future resolving to the PDF path, whether it came from the cache)
+        for a ReportRequest as a plain dict. With appendix_path (a job's
+        results.sqlite) every customer of report["appendix_segments"] is
+        listed in an appendix; the report must then identify the stored
+        results (e.g. job ID and finish time) for the cache key.
+        """
+        key = self.cache_key(report)
+        path = self.path(key)
+        with self._lock:
+            if key in self._pending:
+                self.shared += 1
+                return self._pending[key], False
+            if os.path.exists(path):
+                self.cache_hits += 1
+                # Touch the file so the eviction keeps recently used reports
+                os.utime(path)
+                done = Future()
+                done.set_result(path)
+                return done, True
+            if len(self._pending) >= self.max_pending:
+                self.rejected += 1
+                raise ReportQueueFull(f"Report queue is full ({self.max_pending} reports pending), retry shortly")
+            done = self._pending[key] = Future()
+
+        submitted = time.perf_counter()
+        # Worker callbacks run outside the request; stages are credited to it
+        endpoint = metrics.current_endpoint()
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            work = self._pool().submit(_render_report, report, tmp_path, appendix_path)
+        except Exception as e:
+            self._finish(key, done, error=e)
+            return done, False
+        work.add_done_callback(lambda work: self._complete(key, done, work, tmp_path, submitted, endpoint))
+        return done, False
+
+    def _complete(self, key: str, done: Future, work: Future, tmp_path: str, submitted: float, endpoint: str):
+        try:
+            build_seconds, stages = work.result()
+            os.replace(tmp_path, self.path(key))
+        except BaseException as e:
+            if isinstance(e, BrokenProcessPool):
+                logger.warning("Report pool crashed, starting a new one for the next report")
+                self.shutdown()
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            self._finish(key, done, error=e)
+            return
+
+        waited = time.perf_counter() - submitted - build_seconds
+        metrics.observe("churn_report_build_seconds", build_seconds)
+        metrics.observe("churn_report_queue_seconds", max(waited, 0.0))
+        for stage, seconds in stages.items():
+            metrics.observe_stage(stage, seconds, endpoint=endpoint)
+        with self._lock:
+            self.rendered += 1
+            self.total_build_seconds += build_seconds
+        self._evict()
+        self._finish(key, done, result=self.path(key))
+
+    def _finish(self, key: str, done: Future, result=None, error=None):
+        with self._lock:
+            self._pending.pop(key, None)
+            if error is not None:
+                self.failed += 1
+        if error is not None:
+            done.set_exception(error)
+        else:
+            done.set_result(result)
+
+    def _evict(self):
+        files = glob.glob(os.path.join(self.cache_dir, "*.pdf"))
+        if len(files) <= self.max_files:
+            return
+        files.sort(key=lambda path: os.stat(path).st_mtime)
+        for path in files[:len(files) - self.max_files]:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def queue_depth(self) -> int:
+        return len(self._pending)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "queue_depth": self.queue_depth(),
+            "rendered": self.rendered,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "cache_hits": self.cache_hits,
+            "shared_renders": self.shared,
+            "avg_build_ms": 1000.0 * self.total_build_seconds / self.rendered if self.rendered else 0.0,
+            "cached_files": len(glob.glob(os.path.join(self.cache_dir, "*.pdf"))),
+        }
+
+
+metrics.describe("churn_report_build_seconds", "PDF report build time in the render worker")
+metrics.describe("churn_report_queue_seconds", "Time a PDF report waited for a render worker")
@@ -0,0 +1,169 @@
+import operator
+
+import numpy as np
+import pandas as pd
+
+from src.utils.preprocessing import to_number
+
+# Values used when a payload does not carry a column the rules look at
+STRATEGY_DEFAULTS = {
+    "tenure": 0,
+    "MonthlyCharges": 0,
+    "Contract": "Month-to-month",
+    "TechSupport": "No",
+    "PaymentMethod": "Electronic check",
+}
+
+STRATEGY_NUMERIC_COLUMNS = ["churn_probability", "tenure", "MonthlyCharges"]
+
+# ==================================================
+# RULE TABLE
+# ==================================================
+# Each rule is (code, conditions, recommended action). A rule matches when
+# all of its (column, operator, value) conditions hold; the first matching
+# rule wins, so the order below is the priority order.
+RETENTION_RULES = [
+    # High Risk
+    (
+        "VIP_INTERVENTION",
+        [("churn_probability", ">", 0.7), ("MonthlyCharges", ">", 80)],
+        "VIP Intervention Required: Premium customer at critical churn risk. Assign a dedicated retention specialist to call immediately. Offer a customized 20% loyalty discount or a complimentary service upgrade for 6 months.",
+    ),
+    (
+        "EARLY_STAGE_RESCUE",
+        [("churn_probability", ">", 0.7), ("tenure", "<", 6)],
+        "Early-Stage Rescue: Customer is highly likely to churn early, indicating poor onboarding. Deploy an automated 'We Miss You' campaign offering a 1-month free credit and schedule a proactive technical check-in.",
+    ),
+    (
+        "CONTRACT_LOCK_IN",
+        [("churn_probability", ">", 0.7), ("Contract", "==", "Month-to-month")],
+        "Contract Lock-In Motivation: High volatility due to lack of commitment. Send a targeted email offering an exclusive 'Price Lock Guarantee' and free device protection if they upgrade to a 1-year contract today.",
+    ),
+    (
+        "URGENT_ACCOUNT_REVIEW",
+        [("churn_probability", ">", 0.7)],
+        "Urgent Account Review: Dispatch an immediate personalized email from the account manager with a survey to identify dissatisfaction points, accompanied by a $25 no-strings-attached account credit.",
+    ),
+    # Medium Risk
+    (
+        "SERVICE_CONFIDENCE_BOOST",
+        [("churn_probability", ">", 0.4), ("TechSupport", "==", "No")],
+        "Service Confidence Boost: Customer shows distress and lacks technical support. Proactively grant complimentary priority Tech Support for 3 months and email a 'Top Ways to Optimize Your Connection' guide.",
+    ),
+    (
+        "LOYALTY_APPRECIATION",
+        [("churn_probability", ">", 0.4), ("tenure", ">", 24)],
+        "Loyalty Appreciation: Veteran customer experiencing mid-tier risk. Avoid discounts; instead, send a personalized 'Thank You' package acknowledging their loyalty alongside a free speed upgrade as a token of appreciation.",
+    ),
+    (
+        "PAYMENT_FRICTION_REDUCTION",
+        [("churn_probability", ">", 0.4), ("PaymentMethod", "in", ["Electronic check", "Mailed check"])],
+        "Payment Friction Reduction: Manual payment methods often cause accidental churn. Trigger a campaign offering a $10 one-time credit if they switch their payment method to Auto-Pay via Credit Card.",
+    ),
+    (
+        "ENGAGEMENT_NUDGE",
+        [("churn_probability", ">", 0.4)],
+        "Engagement Nudge: Monitor usage patterns over 30 days. Send a targeted 'Did you know?' newsletter highlighting underutilized features of their current plan to increase daily platform reliance.",
+    ),
+    # Low Risk
+    (
+        "GROWTH_UPSELL",
+        [("MonthlyCharges", "<", 50)],
+        "Growth & Upsell Opportunity: Highly stable customer on a low-tier plan. Add them to the targeted marketing cadence for premium packages, highlighting the benefits of Fiber Optic internet at a marginal price increase.",
+    ),
+    (
+        "ADVOCACY_ACTIVATION",
+        [("tenure", ">", 12), ("MonthlyCharges", ">", 70)],
+        "Advocacy Activation: Highly satisfied premium customer. Leverage their satisfaction by inviting them to an exclusive Customer Advisory Board or sending a Referral Code to earn $50 for every friend they bring.",
+    ),
+    (
+        "MAINTAIN_SATISFACTION",
+        [],
+        "Maintain Satisfaction: No immediate retention intervention needed. Continue delivering excellent service and include them in general seasonal promotional communications to maintain brand positivity.",
+    ),
+]
+
+STRATEGY_CODES = [code for code, _, _ in RETENTION_RULES]
+STRATEGY_MESSAGES = {code: message for code, _, message in RETENTION_RULES}
+
+_OPERATORS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+
+# ==================================================
+# VECTORIZED EVALUATOR
+# ==================================================
+def _column_mask(values, op: str, target) -> np.ndarray:
+    if op == "in":
+        return np.isin(values, target)
+    return _OPERATORS[op](values, target)
+
+
+def _strategy_columns(df: pd.DataFrame, churn_prob) -> dict:
+    columns = {"churn_probability": np.asarray(churn_prob, dtype=float)}
+    for col, default in STRATEGY_DEFAULTS.items():
+        if col in df.columns:
+            values = df[col]
+        else:
+            values = pd.Series(default, index=df.index)
+        if col in STRATEGY_NUMERIC_COLUMNS:
+            columns[col] = pd.to_numeric(values, errors="coerce").fillna(0).to_numpy(dtype=float)
+        else:
+            columns[col] = values.to_numpy(dtype=object)
+    return columns
+
+
+def assign_strategy_codes(df: pd.DataFrame, churn_prob) -> pd.Categorical:
+    """
+    Evaluate the rule table over whole columns at once (np.select over
+    one boolean mask per rule) and return the strategy code per row
+    """
+    columns = _strategy_columns(df, churn_prob)
+    n = len(df)
+
+    masks = []
+    for _, conditions, _ in RETENTION_RULES:
+        mask = np.ones(n, dtype=bool)
+        for col, op, target in conditions:
+            mask &= _column_mask(columns[col], op, target)
+        masks.append(mask)
+
+    codes = np.select(masks, np.arange(len(RETENTION_RULES)), default=len(RETENTION_RULES) - 1)
+    return pd.Categorical.from_codes(codes, categories=STRATEGY_CODES)
+
+
+# ==================================================
+# SINGLE CUSTOMER
+# ==================================================
+def strategy_code(payload: dict, churn_prob: float) -> str:
+    """
+    Same rule table evaluated on one payload without building arrays
+    """
+    values = {"churn_probability": float(churn_prob)}
+    for col, default in STRATEGY_DEFAULTS.items():
+        value = payload.get(col, default)
+        values[col] = to_number(value) if col in STRATEGY_NUMERIC_COLUMNS else value
+
+    for code, conditions, _ in RETENTION_RULES:
+        matched = True
+        for col, op, target in conditions:
+            if op == "in":
+                ok = values[col] in target
+            else:
+                ok = _OPERATORS[op](values[col], target)
+            if not ok:
+                matched = False
+                break
+        if matched:
+            return code
+    return STRATEGY_CODES[-1]
+
+
+def generate_retention_strategy(payload: dict, churn_prob: float) -> str:
+    return STRATEGY_MESSAGES[strategy_code(payload, churn_prob)]
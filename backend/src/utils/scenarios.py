@@ -0,0 +1,251 @@
+import operator
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from src.utils.batch_scoring import REVENUE_HORIZON_MONTHS, RISK_LABELS, risk_segment_codes
+from src.utils.preprocessing import CATEGORY_DTYPES, build_features
+from src.utils.schema import REQUIRED_COLUMNS
+
+# ==================================================
+# SCENARIO FORMAT
+# ==================================================
+# A scenario is a list of interventions applied in order:
+#
+#   {"name": "Tech support for month-to-month",
+#    "interventions": [
+#        {"where": [["Contract", "==", "Month-to-month"], ["TechSupport", "==", "No"]],
+#         "set": {"TechSupport": "Yes"}},
+#        {"where": [["tenure", "<", 12]],
+#         "set": {"MonthlyCharges": ["*", 0.9]}}
+#    ]}
+#
+# where uses the operators of the retention rule table and is evaluated on
+# the original portfolio. set assigns a value, or for numeric columns
+# ["=", x], ["+", x] or ["*", x].
+
+_OPERATORS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+_UPDATES = {
+    "=": lambda values, x: np.full_like(values, x),
+    "+": operator.add,
+    "*": operator.mul,
+}
+
+
+def _category_code(col: str, value) -> int:
+    categories = CATEGORY_DTYPES[col].categories
+    if value not in categories:
+        raise ValueError(f"Unknown value for {col}: {value!r} (expected one of {categories.tolist()})")
+    return categories.get_loc(value)
+
+
+def _check_column(col: str):
+    if col not in REQUIRED_COLUMNS:
+        raise ValueError(f"Unknown column: {col}")
+
+
+def row_mask(features: pd.DataFrame, where: list) -> np.ndarray:
+    """
+    Rows matching every (column, operator, value) condition
+    """
+    mask = np.ones(len(features), dtype=bool)
+    for col, op, target in where:
+        _check_column(col)
+        if col in CATEGORY_DTYPES:
+            codes = features[col].cat.codes.to_numpy()
+            if op in ("in", "not in"):
+                matched = np.isin(codes, [_category_code(col, value) for value in target])
+                mask &= matched if op == "in" else ~matched
+            elif op in ("==", "!="):
+                mask &= _OPERATORS[op](codes, _category_code(col, target))
+            else:
+                raise ValueError(f"Operator {op!r} is not supported for categorical column {col}")
+        else:
+            values = features[col].to_numpy(dtype=float)
+            if op in ("in", "not in"):
+                matched = np.isin(values, np.asarray(target, dtype=float))
+                mask &= matched if op == "in" else ~matched
+            elif op in _OPERATORS:
+                mask &= _OPERATORS[op](values, float(target))
+            else:
+                raise ValueError(f"Unknown operator: {op!r}")
+    return mask
+
+
+def apply_update(features: pd.DataFrame, mask: np.ndarray, col: str, update):
+    """
+    Apply one column update to the masked rows of a feature frame in place
+    """
+    _check_column(col)
+    if col in CATEGORY_DTYPES:
+        codes = features[col].cat.codes.to_numpy().copy()
+        codes[mask] = _category_code(col, update)
+        features[col] = pd.Categorical.from_codes(codes, dtype=CATEGORY_DTYPES[col])
+        return
+
+    op, operand = update if isinstance(update, (list, tuple)) else ("=", update)
+    if op not in _UPDATES:
+        raise ValueError(f"Unknown update for {col}: {op!r} (expected one of {list(_UPDATES)})")
+    values = features[col].to_numpy(dtype=float, copy=True)
+    values[mask] = _UPDATES[op](values[mask], float(operand))
+    features[col] = values
+
+
+# ==================================================
+# PORTFOLIO
+# ==================================================
+class Portfolio:
+    """
+    A scored portfolio prepared for repeated what-if runs.
+
+    Features are engineered once; a scenario copies only the rows its
+    interventions touch, edits their feature columns in place and
+    re-scores just the rows whose values actually changed. Baseline
+    probabilities of those rows under the served model are cached, so
+    scenarios touching the same customers score them only once.
+    """
+
+    def __init__(self, frame: pd.DataFrame):
+        self.size = len(frame)
+        self.features = build_features(frame[REQUIRED_COLUMNS])
+        self.revenue = frame["revenue_at_risk"].to_numpy(dtype=float)
+        self.probability = frame["churn_probability"].to_numpy(dtype=float)
+        self.segment = pd.Categorical(frame["risk_segment"], categories=RISK_LABELS).codes.astype(np.int64)
+
+        self._lock = threading.Lock()
+        self._baseline_fingerprint = None
+        self._baseline = None
+
+    def baseline(self, rows: np.ndarray, predict_features, fingerprint: str) -> np.ndarray:
+        """
+        Probabilities of the unmodified rows under the given model
+        """
+        with self._lock:
+            if fingerprint != self._baseline_fingerprint:
+                self._baseline_fingerprint = fingerprint
+                self._baseline = np.full(self.size, np.nan)
+            baseline = self._baseline
+            missing = rows[np.isnan(baseline[rows])]
+        if len(missing):
+            baseline[missing] = predict_features(self.features.iloc[missing])
+        return baseline[rows]
+
+    def run(self, scenario: dict, predict_features, fingerprint: str) -> dict:
+        interventions = scenario.get("interventions") or []
+        masks = [row_mask(self.features, item.get("where") or []) for item in interventions]
+        touched = np.flatnonzero(np.logical_or.reduce(masks)) if masks else np.array([], dtype=np.int64)
+
+        edited = self.features.iloc[touched].copy()
+        columns = set()
+        for item, mask in zip(interventions, masks):
+            for col, update in (item.get("set") or {}).items():
+                apply_update(edited, mask[touched], col, update)
+                columns.add(col)
+
+        # Rows the updates left as they were are not re-scored
+        original = self.features.iloc[touched]
+        changed = np.zeros(len(touched), dtype=bool)
+        for col in columns:
+            if col in CATEGORY_DTYPES:
+                changed |= edited[col].cat.codes.to_numpy() != original[col].cat.codes.to_numpy()
+            else:
+                changed |= edited[col].to_numpy(dtype=float) != original[col].to_numpy(dtype=float)
+        rows = touched[changed]
+
+        delta_revenue = np.zeros(len(rows))
+        delta_probability = np.zeros(len(rows))
+        if len(rows):
+            edited = build_features(edited[changed])
+            after = np.asarray(predict_features(edited), dtype=float)
+            before = self.baseline(rows, predict_features, fingerprint)
+            delta_probability = after - before
+            delta_revenue = REVENUE_HORIZON_MONTHS * (
+                after * edited["MonthlyCharges"].to_numpy(dtype=float)
+                - before * self.features["MonthlyCharges"].to_numpy(dtype=float)[rows]
+            )
+
+        return self._summarise(scenario.get("name"), rows, delta_probability, delta_revenue)
+
+    def _summarise(self, name, rows, delta_probability, delta_revenue) -> dict:
+        k = len(RISK_LABELS)
+        segment = self.segment
+        valid = segment >= 0
+
+        customers = np.bincount(segment[valid], minlength=k)
+        revenue = np.bincount(segment[valid], weights=np.nan_to_num(self.revenue[valid]), minlength=k)
+        row_segment = segment[rows]
+        row_valid = row_segment >= 0
+        affected = np.bincount(row_segment[row_valid], minlength=k)
+        revenue_delta = np.bincount(row_segment[row_valid], weights=delta_revenue[row_valid], minlength=k)
+        probability_delta = np.bincount(row_segment[row_valid], weights=delta_probability[row_valid], minlength=k)
+
+        # Where the affected customers land once the scenario is applied
+        moved = np.clip(self.probability[rows] + delta_probability, 0.0, 1.0)
+        new_segment = risk_segment_codes(moved)
+        scenario_customers = customers - affected + np.bincount(new_segment[row_valid], minlength=k)
+
+        segments = [
+            {
+                "risk_segment": label,
+                "customers": int(customers[i]),
+                "affected_customers": int(affected[i]),
+                "baseline_revenue_at_risk": float(revenue[i]),
+                "scenario_revenue_at_risk": float(revenue[i] + revenue_delta[i]),
+                "revenue_at_risk_delta": float(revenue_delta[i]),
+                "mean_churn_probability_delta": float(probability_delta[i] / affected[i]) if affected[i] else 0.0,
+                "scenario_customers": int(scenario_customers[i]),
+            }
+            for i, label in enumerate(RISK_LABELS)
+        ]
+        return {
+            "name": name,
+            "affected_customers": int(len(rows)),
+            "baseline_revenue_at_risk": float(revenue.sum()),
+            "scenario_revenue_at_risk": float(revenue.sum() + revenue_delta.sum()),
+            "revenue_at_risk_delta": float(revenue_delta.sum()),
+            "segments": segments,
+        }
+
+
+class ScenarioEngine:
+    """
+    Runs scenarios against portfolios loaded on demand (e.g. stored job
+    results); the most recently used portfolios stay prepared in memory
+    """
+
+    def __init__(self, load_frame, max_portfolios: int = 2):
+        self.load_frame = load_frame
+        self.max_portfolios = max(1, int(max_portfolios))
+        self._portfolios = OrderedDict()
+        self._lock = threading.Lock()
+
+    def portfolio(self, key: str) -> Portfolio:
+        with self._lock:
+            portfolio = self._portfolios.get(key)
+            if portfolio is not None:
+                self._portfolios.move_to_end(key)
+                return portfolio
+        portfolio = Portfolio(self.load_frame(key))
+        with self._lock:
+            self._portfolios[key] = portfolio
+            while len(self._portfolios) > self.max_portfolios:
+                self._portfolios.popitem(last=False)
+        return portfolio
+
+    def run(self, key: str, scenarios: list, predict_features, fingerprint: str) -> list:
+        portfolio = self.portfolio(key)
+        return [portfolio.run(scenario, predict_features, fingerprint) for scenario in scenarios]
+
+    def evict(self, key: str):
+        with self._lock:
+            self._portfolios.pop(key, None)
@@ -1,3 +1,8 @@
+import math
+
+import numpy as np
+import pandas as pd
+
 # Columns REQUIRED for prediction
 REQUIRED_COLUMNS = [
     "gender",
@@ -26,3 +31,266 @@ OPTIONAL_COLUMNS = [
     "customerID",
     "customerName"
 ]
+
+# Fixed category vocabularies (as fitted by the model's OneHotEncoder).
+# Values outside a vocabulary become missing, which the encoder ignores
+# exactly like an unknown string.
+CATEGORY_VOCAB = {
+    "gender": ["Female", "Male"],
+    "SeniorCitizen": [0, 1],
+    "Partner": ["No", "Yes"],
+    "Dependents": ["No", "Yes"],
+    "PhoneService": ["No", "Yes"],
+    "MultipleLines": ["No", "No phone service", "Yes"],
+    "InternetService": ["DSL", "Fiber optic", "No"],
+    "OnlineSecurity": ["No", "No internet service", "Yes"],
+    "OnlineBackup": ["No", "No internet service", "Yes"],
+    "DeviceProtection": ["No", "No internet service", "Yes"],
+    "TechSupport": ["No", "No internet service", "Yes"],
+    "StreamingTV": ["No", "No internet service", "Yes"],
+    "StreamingMovies": ["No", "No internet service", "Yes"],
+    "Contract": ["Month-to-month", "One year", "Two year"],
+    "PaperlessBilling": ["No", "Yes"],
+    "PaymentMethod": [
+        "Bank transfer (automatic)",
+        "Credit card (automatic)",
+        "Electronic check",
+        "Mailed check"
+    ]
+}
+
+# Common spellings of vocabulary values (e.g. exports that drop the
+# "(automatic)" suffix); they are accepted and scored as the value they
+# map to
+CATEGORY_ALIASES = {
+    "PaymentMethod": {
+        "Bank transfer": "Bank transfer (automatic)",
+        "Credit card": "Credit card (automatic)",
+    }
+}
+
+
+def canonical_category(col: str, value):
+    """
+    Vocabulary spelling of value for col (unchanged if not an alias)
+    """
+    aliases = CATEGORY_ALIASES.get(col)
+    if not aliases:
+        return value
+    try:
+        return aliases.get(value, value)
+    except TypeError:
+        return value
+
+
+# ==================================================
+# TYPED COLUMN SPECS & VALIDATION
+# ==================================================
+
+class ColumnSpec:
+    """
+    Type and domain of one input column.
+
+    - numeric: inclusive [min, max]; a nullable column accepts missing or
+      blank values (scored as 0, like the blank TotalCharges of new
+      customers in the training data)
+    - category: one of values, or one of the aliases mapping onto them
+    """
+
+    def __init__(self, kind: str, values: list = None, min: float = None, max: float = None,
+                 nullable: bool = False, aliases: dict = None):
+        if kind not in ("numeric", "category"):
+            raise ValueError(f"Unknown column kind: {kind}")
+        self.kind = kind
+        self.values = list(values or [])
+        self.min = -math.inf if min is None else float(min)
+        self.max = math.inf if max is None else float(max)
+        self.nullable = nullable
+        self.aliases = dict(aliases or {})
+
+    def check(self, value):
+        """
+        Why a single value is invalid, or None
+        """
+        if self.kind == "category":
+            if _is_missing(value):
+                return "missing value"
+            try:
+                value = self.aliases.get(value, value)
+            except TypeError:
+                pass
+            return None if value in self.values else f"{value!r} is not an allowed value"
+
+        if _is_missing(value) or (isinstance(value, str) and not value.strip()):
+            return None if self.nullable else "missing value"
+        if isinstance(value, bool):
+            number = float(value)
+        else:
+            try:
+                number = float(value.strip() if isinstance(value, str) else value)
+            except (TypeError, ValueError):
+                return f"{value!r} is not a number"
+        if math.isnan(number):
+            return None if self.nullable else "missing value"
+        if not self.min <= number <= self.max:
+            return f"{value!r} is outside [{self.min:g}, {self.max:g}]"
+        return None
+
+
+def _is_missing(value) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+# Numeric ranges observed in data/raw/Dataset.csv. Charges are widened by
+# 10% of the observed span, since prices drift after training. tenure has
+# no upper bound: the training data stops at 72 months, and longer
+# tenures fall into the last tenure_group bucket.
+COLUMN_SPECS = {
+    **{
+        col: ColumnSpec("category", values, aliases=CATEGORY_ALIASES.get(col))
+        for col, values in CATEGORY_VOCAB.items()
+    },
+    "tenure": ColumnSpec("numeric", min=0),
+    "MonthlyCharges": ColumnSpec("numeric", min=8.2, max=128.8),
+    "TotalCharges": ColumnSpec("numeric", min=0, max=9551.5, nullable=True),
+}
+
+
+class ValidationResult:
+    """
+    Outcome of validating a frame.
+
+    - valid: boolean row mask
+    - problems: bad-row mask of each column with invalid values
+    - columns: the checked columns already converted to the dtypes
+      build_features produces (Categoricals over the fixed vocabularies
+      and floats), so the conversion is not paid twice
+    """
+
+    def __init__(self, df: pd.DataFrame, specs: dict, valid: np.ndarray, problems: dict, columns: dict):
+        self._df = df
+        self._specs = specs
+        self.valid = valid
+        self.problems = problems
+        self.columns = columns
+
+    @property
+    def rejected(self) -> int:
+        return int(len(self.valid) - self.valid.sum())
+
+    def by_column(self) -> dict:
+        return {col: int(bad.sum()) for col, bad in self.problems.items()}
+
+    def rejected_rows(self, limit: int = None, row_offset: int = 0, id_column: str = "customerID") -> list:
+        """
+        {"row", "customerID", "reasons"} for the first limit rejected rows;
+        reasons are only formatted for the rows returned
+        """
+        rows = np.flatnonzero(~self.valid)
+        if limit is not None:
+            rows = rows[:max(0, int(limit))]
+        ids = self._df[id_column].iloc[rows].tolist() if id_column in self._df.columns else [None] * len(rows)
+        out = []
+        for row, customer_id in zip(rows.tolist(), ids):
+            reasons = [
+                f"{col}: {self._specs[col].check(_plain(self._df[col].iloc[row]))}"
+                for col, bad in self.problems.items() if bad[row]
+            ]
+            out.append({"row": row + row_offset, "customerID": customer_id, "reasons": reasons})
+        return out
+
+    def records(self, sample: int = 100, row_offset: int = 0) -> dict:
+        return {
+            "rows": self.rejected,
+            "by_column": self.by_column(),
+            "sample": self.rejected_rows(sample, row_offset),
+        }
+
+
+def _plain(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class SchemaValidator:
+    """
+    Column specs compiled into whole-column array checks.
+
+    A category column is factorized once and its few distinct values are
+    looked up in the domain; a numeric column is one coercion plus two
+    comparisons. Reason strings are only built for the rejected rows a
+    caller asks for.
+    """
+
+    def __init__(self, specs: dict):
+        self.specs = dict(specs)
+        self._dtypes = {
+            col: pd.CategoricalDtype(spec.values) for col, spec in self.specs.items() if spec.kind == "category"
+        }
+
+    @staticmethod
+    def _check_category(series: pd.Series, dtype: pd.CategoricalDtype, aliases: dict):
+        if series.dtype == dtype:
+            return series.cat.codes.to_numpy() < 0, series
+        codes, uniques = pd.factorize(series)
+        if aliases:
+            uniques = [aliases.get(value, value) for value in uniques]
+        lookup = np.append(dtype.categories.get_indexer(uniques), -1)
+        codes = lookup[codes]
+        typed = pd.Series(pd.Categorical.from_codes(codes, dtype=dtype), index=series.index, name=series.name)
+        return codes < 0, typed
+
+    @staticmethod
+    def _check_numeric(series: pd.Series, spec: ColumnSpec):
+        not_number = None
+        if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+            values = series.to_numpy(dtype=float, na_value=np.nan)
+        else:
+            values = pd.to_numeric(series, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+            unparsed = np.flatnonzero(np.isnan(values))
+            if len(unparsed):
+                # NaN and blank text are missing values; any other text is invalid
+                raw = series.iloc[unparsed]
+                blank = raw.isna().to_numpy() | (raw.astype(str).str.strip() == "").to_numpy()
+                not_number = np.zeros(len(values), dtype=bool)
+                not_number[unparsed[~blank]] = True
+
+        bad = (values < spec.min) | (values > spec.max)
+        if not spec.nullable:
+            bad |= np.isnan(values)
+        if not_number is not None:
+            bad |= not_number
+        return bad, pd.Series(values, index=series.index, name=series.name)
+
+    def validate(self, df: pd.DataFrame) -> ValidationResult:
+        """
+        Check every specified column present in df
+        """
+        valid = np.ones(len(df), dtype=bool)
+        problems = {}
+        columns = {}
+        for col, spec in self.specs.items():
+            if col not in df.columns:
+                continue
+            if spec.kind == "category":
+                bad, columns[col] = self._check_category(df[col], self._dtypes[col], spec.aliases)
+            else:
+                bad, columns[col] = self._check_numeric(df[col], spec)
+            if bad.any():
+                problems[col] = bad
+                valid &= ~bad
+        return ValidationResult(df, self.specs, valid, problems, columns)
+
+    def check_record(self, record: dict) -> list:
+        """
+        Reasons a single customer record is invalid (empty when valid)
+        """
+        reasons = []
+        for col, spec in self.specs.items():
+            if col in record:
+                reason = spec.check(record[col])
+                if reason is not None:
+                    reasons.append(f"{col}: {reason}")
+        return reasons
+
+
+schema_validator = SchemaValidator(COLUMN_SPECS)
@@ -0,0 +1,320 @@
+import logging
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from src.utils.preprocessing import (
+    CATEGORY_DTYPES,
+    DEFAULT_VALUES,
+    NUMERIC_COLUMNS,
+    SERVICE_COLUMNS,
+    TENURE_BINS,
+    TENURE_GROUP_DTYPE,
+    TENURE_LABELS,
+    build_features,
+    to_number,
+)
+from src.utils.schema import CATEGORY_ALIASES, canonical_category
+
+logger = logging.getLogger(__name__)
+
+# Largest probability gap tolerated between the compiled and full pipelines
+PARITY_TOLERANCE = 1e-9
+
+
+# ------------------------
+# Scalar helpers (mirror build_features)
+# ------------------------
+def _tenure_group(tenure: float):
+    """
+    Scalar equivalent of the build_features tenure bucketing
+    """
+    if tenure > TENURE_BINS[-1]:
+        return TENURE_LABELS[-1]
+    if tenure < TENURE_BINS[0]:
+        return None
+    for upper, label in zip(TENURE_BINS[1:], TENURE_LABELS):
+        if tenure <= upper:
+            return label
+    return None
+
+
+# ------------------------
+# Reference scorer
+# ------------------------
+class PipelineScorer:
+    """
+    Scores payloads through the full DataFrame + sklearn pipeline
+    """
+
+    name = "pipeline"
+
+    def __init__(self, model):
+        self.model = model
+
+    def predict_many(self, payloads) -> np.ndarray:
+        df = build_features(pd.DataFrame(list(payloads)))
+        return self.model.predict_proba(df)[:, 1]
+
+    def predict_one(self, payload: dict) -> float:
+        return float(self.predict_many([payload])[0])
+
+
+# ------------------------
+# Compiled scorer
+# ------------------------
+class CompiledScorer:
+    """
+    Scores dict payloads without pandas.
+
+    The fitted StandardScaler statistics and OneHotEncoder categories are
+    read once from the pipeline, so a payload is written straight into a
+    NumPy feature vector laid out exactly like the ColumnTransformer output
+    and handed to the fitted classifier.
+    """
+
+    name = "compiled"
+
+    def __init__(self, model, tree_engine=None, engine_max_rows: int = 64):
+        preprocessor = model.named_steps.get("preprocessor")
+        if not isinstance(preprocessor, ColumnTransformer):
+            raise ValueError("Pipeline has no fitted ColumnTransformer 'preprocessor' step")
+
+        self.classifier = model.steps[-1][1]
+        # Array-backed tree ensemble (src/utils/tree_engine.py); it beats the
+        # sklearn estimator on small batches, so larger ones still use sklearn
+        self.tree_engine = tree_engine
+        self.engine_max_rows = engine_max_rows
+        if tree_engine is not None:
+            self.name = "compiled+trees"
+        self.n_features = int(sum(
+            s.stop - s.start for s in preprocessor.output_indices_.values()
+        ))
+
+        # (column, output index, mean, scale)
+        self.numeric_slots = []
+        # (column, {category: output index})
+        self.onehot_slots = []
+        self.onehot_span = []
+
+        for name, transformer, columns in preprocessor.transformers_:
+            if name == "remainder" and transformer == "drop":
+                continue
+            out = preprocessor.output_indices_[name]
+            if isinstance(transformer, StandardScaler):
+                mean = transformer.mean_ if transformer.with_mean else np.zeros(len(columns))
+                scale = transformer.scale_ if transformer.with_std else np.ones(len(columns))
+                for i, col in enumerate(columns):
+                    self.numeric_slots.append((col, out.start + i, float(mean[i]), float(scale[i])))
+            elif isinstance(transformer, OneHotEncoder):
+                if transformer.drop is not None or transformer.handle_unknown != "ignore":
+                    raise ValueError("Only OneHotEncoder(handle_unknown='ignore') without drop is supported")
+                if getattr(transformer, "_infrequent_enabled", False):
+                    raise ValueError("Infrequent category grouping is not supported")
+                position = out.start
+                for col, categories in zip(columns, transformer.categories_):
+                    index_map = {}
+                    for category in categories.tolist():
+                        index_map[category] = position
+                        position += 1
+                    self.onehot_slots.append((col, index_map))
+                self.onehot_span.append(slice(out.start, out.stop))
+            else:
+                raise ValueError(f"Unsupported transformer in preprocessor: {name}")
+
+        # (column, output index per category code) for frames
+        # coming out of build_features; None if a column has no fixed vocabulary
+        self.code_slots = []
+        for col, index_map in self.onehot_slots:
+            dtype = TENURE_GROUP_DTYPE if col == "tenure_group" else CATEGORY_DTYPES.get(col)
+            if dtype is None:
+                self.code_slots = None
+                break
+            # Unknown / missing values land in a scratch column past the end
+            lookup = [index_map.get(category, self.n_features) for category in dtype.categories.tolist()]
+            self.code_slots.append((col, np.array(lookup + [self.n_features])))
+
+        self._local = threading.local()
+
+    def _buffer(self) -> np.ndarray:
+        # One preallocated row per worker thread
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            buffer = np.zeros((1, self.n_features))
+            self._local.buffer = buffer
+        return buffer
+
+    def _fill(self, payload: dict, row: np.ndarray):
+        values = dict(DEFAULT_VALUES)
+        values.update(payload)
+
+        for col in NUMERIC_COLUMNS:
+            values[col] = to_number(values[col])
+        for col in CATEGORY_ALIASES:
+            values[col] = canonical_category(col, values.get(col))
+
+        tenure = values["tenure"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values["charge_per_tenure"] = float(np.float64(values["MonthlyCharges"]) / (tenure + 1))
+        values["num_services"] = sum(values.get(col) == "Yes" for col in SERVICE_COLUMNS)
+        values["tenure_group"] = _tenure_group(tenure)
+
+        for col, index, mean, scale in self.numeric_slots:
+            row[index] = (values[col] - mean) / scale
+
+        for span in self.onehot_span:
+            row[span] = 0.0
+        for col, index_map in self.onehot_slots:
+            try:
+                index = index_map.get(values.get(col))
+            except TypeError:
+                index = None
+            if index is not None:
+                row[index] = 1.0
+
+    def transform_many(self, payloads) -> np.ndarray:
+        payloads = list(payloads)
+        X = np.zeros((len(payloads), self.n_features))
+        for i, payload in enumerate(payloads):
+            self._fill(payload, X[i])
+        return X
+
+    def _predict_proba(self, X: np.ndarray) -> np.ndarray:
+        if self.tree_engine is not None and len(X) <= self.engine_max_rows:
+            return self.tree_engine.predict_proba(X)
+        return self.classifier.predict_proba(X)
+
+    def predict_many(self, payloads) -> np.ndarray:
+        return self._predict_proba(self.transform_many(payloads))[:, 1]
+
+    def transform_frame(self, features: pd.DataFrame) -> np.ndarray:
+        """
+        Vectorised preprocessor for a build_features frame: numeric columns
+        are scaled in place and one-hot positions come from category codes
+        """
+        if self.code_slots is None:
+            raise ValueError("Encoder categories have no fixed vocabulary")
+        n = len(features)
+        width = self.n_features + 1
+        X = np.zeros((n, width))
+        for col, index, mean, scale in self.numeric_slots:
+            X[:, index] = (features[col].to_numpy(dtype=float) - mean) / scale
+
+        flat = X.reshape(-1)
+        row_starts = np.arange(n) * width
+        for col, lookup in self.code_slots:
+            flat[row_starts + lookup[features[col].cat.codes.to_numpy()]] = 1.0
+        return X[:, :self.n_features]
+
+    def predict_frame(self, features: pd.DataFrame) -> np.ndarray:
+        return self._predict_proba(self.transform_frame(features))[:, 1]
+
+    def predict_one(self, payload: dict) -> float:
+        buffer = self._buffer()
+        self._fill(payload, buffer[0])
+        return float(self._predict_proba(buffer)[0, 1])
+
+    def probe_payloads(self, n: int = 24) -> list:
+        """
+        Synthetic payloads that cycle through every fitted category and
+        every tenure bucket edge, used for the parity check
+        """
+        tenures = [0, 1, 12, 12.5, 24, 36, 48, 60, 72, 80, -3, "bad"]
+        charges = [18.25, 55.5, 99.9, 118.75, "", " 70.35 "]
+        payloads = []
+        for i in range(n):
+            payload = {}
+            for col, index_map in self.onehot_slots:
+                categories = list(index_map)
+                if categories:
+                    payload[col] = categories[i % len(categories)]
+            payload["tenure"] = tenures[i % len(tenures)]
+            payload["MonthlyCharges"] = charges[i % len(charges)]
+            payload["TotalCharges"] = charges[(i + 2) % len(charges)]
+            payload.pop("tenure_group", None)
+            payloads.append(payload)
+        return payloads
+
+
+def check_parity(scorer, reference, payloads) -> float:
+    """
+    Return the largest probability gap between two scorers
+    """
+    fast = scorer.predict_many(payloads)
+    slow = reference.predict_many(payloads)
+    return float(np.max(np.abs(fast - slow))) if len(payloads) else 0.0
+
+
+_frame_scorers = weakref.WeakKeyDictionary()
+
+
+def frame_scorer(model):
+    """
+    CompiledScorer used for build_features frames, or None when the model
+    cannot be compiled or its encoding differs from the fitted preprocessor
+    """
+    try:
+        return _frame_scorers[model]
+    except (KeyError, TypeError):
+        pass
+
+    scorer = None
+    try:
+        candidate = CompiledScorer(model)
+        probe = build_features(pd.DataFrame(candidate.probe_payloads()))
+        reference = model.named_steps["preprocessor"].transform(probe)
+        if hasattr(reference, "toarray"):
+            reference = reference.toarray()
+        gap = float(np.max(np.abs(candidate.transform_frame(probe) - reference)))
+        if gap <= PARITY_TOLERANCE:
+            scorer = candidate
+        else:
+            logger.warning("Frame encoder parity check failed (max gap %.3g), using full pipeline", gap)
+    except Exception as e:
+        logger.warning("Frame encoder unavailable, using full pipeline: %s", e)
+
+    try:
+        _frame_scorers[model] = scorer
+    except TypeError:
+        pass
+    return scorer
+
+
+def build_scorer(model, compiled: bool = True, tree_engine=None, engine_max_rows: int = 64):
+    """
+    Build the scorer used by /predict, falling back to the full pipeline
+    whenever the compiled path is unsupported or fails the parity check.
+    A tree engine is only attached if it passes the same check.
+    """
+    reference = PipelineScorer(model)
+    if not compiled:
+        return reference
+
+    try:
+        scorer = CompiledScorer(model)
+        gap = check_parity(scorer, reference, scorer.probe_payloads())
+    except Exception as e:
+        logger.warning("Compiled scorer unavailable, using full pipeline: %s", e)
+        return reference
+
+    if gap > PARITY_TOLERANCE:
+        logger.warning("Compiled scorer parity check failed (max gap %.3g), using full pipeline", gap)
+        return reference
+    if tree_engine is None or engine_max_rows <= 0:
+        return scorer
+
+    try:
+        engine_scorer = CompiledScorer(model, tree_engine, engine_max_rows)
+        gap = check_parity(engine_scorer, reference, engine_scorer.probe_payloads(min(engine_max_rows, 64)))
+    except Exception as e:
+        logger.warning("Tree engine unavailable, using the sklearn estimator: %s", e)
+        return scorer
+
+    if gap > PARITY_TOLERANCE:
+        logger.warning("Tree engine parity check failed (max gap %.3g), using the sklearn estimator", gap)
+        return scorer
+    return engine_scorer
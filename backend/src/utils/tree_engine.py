@@ -0,0 +1,204 @@
+import numpy as np
+from sklearn.ensemble import ExtraTreesClassifier, GradientBoostingClassifier, RandomForestClassifier
+from sklearn.tree import DecisionTreeClassifier
+
+# ==================================================
+# ARRAY-BACKED TREE ENSEMBLES
+# ==================================================
+# Every tree of the ensemble is flattened into shared contiguous arrays:
+#
+#   feature    int32   split feature per node, -1 for leaves
+#   threshold  float32 split threshold (x <= threshold goes left)
+#   children   int32   (2, nodes) right / left child; leaves point to themselves
+#   value      float   per-node value: positive-class probability for forests,
+#                      regression output for gradient boosting. Internal nodes
+#                      are kept so paths can be explained later.
+#   roots      int32   first node of every tree
+#
+# sklearn casts inputs to float32 before comparing with float64 thresholds,
+# so thresholds are rounded *down* to float32: x32 <= t64 <=> x32 <= t32.
+# Traversal therefore stays exact; only float32 node values (optional) change
+# probabilities, by ~1e-7.
+
+FOREST_TYPES = (RandomForestClassifier, ExtraTreesClassifier)
+
+
+def supports(classifier) -> bool:
+    if not hasattr(classifier, "classes_") or list(classifier.classes_) != [0, 1]:
+        return False
+    if isinstance(classifier, GradientBoostingClassifier):
+        return classifier.init is None and classifier.n_trees_per_iteration_ == 1
+    return isinstance(classifier, FOREST_TYPES + (DecisionTreeClassifier,))
+
+
+def _round_down_float32(threshold: np.ndarray) -> np.ndarray:
+    rounded = threshold.astype(np.float32)
+    over = rounded.astype(np.float64) > threshold
+    rounded[over] = np.nextafter(rounded[over], np.float32(-np.inf))
+    return rounded
+
+
+def flatten_ensemble(classifier, float32: bool = False) -> dict:
+    """
+    Flat node arrays of a fitted binary tree classifier
+    """
+    if not supports(classifier):
+        raise ValueError(f"Unsupported classifier for tree export: {type(classifier).__name__}")
+
+    if isinstance(classifier, GradientBoostingClassifier):
+        kind = "gbdt"
+        trees = [estimator[0].tree_ for estimator in classifier.estimators_]
+        node_values = [tree.value[:, 0, 0] for tree in trees]
+        scale = classifier.learning_rate
+    else:
+        kind = "forest"
+        estimators = classifier.estimators_ if isinstance(classifier, FOREST_TYPES) else [classifier]
+        trees = [estimator.tree_ for estimator in estimators]
+        node_values = [tree.value[:, 0, 1] / tree.value[:, 0, :].sum(axis=1) for tree in trees]
+        scale = 1.0 / len(trees)
+
+    sizes = [tree.node_count for tree in trees]
+    roots = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int32)
+
+    feature, threshold, left, right = [], [], [], []
+    for tree, root in zip(trees, roots):
+        is_leaf = tree.children_left < 0
+        own = np.arange(tree.node_count)
+        feature.append(np.where(is_leaf, -1, tree.feature))
+        threshold.append(np.where(is_leaf, np.inf, tree.threshold))
+        left.append(np.where(is_leaf, own, tree.children_left) + root)
+        right.append(np.where(is_leaf, own, tree.children_right) + root)
+
+    value = np.concatenate(node_values).astype(np.float32 if float32 else np.float64)
+    arrays = {
+        "feature": np.concatenate(feature).astype(np.int32),
+        "threshold": _round_down_float32(np.concatenate(threshold)),
+        "children": np.stack([np.concatenate(right), np.concatenate(left)]).astype(np.int32),
+        "value": value,
+        "roots": roots,
+        "kind": np.array(kind),
+        "scale": np.array(scale, dtype=np.float64),
+        "base_score": np.array(0.0),
+        "n_features": np.array(classifier.n_features_in_),
+    }
+
+    engine = TreeEnsemble(arrays)
+    if kind == "gbdt":
+        # The default init estimator predicts one constant raw score
+        probe = np.zeros((1, classifier.n_features_in_))
+        arrays["base_score"] = np.array(float(classifier.decision_function(probe)[0]) - engine.raw_score(probe)[0])
+    return arrays
+
+
+def export_ensemble(classifier, path: str, float32: bool = False) -> str:
+    """
+    Flatten a fitted binary tree classifier into an .npz file
+    """
+    arrays = flatten_ensemble(classifier, float32)
+    with open(path, "wb") as f:
+        np.savez(f, **arrays)
+    return path
+
+
+class TreeEnsemble:
+    """
+    Vectorised batch traversal over every tree at once.
+
+    Rows x trees start at the tree roots; each step gathers the split
+    feature of every still-active (row, tree) pair, moves it to a child and
+    drops the pairs that reached a leaf.
+    """
+
+    def __init__(self, arrays):
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.children = arrays["children"]
+        self.value = arrays["value"]
+        self.roots = arrays["roots"]
+        self.kind = str(arrays["kind"])
+        self.scale = float(arrays["scale"])
+        self.base_score = float(arrays["base_score"])
+        self.n_features = int(arrays["n_features"])
+        self.is_leaf = self.feature < 0
+        self.classes_ = np.array([0, 1])
+
+    @classmethod
+    def load(cls, path: str) -> "TreeEnsemble":
+        with np.load(path) as data:
+            return cls({key: data[key] for key in data.files})
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def _descend(self, X, visit=None) -> np.ndarray:
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got shape {X.shape}")
+        n = len(X)
+        flat = X.reshape(-1)
+
+        node = np.tile(self.roots, n)
+        offset = np.repeat(np.arange(n, dtype=np.int64) * self.n_features, self.n_trees)
+        active = np.flatnonzero(~self.is_leaf[node])
+        while active.size:
+            current = node[active]
+            split = offset[active] + self.feature[current]
+            goes_left = flat[split] <= self.threshold[current]
+            nxt = self.children[goes_left.view(np.int8), current]
+            if visit is not None:
+                visit(split, current, nxt)
+            node[active] = nxt
+            active = active[~self.is_leaf[nxt]]
+        return node.reshape(n, self.n_trees)
+
+    def apply(self, X) -> np.ndarray:
+        """
+        Leaf node (global index) reached by every row in every tree
+        """
+        return self._descend(X)
+
+    def contributions(self, X):
+        """
+        Path attributions (Saabas): every split on a row's path credits the
+        change in node value to its split feature. Returns the bias and an
+        (n, n_features) matrix that add up to raw_score.
+        """
+        n = len(X)
+        totals = np.zeros(n * self.n_features)
+        value = self.value.astype(np.float64, copy=False)
+
+        def visit(split, current, nxt):
+            # split is the flat (row, feature) index of every moving pair
+            totals[:] += np.bincount(split, weights=value[nxt] - value[current], minlength=len(totals))
+
+        self._descend(X, visit)
+        return self.bias, totals.reshape(n, self.n_features) * self.scale
+
+    @property
+    def bias(self) -> float:
+        """
+        Raw score of an empty path: the root values of every tree
+        """
+        return float(self.value[self.roots].astype(np.float64).sum()) * self.scale + self.base_score
+
+    def raw_score(self, X) -> np.ndarray:
+        leaves = self.apply(X)
+        return self.value[leaves].astype(np.float64).sum(axis=1) * self.scale + self.base_score
+
+    def predict_proba(self, X) -> np.ndarray:
+        score = self.raw_score(X)
+        if self.kind == "gbdt":
+            positive = 1.0 / (1.0 + np.exp(-score))
+        else:
+            positive = score
+        return np.column_stack([1.0 - positive, positive])
+
+
+def check_exactness(engine: TreeEnsemble, classifier, X) -> float:
+    """
+    Largest positive-class probability gap between the engine and sklearn
+    """
+    if len(X) == 0:
+        return 0.0
+    return float(np.max(np.abs(engine.predict_proba(X)[:, 1] - classifier.predict_proba(X)[:, 1])))
@@ -0,0 +1,113 @@
+"""
+Shared fixtures: synthetic customers, small models fitted like
+train_models.py fits the real one, and the API bound to a temporary
+model registry, job directory, feature store and report cache.
+
+Run from backend/:  python -m pytest -q
+"""
+import importlib
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import pandas as pd
+import pytest
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from benchmarks.synthetic import SOURCE_PATH, generate_customers, load_source
+from src.train_models import NUM_COLS, publish_model
+from src.utils.preprocessing import build_features
+
+
+def fit_pipeline(df: pd.DataFrame, classifier) -> Pipeline:
+    """
+    Preprocessor + classifier fitted the way train_models.py does
+    """
+    y = df["Churn"].map({"Yes": 1, "No": 0})
+    X = build_features(df.drop(columns=["Churn", "customerID"], errors="ignore"))
+    cat_cols = [col for col in X.columns if col not in NUM_COLS]
+    preprocessor = ColumnTransformer(transformers=[
+        ("num", StandardScaler(), NUM_COLS),
+        ("cat", OneHotEncoder(handle_unknown="ignore"), cat_cols),
+    ])
+    return Pipeline(steps=[("preprocessor", preprocessor), ("classifier", classifier)]).fit(X, y)
+
+
+def transformed(model, df: pd.DataFrame):
+    """
+    Dense preprocessor output for raw customers
+    """
+    X = model.named_steps["preprocessor"].transform(build_features(df))
+    return X.toarray() if hasattr(X, "toarray") else X
+
+
+@pytest.fixture(scope="session")
+def source():
+    return load_source(os.path.join(BACKEND_DIR, SOURCE_PATH))
+
+
+@pytest.fixture(scope="session")
+def training_data(source):
+    return generate_customers(3_000, source, seed=1)
+
+
+@pytest.fixture(scope="session")
+def customers(source):
+    """
+    2,000 unlabelled customers, as a caller would upload them
+    """
+    return generate_customers(2_000, source, seed=2, with_churn=False)
+
+
+@pytest.fixture(scope="session")
+def gb_model(training_data):
+    return fit_pipeline(training_data, GradientBoostingClassifier(n_estimators=30, max_depth=3, random_state=0))
+
+
+@pytest.fixture(scope="session")
+def rf_model(training_data):
+    return fit_pipeline(training_data, RandomForestClassifier(n_estimators=15, max_depth=8, random_state=0))
+
+
+@pytest.fixture(scope="session")
+def lr_model(training_data):
+    return fit_pipeline(training_data, LogisticRegression(max_iter=1000))
+
+
+@pytest.fixture(scope="session")
+def api(tmp_path_factory, gb_model, customers):
+    """
+    src.api.main imported against a registry holding gb_model as v0001
+    """
+    root = tmp_path_factory.mktemp("api")
+    registry_dir = str(root / "registry")
+    publish_model(gb_model, gb_model.named_steps["classifier"], transformed(gb_model, customers.head(200)),
+                  {"model": "Gradient Boosting", "trained_by": "tests"}, registry_dir=registry_dir)
+
+    os.environ.update({
+        "CHURN_MODEL_REGISTRY": registry_dir,
+        "CHURN_JOB_DIR": str(root / "jobs"),
+        "CHURN_FEATURE_STORE": str(root / "feature_store.sqlite"),
+        "CHURN_REPORT_CACHE_DIR": str(root / "reports"),
+        "CHURN_PROFILE_DIR": str(root / "profiles"),
+        "CHURN_POOL_WORKERS": "1",
+        "CHURN_REPORT_WORKERS": "0",
+        # Tests swap versions explicitly rather than through the registry watcher
+        "CHURN_MODEL_POLL_SECONDS": "0",
+    })
+    main = importlib.import_module("src.api.main")
+    yield main
+    main.job_manager.shutdown()
+    main.report_renderer.shutdown()
+
+
+@pytest.fixture(scope="session")
+def client(api):
+    from fastapi.testclient import TestClient
+    return TestClient(api.app)
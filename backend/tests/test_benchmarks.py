@@ -0,0 +1,72 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from benchmarks import compare as bench_compare
+from benchmarks import run as bench_run
+from benchmarks.synthetic import COLUMN_ORDER, generate_customers, write_customers_csv
+from src.utils.schema import schema_validator
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_generator_is_reproducible(source):
+    first = generate_customers(500, source, seed=7)
+    pd.testing.assert_frame_equal(first, generate_customers(500, source, seed=7))
+    assert not first.equals(generate_customers(500, source, seed=8))
+
+    assert first.columns.tolist() == COLUMN_ORDER
+    assert first["customerID"].is_unique
+    # New customers have a blank TotalCharges, like the source file
+    assert (first.loc[first["tenure"] == 0, "TotalCharges"] == " ").all()
+
+
+def test_generated_customers_pass_the_schema(source):
+    df = generate_customers(2_000, source, seed=3, with_churn=False)
+    assert schema_validator.validate(df).rejected == 0
+
+
+def test_csv_is_written_in_chunks(tmp_path, monkeypatch):
+    monkeypatch.chdir(BACKEND_DIR)
+    path = write_customers_csv(str(tmp_path / "customers.csv"), 1_050, chunk_rows=400)
+    df = pd.read_csv(path)
+    assert len(df) == 1_050
+    assert df["customerID"].is_unique
+    assert "Churn" not in df.columns
+
+
+def test_run_writes_one_record_per_target(api, tmp_path, monkeypatch):
+    # api has pointed src.api.main at the test registry
+    monkeypatch.chdir(BACKEND_DIR)
+    monkeypatch.delenv("CHURN_CACHE_SIZE", raising=False)
+    output = str(tmp_path / "report.json")
+    targets = ["feature_engineering", "predict_batch_stream", "predict"]
+
+    report = bench_run.run([300], targets, repeat=2, predict_requests=5, seed=1,
+                           output=output, keep_cache=False)
+
+    with open(output) as f:
+        assert json.load(f) == report
+    assert {"commit", "timestamp", "seed", "repeat"} <= set(report["meta"])
+    by_target = {record["target"]: record for record in report["results"]}
+    assert set(by_target) == set(targets)
+    assert by_target["feature_engineering"]["rows"] == 300
+    assert by_target["feature_engineering"]["repeat"] == 2
+    assert by_target["predict"]["repeat"] == 5 and by_target["predict"]["p99_ms"] > 0
+    # Timed without the prediction cache unless --keep-cache
+    assert os.environ["CHURN_CACHE_SIZE"] == "0"
+
+
+def _report(path, best):
+    results = [{"target": target, "rows": 1000, "best_s": seconds} for target, seconds in best.items()]
+    path.write_text(json.dumps({"meta": {"commit": path.stem, "timestamp": "-"}, "results": results}))
+    return str(path)
+
+
+@pytest.mark.parametrize("new_best, expected", [(1.05, 0), (1.5, 1)])
+def test_compare_flags_regressions(tmp_path, new_best, expected):
+    base = _report(tmp_path / "base.json", {"predict_batch": 1.0, "feature_engineering": 2.0})
+    new = _report(tmp_path / "new.json", {"predict_batch": new_best, "feature_engineering": 1.0})
+    assert bench_compare.compare(base, new, threshold=0.10) == expected
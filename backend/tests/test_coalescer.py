@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+from src.utils.coalescer import PredictionCoalescer
+from src.utils.scorer import CompiledScorer
+
+
+def _submit_all(coalescer, payloads):
+    async def run():
+        return await asyncio.gather(*(coalescer.submit(payload) for payload in payloads), return_exceptions=True)
+    return asyncio.run(run())
+
+
+def test_each_caller_gets_its_own_result():
+    calls = []
+
+    def predict_many(payloads):
+        calls.append(len(payloads))
+        return [payload["x"] * 2 for payload in payloads]
+
+    coalescer = PredictionCoalescer(predict_many, max_batch_size=8, max_wait_ms=50)
+    results = _submit_all(coalescer, [{"x": i} for i in range(20)])
+
+    assert results == [2.0 * i for i in range(20)]
+    assert coalescer.requests == 20
+    assert coalescer.batches == len(calls) < 20
+    assert max(calls) <= 8
+    assert coalescer.stats()["max_batch_size_seen"] == max(calls)
+
+
+def test_failing_payload_does_not_fail_the_batch():
+    def predict_many(payloads):
+        if any(payload["x"] < 0 for payload in payloads):
+            raise ValueError("negative")
+        return [float(payload["x"]) for payload in payloads]
+
+    coalescer = PredictionCoalescer(predict_many, max_batch_size=16, max_wait_ms=50)
+    results = _submit_all(coalescer, [{"x": 1}, {"x": -1}, {"x": 3}])
+
+    assert results[0] == 1.0 and results[2] == 3.0
+    assert isinstance(results[1], ValueError)
+
+
+def test_coalesced_results_match_single_scoring(gb_model, customers):
+    scorer = CompiledScorer(gb_model)
+    payloads = customers.head(50).drop(columns=["customerID"]).to_dict(orient="records")
+    coalescer = PredictionCoalescer(scorer.predict_many, max_batch_size=16, max_wait_ms=20)
+
+    results = _submit_all(coalescer, payloads)
+    assert results == pytest.approx([scorer.predict_one(payload) for payload in payloads], abs=1e-12)
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from src.utils import batch_scoring
+from src.utils.batch_scoring import DedupStats, feature_groups, predict_feature_probabilities, predict_probabilities
+from src.utils.preprocessing import build_features
+
+
+@pytest.fixture(scope="module")
+def repeated(customers):
+    # 300 distinct customers, each uploaded about five times
+    return customers.head(300).sample(n=1_500, replace=True, random_state=0).reset_index(drop=True)
+
+
+def test_grouped_scores_match_row_by_row_scores(repeated, gb_model, lr_model):
+    features = build_features(repeated.drop(columns=["customerID"]))
+    for model in (gb_model, lr_model):
+        dedup = DedupStats()
+        probs = predict_feature_probabilities(features, model, dedup)
+        np.testing.assert_array_equal(probs, batch_scoring._predict_features(features, model))
+        assert dedup.grouped_batches == 1
+        assert dedup.scored_rows == repeated.drop(columns=["customerID"]).drop_duplicates().shape[0]
+
+
+def test_groups_are_exact(repeated):
+    df = repeated.drop(columns=["customerID"]).head(4).copy()
+    df = df.loc[[0, 0, 0, 0, 1]].reset_index(drop=True)
+    # Tiny numeric change, a blank TotalCharges (scored as 0) and an unknown category
+    df.loc[1, "MonthlyCharges"] += 1e-9
+    df["TotalCharges"] = df["TotalCharges"].astype(object)
+    df.loc[2, "TotalCharges"] = " "
+    df.loc[3, "Contract"] = "Lifetime"
+
+    groups = feature_groups(build_features(df))
+    assert len(set(groups)) == 5
+
+    same = build_features(df.loc[[0, 0, 4, 4]])
+    assert feature_groups(same).tolist() == [0, 0, 1, 1]
+
+
+def test_groups_match_pandas_duplicates(repeated):
+    features = build_features(repeated.drop(columns=["customerID"]))
+    groups = feature_groups(features)
+    reference = features.astype(str).groupby(list(features.columns), sort=False).ngroup().to_numpy()
+    np.testing.assert_array_equal(groups, reference)
+
+
+def test_distinct_or_small_batches_are_not_grouped(customers, gb_model):
+    dedup = DedupStats()
+    distinct = build_features(customers.drop(columns=["customerID"]).drop_duplicates())
+    predict_feature_probabilities(distinct, gb_model, dedup)
+    predict_feature_probabilities(distinct.head(batch_scoring.DEDUP_MIN_ROWS - 1), gb_model, dedup)
+    assert (dedup.grouped_batches, dedup.skipped_batches) == (0, 2)
+    assert dedup.records()["dedup_ratio"] == 0.0
+
+
+def test_dedup_stats_merge():
+    first, second = DedupStats(), DedupStats()
+    first.add(1_000, 250, grouped=True)
+    second.add(500, 500, grouped=False)
+    first.merge(second)
+    assert first.records() == {"rows": 1_500, "scored_rows": 750, "dedup_ratio": 0.5,
+                               "grouped_batches": 1, "skipped_batches": 1}
+    assert DedupStats().records()["dedup_ratio"] == 0.0
+
+
+def test_batch_response_matches_the_model(api, client, repeated):
+    upload = repeated.to_csv(index=False).encode()
+    body = client.post("/predict-batch", files={"file": ("customers.csv", upload, "text/csv")}).json()
+    # Only prediction cache misses reach the model, each distinct vector once
+    assert body["dedup"]["scored_rows"] <= body["dedup"]["rows"] <= len(repeated)
+    probs = [row["churn_probability"] for row in body["all_predictions"]]
+    np.testing.assert_array_equal(probs, predict_probabilities(repeated, api.model_server.current.model))
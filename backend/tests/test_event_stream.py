@@ -0,0 +1,131 @@
+import json
+
+import pytest
+
+from src.utils.batch_scoring import predict_probabilities
+from src.utils.event_stream import FileTailSource, QueueSource, StreamScorer
+from src.utils.schema import REQUIRED_COLUMNS
+
+
+def by_charges(frame):
+    # A stand-in model: the risk segment follows MonthlyCharges
+    return frame["MonthlyCharges"].astype(float).to_numpy() / 130.0
+
+
+@pytest.fixture
+def snapshot(customers):
+    return customers.head(50).assign(MonthlyCharges=20.0).reset_index(drop=True)
+
+
+@pytest.fixture
+def worker(snapshot):
+    alerts, errors = [], []
+    worker = StreamScorer(QueueSource(), by_charges, alerts.append, error_sink=errors.append)
+    worker.load_snapshot(snapshot)
+    worker.alerts_seen, worker.errors_seen = alerts, errors
+    return worker
+
+
+def test_snapshot_is_a_baseline(worker, snapshot):
+    assert len(worker.probabilities) == len(snapshot)
+    assert worker.alerts_seen == [] and worker.stats()["rescored"] == len(snapshot)
+
+
+def test_invalid_snapshot_rows_are_skipped(snapshot):
+    snapshot.loc[3, "Contract"] = "Lifetime"
+    worker = StreamScorer(QueueSource(), by_charges, lambda alert: None)
+    worker.load_snapshot(snapshot)
+    assert snapshot.loc[3, "customerID"] not in worker.rows
+    assert len(worker.rows) == len(snapshot) - 1
+
+
+def test_crossing_a_segment_alerts(worker, snapshot):
+    cid = snapshot.loc[0, "customerID"]
+    worker.process([{"customerID": cid, "MonthlyCharges": 30.0}])
+    assert worker.alerts_seen == []
+
+    worker.process([{"customerID": cid, "MonthlyCharges": 110.0, "event_time": 1.0}])
+    (alert,) = worker.alerts_seen
+    assert (alert["customerID"], alert["previous_segment"], alert["risk_segment"], alert["direction"]) == (
+        cid, "Low Risk", "High Risk", "up")
+    assert alert["event_time"] == 1.0
+
+
+def test_a_batch_rescores_each_customer_once(worker, snapshot):
+    cid = snapshot.loc[1, "customerID"]
+    rescored = worker.rescored
+    worker.process([{"customerID": cid, "MonthlyCharges": 100.0}, {"customerID": cid, "MonthlyCharges": 25.0}])
+    assert worker.rescored == rescored + 1
+    assert worker.probabilities[cid] == pytest.approx(25.0 / 130.0)
+    assert worker.alerts_seen == []
+
+
+def test_new_customers_wait_for_every_column(worker, snapshot):
+    partial = {col: snapshot.loc[2, col] for col in REQUIRED_COLUMNS[:5]}
+    worker.process([dict(partial, customerID="NEW-1")])
+    assert "NEW-1" not in worker.probabilities and worker.stats()["incomplete_rows"] == 1
+
+    rest = {col: snapshot.loc[2, col] for col in REQUIRED_COLUMNS[5:]}
+    worker.process([dict(rest, customerID="NEW-1")])
+    assert worker.probabilities["NEW-1"] == worker.probabilities[snapshot.loc[2, "customerID"]]
+
+
+def test_invalid_events_are_rejected_whole(worker, snapshot):
+    cid = snapshot.loc[0, "customerID"]
+    before = dict(worker.rows[cid])
+    worker.process([{"customerID": cid, "MonthlyCharges": 110.0, "tenure": -4}, "not an event"])
+
+    assert worker.rows[cid] == before
+    assert worker.stats()["invalid_events"] == 2
+    assert [error["type"] for error in worker.errors_seen] == ["invalid_event", "invalid_event"]
+    assert "tenure" in worker.errors_seen[0]["error"]
+
+
+def test_failed_batches_are_retried_one_event_at_a_time(snapshot):
+    def predict(frame):
+        if (frame["MonthlyCharges"] == 77.7).any():
+            raise ValueError("cannot score")
+        return by_charges(frame)
+
+    errors = []
+    worker = StreamScorer(QueueSource(), predict, lambda alert: None, error_sink=errors.append)
+    worker.load_snapshot(snapshot)
+    # A valid event the model cannot score
+    good, bad = snapshot.loc[0, "customerID"], snapshot.loc[1, "customerID"]
+    worker.source.put({"customerID": bad, "MonthlyCharges": 77.7})
+    worker.source.put({"customerID": good, "MonthlyCharges": 60.0})
+    worker.run(max_events=2)
+
+    assert worker.probabilities[good] == pytest.approx(60.0 / 130.0)
+    assert worker.rows[bad]["MonthlyCharges"] == 20.0
+    assert (worker.failed_batches, worker.failed_events, worker.events) == (1, 1, 1)
+    assert errors[0]["type"] == "scoring_error" and errors[0]["event"]["customerID"] == bad
+
+
+def test_scores_match_the_batch_path(gb_model, snapshot):
+    worker = StreamScorer(QueueSource(), lambda frame: predict_probabilities(frame, gb_model), lambda alert: None)
+    worker.load_snapshot(snapshot)
+    cid = snapshot.loc[4, "customerID"]
+    worker.process([{"customerID": cid, "Contract": "Two year", "tenure": 60}])
+
+    updated = snapshot.loc[[4]].assign(Contract="Two year", tenure=60)
+    assert worker.probabilities[cid] == predict_probabilities(updated, gb_model)[0]
+
+
+def test_file_tail_source(tmp_path):
+    path = tmp_path / "events.jsonl"
+    path.write_text(json.dumps({"customerID": "old"}) + "\n")
+    source = FileTailSource(str(path), poll_interval=0.01)
+    try:
+        with open(path, "a") as f:
+            f.write("not json\n" + json.dumps({"tenure": 1}) + "\n" + json.dumps({"customerID": "A"}) + "\n")
+            f.write('{"customerID": "B"')
+        assert [event["customerID"] for event in source.poll(10, 0.05)] == ["A"]
+
+        with open(path, "a") as f:
+            f.write("}\n")
+        (event,) = source.poll(10, 0.05)
+        assert event["customerID"] == "B" and "_received_at" in event
+        assert source.poll(10, 0.02) == []
+    finally:
+        source.close()
@@ -0,0 +1,117 @@
+import sqlite3
+import threading
+
+import numpy as np
+import pytest
+from sklearn.neighbors import KNeighborsClassifier
+
+from conftest import fit_pipeline
+from src.utils.explain import Explainer, explainer_for
+from src.utils.jobs import JobManager
+from src.utils.preprocessing import build_features
+from src.utils.schema import REQUIRED_COLUMNS
+from test_jobs import _csv, wait_for
+
+
+@pytest.fixture(scope="module")
+def frame(customers):
+    return customers.head(300).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("model_name, units", [("gb_model", "log_odds"), ("lr_model", "log_odds"),
+                                                ("rf_model", "probability")])
+def test_contributions_add_up_to_the_model_output(request, frame, model_name, units):
+    model = request.getfixturevalue(model_name)
+    explainer = Explainer(model)
+    assert explainer.units == units
+
+    bias, contributions = explainer.explain_frame(frame)
+    assert contributions.columns.tolist() == REQUIRED_COLUMNS
+    total = bias + contributions.sum(axis=1).to_numpy()
+    features = build_features(frame)
+    if units == "log_odds":
+        expected = model.decision_function(features)
+    else:
+        expected = model.predict_proba(features)[:, 1]
+    np.testing.assert_allclose(total, expected, rtol=0, atol=1e-9)
+
+
+def test_top_drivers_are_the_largest_contributions(gb_model, frame):
+    explainer = explainer_for(gb_model)
+    assert explainer_for(gb_model) is explainer
+
+    _, contributions = explainer.explain_frame(frame.head(20))
+    drivers = explainer.top_drivers(frame.head(20), top_k=3)
+    for row, items in zip(contributions.itertuples(index=False), drivers):
+        magnitudes = sorted(np.abs(row), reverse=True)[:3]
+        assert [abs(item["contribution"]) for item in items] == magnitudes
+    assert drivers[0][0]["value"] == frame.loc[0, drivers[0][0]["feature"]]
+    assert len(explainer.top_drivers(frame.head(1), top_k=100)[0]) == len(REQUIRED_COLUMNS)
+
+
+def test_unsupported_classifier(training_data):
+    with pytest.raises(ValueError):
+        Explainer(fit_pipeline(training_data.head(300), KNeighborsClassifier()))
+
+
+def test_explain_endpoint(api, client, frame):
+    payload = frame.drop(columns=["customerID"]).iloc[0].to_dict()
+    body = client.post("/explain", params={"top_k": 4}, json=payload).json()
+    assert (body["method"], body["units"]) == ("tree_path", "log_odds")
+    assert len(body["top_drivers"]) == 4
+    log_odds = body["base_value"] + sum(body["contributions"].values())
+    assert 1 / (1 + np.exp(-log_odds)) == pytest.approx(body["churn_probability"], abs=1e-9)
+
+    assert "missing_columns" in client.post("/explain", json={"tenure": 3}).json()
+
+
+@pytest.fixture
+def completed_job(api, tmp_path, customers):
+    jobs = JobManager(str(tmp_path / "jobs"), api.score_job_chunk, max_workers=1, chunk_size=300)
+    job_id = jobs.submit(_csv(customers.head(1_000)), "csv")["job_id"]
+    wait_for(jobs, job_id)
+    yield jobs, job_id
+    jobs.shutdown()
+
+
+def test_explanations_cover_only_the_requested_page(completed_job, gb_model):
+    jobs, job_id = completed_job
+    explainer = explainer_for(gb_model)
+    explain = lambda frame: explainer.top_drivers(frame, len(REQUIRED_COLUMNS))  # noqa: E731
+
+    first = jobs.explanations(job_id, explain, "model-a", risk_segment=None, top_k=3, limit=20)
+    assert first["computed"] == 20 and first["total"] == 1_000
+    assert all(len(item["drivers"]) == 3 for item in first["items"])
+    with sqlite3.connect(jobs.results_path(job_id)) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM explanations").fetchone()[0] == 20
+
+    again = jobs.explanations(job_id, explain, "model-a", risk_segment=None, top_k=5, limit=20)
+    assert again["computed"] == 0
+    assert [item["drivers"][:3] for item in again["items"]] == [item["drivers"] for item in first["items"]]
+
+    # Another model explains the page again
+    assert jobs.explanations(job_id, explain, "model-b", risk_segment=None, limit=20)["computed"] == 20
+
+
+def test_concurrent_requests_explain_a_page_once(completed_job, gb_model):
+    jobs, job_id = completed_job
+    explainer = explainer_for(gb_model)
+    explained = []
+
+    def explain(frame):
+        explained.append(len(frame))
+        return explainer.top_drivers(frame, len(REQUIRED_COLUMNS))
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(jobs.explanations(job_id, explain, "model-a", limit=50)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(explained) == min(50, results[0]["total"])
+    assert sorted(result["computed"] for result in results)[:-1] == [0, 0, 0]
+    assert all(result["items"] == results[0]["items"] for result in results)
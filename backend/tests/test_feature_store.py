@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.batch_scoring import predict_feature_probabilities, predict_probabilities
+from src.utils.feature_store import FeatureStore
+from src.utils.schema import REQUIRED_COLUMNS
+
+
+@pytest.fixture
+def rows(customers):
+    return customers.head(200).reset_index(drop=True)
+
+
+@pytest.fixture
+def store(tmp_path, rows):
+    store = FeatureStore(str(tmp_path / "features.sqlite"))
+    store.upsert(rows)
+    return store
+
+
+def _scorer(model, calls):
+    def predict(features):
+        calls.append(len(features))
+        return predict_feature_probabilities(features, model)
+    return predict
+
+
+def test_upsert_and_lookup(store, rows):
+    assert store.count() == 200 and store.inserted == 200
+    ids = [rows.loc[5, "customerID"], "UNKNOWN", rows.loc[1, "customerID"]]
+    frame = store.lookup(ids)
+    assert frame["customerID"].tolist() == [ids[0], ids[2]]
+    assert frame["tenure"].tolist() == rows.loc[[5, 1], "tenure"].astype(float).tolist()
+    assert (frame["revision"] == 1).all() and frame["churn_probability"].isna().all()
+
+
+def test_scores_match_the_batch_path_and_are_reused(store, rows, gb_model):
+    calls = []
+    ids = rows["customerID"].tolist()
+    scored = store.score(ids, _scorer(gb_model, calls), "model-a")
+    np.testing.assert_array_equal(scored["churn_probability"].to_numpy(), predict_probabilities(rows, gb_model))
+
+    again = store.score(ids, _scorer(gb_model, calls), "model-a")
+    assert calls == [200]
+    np.testing.assert_array_equal(again["churn_probability"].to_numpy(), scored["churn_probability"].to_numpy())
+
+    # Another model re-scores everything
+    store.score(ids[:10], _scorer(gb_model, calls), "model-b")
+    assert calls == [200, 10]
+    assert (store.score_hits, store.score_misses) == (200, 210)
+
+
+def test_partial_updates_keep_other_columns(store, rows, gb_model):
+    cid = rows.loc[0, "customerID"]
+    other = rows.loc[1, "customerID"]
+    store.score([cid, other], _scorer(gb_model, []), "model-a")
+
+    counts = store.upsert(rows.loc[[0, 1], ["customerID"]].assign(Contract=["Two year", rows.loc[1, "Contract"]]))
+    assert (counts["updated"], counts["unchanged"]) == (1, 1)
+
+    updated, kept = store.lookup([cid, other]).itertuples(index=False)
+    assert (updated.Contract, updated.tenure, updated.revision) == ("Two year", float(rows.loc[0, "tenure"]), 2)
+    assert np.isnan(updated.churn_probability) and kept.churn_probability == kept.churn_probability
+
+    calls = []
+    rescored = store.score([cid], _scorer(gb_model, calls), "model-a")
+    assert calls == [1]
+    assert rescored["churn_probability"].iloc[0] == predict_probabilities(rows.loc[[0]].assign(Contract="Two year"), gb_model)[0]
+
+
+def test_renames_keep_the_score(store, rows, gb_model):
+    cid = rows.loc[2, "customerID"]
+    store.score([cid], _scorer(gb_model, []), "model-a")
+    counts = store.upsert(rows.loc[[2]].assign(customerName="Renamed"))
+    assert counts["unchanged"] == 1
+
+    row = store.lookup([cid]).iloc[0]
+    assert row["customerName"] == "Renamed" and row["revision"] == 1
+    assert not np.isnan(row["churn_probability"])
+
+
+def test_rejected_rows_are_not_stored(store, rows):
+    cid = rows.loc[3, "customerID"]
+    before = store.lookup([cid])
+
+    # A new customer without every column, and an update to an invalid tenure
+    counts = store.upsert(pd.DataFrame({"customerID": ["NEW-1", cid], "tenure": [3, -1]}))
+    assert counts["rejected_ids"] == ["NEW-1", cid]
+    assert counts["invalid"] == 1
+    (invalid,) = counts["invalid_rows"]
+    assert invalid["customerID"] == cid and invalid["reasons"][0].startswith("tenure")
+
+    assert store.lookup(["NEW-1"]).empty
+    assert store.lookup([cid]).equals(before)
+
+
+def test_customer_endpoints(api, client, rows):
+    upload = rows.head(20).to_csv(index=False).encode()
+    counts = client.post("/customers", files={"file": ("customers.csv", upload, "text/csv")}).json()
+    assert counts["inserted"] + counts["unchanged"] + counts["updated"] == 20
+
+    cid = rows.loc[0, "customerID"]
+    assert client.patch("/customers", json=[{"customerID": cid, "tenure": 70}]).json()["updated"] == 1
+    assert client.get(f"/customers/{cid}").json()["tenure"] == 70.0
+    assert client.get("/customers/NOPE").status_code == 404
+
+    body = client.post("/customers/score", json={"customer_ids": [cid, "NOPE"]}).json()
+    assert body["missing_ids"] == ["NOPE"]
+    (prediction,) = body["predictions"]
+    served = api.model_server.current.model
+    assert prediction["churn_probability"] == predict_probabilities(rows.loc[[0]].assign(tenure=70), served)[0]
+    assert set(REQUIRED_COLUMNS) <= set(client.get(f"/customers/{cid}").json())
@@ -0,0 +1,76 @@
+import io
+import json
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc
+import pyarrow.parquet
+import pytest
+
+from src.utils.file_io import count_rows, detect_format, iter_upload_frames, read_upload
+
+
+def _write(df: pd.DataFrame, path: str, fmt: str):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if fmt == "parquet":
+        pa.parquet.write_table(table, path, row_group_size=150)
+    elif fmt == "arrow":
+        with pa.ipc.new_file(path, table.schema) as writer:
+            writer.write_table(table)
+    elif fmt == "arrows":
+        with pa.ipc.new_stream(path, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        df.to_csv(path, index=False)
+
+
+@pytest.fixture
+def upload(customers):
+    return customers.head(400)
+
+
+def test_detect_format():
+    assert detect_format("data.PARQUET") == "parquet"
+    assert detect_format("data.feather") == "arrow"
+    assert detect_format("upload", "text/csv; charset=utf-8") == "csv"
+    assert detect_format("upload", "application/vnd.apache.arrow.stream") == "arrow"
+    assert detect_format("upload.xlsx") == detect_format("upload") == "excel"
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet", "arrow", "arrows"])
+def test_readers_agree(tmp_path, upload, fmt):
+    path = str(tmp_path / f"customers.{fmt}")
+    _write(upload, path, fmt)
+    reader_format = "arrow" if fmt == "arrows" else fmt
+
+    whole = read_upload(path, reader_format)
+    chunks = list(iter_upload_frames(path, reader_format, 128))
+    assert [len(chunk) for chunk in chunks] == [128, 128, 128, 16]
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), whole)
+    assert whole["customerID"].tolist() == upload["customerID"].tolist()
+    assert whole["MonthlyCharges"].tolist() == upload["MonthlyCharges"].tolist()
+
+    with open(path, "rb") as f:
+        pd.testing.assert_frame_equal(read_upload(f, reader_format), whole)
+
+    # Arrow streams have no footer to count rows from
+    assert count_rows(path, reader_format) == (None if fmt == "arrows" else len(upload))
+
+
+def test_columnar_upload_and_response_match_json(client, upload):
+    sink = io.BytesIO()
+    pa.parquet.write_table(pa.Table.from_pandas(upload, preserve_index=False), sink)
+    files = {"file": ("customers.parquet", sink.getvalue(), "application/octet-stream")}
+
+    response = client.post("/predict-batch?response_format=arrow", files=files)
+    assert response.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    table = pa.ipc.open_stream(response.content).read_all()
+    expected = client.post("/predict-batch", files=files).json()
+
+    assert pa.types.is_dictionary(table.schema.field("risk_segment").type)
+    assert json.loads(table.schema.metadata[b"summary"]) == expected["summary"]
+    columnar = table.to_pandas()
+    rows = pd.DataFrame(expected["all_predictions"])
+    assert columnar["customerID"].tolist() == rows["customerID"].tolist()
+    assert columnar["churn_probability"].tolist() == rows["churn_probability"].tolist()
+    assert columnar["risk_segment"].astype(str).tolist() == rows["risk_segment"].tolist()
@@ -0,0 +1,128 @@
+import io
+import json
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from src.utils.jobs import JobManager, JobNotFound
+
+
+def wait_for(jobs: JobManager, job_id: str, timeout: float = 60.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        state = jobs.status(job_id)
+        if state["status"] in ("completed", "failed"):
+            return state
+        time.sleep(0.05)
+    raise TimeoutError(f"Job {job_id} still {state['status']}")
+
+
+def _csv(df: pd.DataFrame) -> io.BytesIO:
+    return io.BytesIO(df.to_csv(index=False).encode())
+
+
+@pytest.fixture
+def jobs(api, tmp_path):
+    # Scored like /jobs, in small chunks so progress and offsets are exercised
+    jobs = JobManager(str(tmp_path / "jobs"), api.score_job_chunk, max_workers=1, chunk_size=300)
+    yield jobs
+    jobs.shutdown()
+
+
+@pytest.fixture
+def upload(customers):
+    upload = customers.head(1_000).copy()
+    upload["tenure"] = upload["tenure"].astype(object)
+    upload.loc[[10, 650], "tenure"] = "unknown"
+    return upload
+
+
+def test_job_lifecycle(jobs, upload):
+    submitted = jobs.submit(_csv(upload), "csv", "customers.csv")
+    assert submitted["status"] == "queued"
+
+    state = wait_for(jobs, submitted["job_id"])
+    assert state["status"] == "completed"
+    assert state["progress"] == 1.0
+    assert (state["total_rows"], state["scored_rows"], state["rejected_rows"]) == (1_000, 998, 2)
+    assert sum(segment["customers"] for segment in state["summary"]) == 998
+    # The input file is removed once scored
+    assert "input.csv" not in os.listdir(os.path.dirname(jobs.results_path(submitted["job_id"])))
+
+    stored = jobs.results_frame(submitted["job_id"])
+    assert stored["row_id"].tolist() == [i for i in range(1_000) if i not in (10, 650)]
+
+
+def test_results_are_paginated_and_sorted(jobs, upload):
+    job_id = jobs.submit(_csv(upload), "csv")["job_id"]
+    wait_for(jobs, job_id)
+
+    first = jobs.results(job_id, limit=50)
+    second = jobs.results(job_id, limit=50, offset=50)
+    revenue = [item["revenue_at_risk"] for item in first["items"] + second["items"]]
+    assert first["total"] == 998
+    assert revenue == sorted(revenue, reverse=True)
+    assert not {item["row_id"] for item in first["items"]} & {item["row_id"] for item in second["items"]}
+
+    high = jobs.results(job_id, risk_segment="High Risk", sort_by="churn_probability", order="asc", limit=10_000)
+    assert {item["risk_segment"] for item in high["items"]} <= {"High Risk"}
+    assert high["total"] == next(s["customers"] for s in jobs.status(job_id)["summary"] if s["risk_segment"] == "High Risk")
+
+    with pytest.raises(ValueError):
+        jobs.results(job_id, sort_by="customerName; DROP TABLE predictions")
+
+
+def test_rejections_keep_upload_positions(jobs, upload):
+    job_id = jobs.submit(_csv(upload), "csv")["job_id"]
+    wait_for(jobs, job_id)
+
+    rejections = jobs.rejections(job_id)
+    assert rejections["total"] == 2
+    assert rejections["by_column"] == {"tenure": 2}
+    assert [item["row_id"] for item in rejections["items"]] == [10, 650]
+    assert rejections["items"][1]["customerID"] == upload["customerID"].iloc[650]
+
+
+def test_job_with_missing_columns_fails(jobs, upload):
+    job_id = jobs.submit(_csv(upload.drop(columns=["Contract"])), "csv")["job_id"]
+    state = wait_for(jobs, job_id)
+    assert state["status"] == "failed"
+    assert "Contract" in state["error"]
+
+
+def test_interrupted_jobs_are_marked_failed(api, tmp_path):
+    job_dir = tmp_path / "jobs" / "abc123"
+    job_dir.mkdir(parents=True)
+    (job_dir / "job.json").write_text(json.dumps({"job_id": "abc123", "status": "running", "error": None}))
+
+    jobs = JobManager(str(tmp_path / "jobs"), api.score_job_chunk)
+    try:
+        state = jobs.status("abc123")
+        assert state["status"] == "failed"
+        assert "restart" in state["error"]
+    finally:
+        jobs.shutdown()
+
+
+def test_unknown_jobs(jobs, client):
+    with pytest.raises(JobNotFound):
+        jobs.status("0123abcd")
+    with pytest.raises(JobNotFound):
+        jobs.results_path("../../etc")
+    assert client.get("/jobs/0123abcd").status_code == 404
+
+
+def test_job_api_round_trip(client, upload):
+    job_id = client.post("/jobs", files={"file": ("customers.csv", _csv(upload).getvalue(), "text/csv")}).json()["job_id"]
+    deadline = time.monotonic() + 60
+    while client.get(f"/jobs/{job_id}").json()["status"] not in ("completed", "failed"):
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+    summary = client.get(f"/jobs/{job_id}/summary").json()
+    assert (summary["rows"], summary["rejected_rows"]) == (1_000, 2)
+    page = client.get(f"/jobs/{job_id}/results", params={"limit": 5, "include_features": True}).json()
+    assert len(page["items"]) == 5 and "MonthlyCharges" in page["items"][0]
+
@@ -0,0 +1,108 @@
+import os
+import re
+import time
+
+import pytest
+
+from src.utils.metrics import Metrics, SlowRequestProfiler
+
+
+def _value(text: str, sample: str) -> float:
+    match = re.search(rf"^{re.escape(sample)} (\S+)$", text, re.MULTILINE)
+    assert match, f"{sample} not in metrics"
+    return float(match.group(1))
+
+
+def test_requests_and_their_stages():
+    metrics = Metrics()
+    metrics.describe("churn_request_seconds", "Handler latency")
+    with metrics.request("predict") as request:
+        with request.span("validate"):
+            pass
+        with metrics.span("predict_proba", rows=3):
+            pass
+        request.rows = 3
+    with metrics.span("predict_proba", rows=10):
+        pass
+
+    text = metrics.render()
+    assert _value(text, 'churn_requests_total{endpoint="predict",outcome="ok"}') == 1
+    assert _value(text, 'churn_rows_total{endpoint="predict"}') == 3
+    # Stages outside a request are labelled endpoint="none"
+    assert _value(text, 'churn_stage_rows_total{endpoint="predict",stage="predict_proba"}') == 3
+    assert _value(text, 'churn_stage_rows_total{endpoint="none",stage="predict_proba"}') == 10
+    assert _value(text, 'churn_stage_seconds_count{endpoint="predict",stage="validate"}') == 1
+    assert text.count("# HELP churn_request_seconds Handler latency") == 1
+    assert text.count("# TYPE churn_stage_seconds histogram") == 1
+
+
+def test_histogram_buckets_are_cumulative():
+    metrics = Metrics()
+    for seconds in (0.0002, 0.003, 0.003, 120.0):
+        metrics.observe("churn_stage_seconds", seconds, stage="x")
+    text = metrics.render()
+    assert _value(text, 'churn_stage_seconds_bucket{stage="x",le="0.0005"}') == 1
+    assert _value(text, 'churn_stage_seconds_bucket{stage="x",le="0.005"}') == 3
+    assert _value(text, 'churn_stage_seconds_bucket{stage="x",le="60"}') == 3
+    assert _value(text, 'churn_stage_seconds_bucket{stage="x",le="+Inf"}') == 4
+    assert _value(text, 'churn_stage_seconds_sum{stage="x"}') == pytest.approx(120.0062)
+
+
+def test_errors_are_counted():
+    metrics = Metrics()
+    with metrics.request("predict") as request:
+        request.error(ValueError("bad input"))
+    with pytest.raises(KeyError):
+        with metrics.request("predict"):
+            raise KeyError("boom")
+
+    text = metrics.render()
+    assert _value(text, 'churn_requests_total{endpoint="predict",outcome="error"}') == 2
+    assert _value(text, 'churn_errors_total{endpoint="predict",type="ValueError"}') == 1
+    assert _value(text, 'churn_errors_total{endpoint="predict",type="KeyError"}') == 1
+
+
+def test_collectors_and_label_escaping():
+    metrics = Metrics()
+    metrics.register_collector(lambda: [("churn_cache_entries", "gauge", 7, {"path": 'a"b\\c'})])
+
+    def broken():
+        raise RuntimeError("unavailable")
+        yield
+
+    metrics.register_collector(broken)
+    text = metrics.render()
+    assert '# TYPE churn_cache_entries gauge' in text
+    assert _value(text, 'churn_cache_entries{path="a\\"b\\\\c"}') == 7
+
+
+def test_slow_requests_are_profiled(tmp_path):
+    metrics = Metrics()
+    metrics.profiler = SlowRequestProfiler(metrics, threshold_seconds=0.05, out_dir=str(tmp_path), interval=0.002)
+
+    def busy_handler():
+        deadline = time.perf_counter() + 0.15
+        while time.perf_counter() < deadline:
+            pass
+
+    with metrics.request("fast"):
+        pass
+    with metrics.request("slow"):
+        busy_handler()
+
+    (name,) = os.listdir(tmp_path)
+    assert name.startswith("slow-") and name.endswith(".collapsed")
+    with open(tmp_path / name) as f:
+        assert "busy_handler" in f.read()
+    assert _value(metrics.render(), 'churn_profiles_written_total{endpoint="slow"}') == 1
+
+
+def test_metrics_endpoint(client, customers):
+    payload = customers.drop(columns=["customerID"]).iloc[7].to_dict()
+    client.post("/predict", json=payload)
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert _value(text, 'churn_requests_total{endpoint="predict",outcome="ok"}') >= 1
+    assert 'churn_stage_seconds_count{endpoint="predict",stage="validate"}' in text
+    assert "churn_cache_entries " in text and "churn_model_ready{" in text
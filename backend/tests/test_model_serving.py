@@ -0,0 +1,150 @@
+import os
+import time
+
+import pytest
+
+from conftest import transformed
+from src.train_models import publish_model
+from src.utils.model_registry import ModelRegistry, VersionNotFound
+from src.utils.model_serving import LEGACY_VERSION, ModelServer
+from src.utils.scorer import PipelineScorer
+
+# src.api.main.WARMUP_PAYLOAD; importing the API here would load it before
+# the api fixture points it at the test registry
+PAYLOAD = {
+    "gender": "Female", "SeniorCitizen": 0, "Partner": "Yes", "Dependents": "No",
+    "tenure": 12, "PhoneService": "Yes", "MultipleLines": "No",
+    "InternetService": "Fiber optic", "OnlineSecurity": "No", "OnlineBackup": "Yes",
+    "DeviceProtection": "No", "TechSupport": "No", "StreamingTV": "Yes",
+    "StreamingMovies": "No", "Contract": "Month-to-month", "PaperlessBilling": "Yes",
+    "PaymentMethod": "Electronic check", "MonthlyCharges": 79.85, "TotalCharges": 958.2
+}
+
+
+def _publish(model, customers, registry_dir, promote=True):
+    classifier = model.named_steps["classifier"]
+    return publish_model(model, classifier, transformed(model, customers.head(200)),
+                         {"model": type(classifier).__name__}, promote=promote, registry_dir=registry_dir)
+
+
+@pytest.fixture
+def registry_dir(tmp_path, gb_model, rf_model, customers):
+    registry_dir = str(tmp_path / "registry")
+    _publish(gb_model, customers, registry_dir)
+    _publish(rf_model, customers, registry_dir, promote=False)
+    return registry_dir
+
+
+@pytest.fixture
+def server(registry_dir):
+    server = ModelServer(ModelRegistry(registry_dir), legacy_model_path=None, warmup_payload=PAYLOAD)
+    server.reload()
+    yield server
+    server.stop()
+
+
+def test_registry_versions(registry_dir):
+    registry = ModelRegistry(registry_dir)
+    assert registry.versions() == ["v0001", "v0002"]
+    assert registry.current_version() == "v0001"
+    assert registry.metadata("v0002")["model"] == "RandomForestClassifier"
+    assert os.path.exists(registry.engine_path("v0002"))
+    # Staging directories never show up as versions
+    registry.stage()
+    assert registry.versions() == ["v0001", "v0002"]
+
+    registry.promote("v0002")
+    assert registry.current_version() == "v0002"
+    for bad in ("v0003", "../v0001", None):
+        with pytest.raises(VersionNotFound):
+            registry.version_dir(bad)
+
+
+def test_commit_needs_a_model(tmp_path):
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    with pytest.raises(ValueError):
+        registry.commit(registry.stage(), {})
+    assert registry.versions() == [] and registry.current_version() is None
+
+
+def test_empty_registry_serves_the_legacy_path(tmp_path):
+    server = ModelServer(ModelRegistry(str(tmp_path / "empty")), legacy_model_path="churn_model.pkl",
+                         warmup_payload=PAYLOAD)
+    assert server.resolve() == (LEGACY_VERSION, "churn_model.pkl", None, {})
+
+
+def test_reload_swaps_versions(server, rf_model):
+    swapped = []
+    server.on_swap(swapped.append)
+    assert server.current.version == "v0001" and server.current.scorer.name == "compiled+trees"
+
+    assert server.reload() == {"swapped": False, "version": "v0001"}
+    result = server.reload("v0002")
+    assert result == {"swapped": True, "previous": "v0001", "version": "v0002"}
+    assert [loaded.version for loaded in swapped] == ["v0002"]
+    assert server.current.scorer.predict_one(PAYLOAD) == pytest.approx(
+        PipelineScorer(rf_model).predict_one(PAYLOAD), abs=1e-12)
+    # Without promote the registry still points at the old version
+    assert server.registry.current_version() == "v0001"
+
+
+def test_failed_reload_keeps_the_served_version(server):
+    os.unlink(server.registry.model_path("v0002"))
+    with pytest.raises(Exception):
+        server.reload("v0002", promote=True)
+    assert server.current.version == "v0001"
+    assert server.last_error.startswith("v0002")
+    assert server.registry.current_version() == "v0001"
+
+
+def test_watcher_follows_current(server):
+    server.start_watcher(0.05)
+    server.registry.promote("v0002")
+    deadline = time.monotonic() + 30
+    while server.current.version != "v0002":
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+
+def test_shadow_scoring(server):
+    server.set_shadow("v0002", sample_rate=1.0)
+    for _ in range(5):
+        server.shadow_score(PAYLOAD, 0.5)
+    deadline = time.monotonic() + 30
+    while server.shadow_stats()["scored"] < 5:
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+    stats = server.shadow_stats()
+    assert (stats["version"], stats["sampled"], stats["pending"], stats["errors"]) == ("v0002", 5, 0, 0)
+    assert stats["max_abs_diff"] == pytest.approx(abs(server.shadow.scorer.predict_one(PAYLOAD) - 0.5))
+    server.clear_shadow()
+    assert server.shadow_stats() == {"enabled": False}
+
+
+@pytest.fixture
+def candidate(api, rf_model, customers):
+    # A second version in the API's registry, swapped in for one test only
+    registry = api.model_server.registry
+    version = _publish(rf_model, customers, registry.root_dir, promote=False)
+    yield version
+    api.model_server.reload(registry.current_version())
+
+
+def test_reload_endpoint_rebinds_cache_and_pool(api, client, candidate, rf_model):
+    payload = dict(PAYLOAD, tenure=3)
+    client.post("/predict", json=payload)
+
+    response = client.post("/model/reload", params={"version": candidate, "promote": False}).json()
+    assert response["swapped"] and response["version"] == candidate
+    info = client.get("/model").json()
+    assert info["version"] == candidate and info["registry_current"] != candidate
+
+    served = api.model_server.current
+    assert api.prediction_cache.model_fingerprint == served.fingerprint
+    assert api.sharded_scorer.fingerprint == served.fingerprint
+    # The cached answer of the previous version is not served
+    assert client.post("/predict", json=payload).json()["churn_probability"] == pytest.approx(
+        PipelineScorer(rf_model).predict_one(payload), abs=1e-12)
+
+    assert client.post("/model/reload", params={"version": "v9999"}).status_code == 404
@@ -0,0 +1,73 @@
+import joblib
+import numpy as np
+import pytest
+
+from src.utils import parallel_scoring
+from src.utils.batch_scoring import DedupStats, predict_probabilities
+from src.utils.parallel_scoring import ShardedScorer
+from src.utils.prediction_cache import file_fingerprint
+
+
+def _worker_state():
+    # Runs inside a pool worker
+    scaler = parallel_scoring._worker_model.named_steps["preprocessor"].named_transformers_["num"]
+    return isinstance(scaler.mean_, np.memmap), parallel_scoring._worker_fingerprint
+
+
+@pytest.fixture(scope="module")
+def model_file(tmp_path_factory, gb_model):
+    path = str(tmp_path_factory.mktemp("pool") / "churn_model.pkl")
+    joblib.dump(gb_model, path)
+    return path
+
+
+@pytest.fixture(scope="module")
+def scorer(model_file):
+    scorer = ShardedScorer(model_file, workers=2, min_rows=100, shard_rows=150,
+                           fingerprint=file_fingerprint(model_file))
+    yield scorer
+    scorer.shutdown()
+
+
+@pytest.fixture(scope="module")
+def frame(customers):
+    # Every row twice, so shards see duplicates
+    return customers.head(500).sample(frac=2, replace=True, random_state=0).reset_index(drop=True)
+
+
+def test_pooled_scores_match_in_process(scorer, gb_model, frame):
+    dedup, inline_dedup = DedupStats(), DedupStats()
+    pooled = scorer.predict(frame, gb_model, dedup, scorer.fingerprint)
+    inline = predict_probabilities(frame, gb_model, inline_dedup)
+
+    np.testing.assert_array_equal(pooled, inline)
+    assert scorer.stats()["pooled_batches"] == 1
+    assert dedup.records()["rows"] == inline_dedup.records()["rows"] == len(frame)
+
+
+def test_small_frames_stay_in_process(scorer, gb_model, frame):
+    inline_batches = scorer.inline_batches
+    scorer.predict(frame.head(50), gb_model)
+    assert scorer.inline_batches == inline_batches + 1
+
+
+def test_workers_memory_map_the_model(scorer, model_file):
+    is_memmap, fingerprint = scorer._pool().submit(_worker_state).result()
+    assert is_memmap
+    assert fingerprint == file_fingerprint(model_file)
+
+
+def test_batch_scored_by_another_model_is_redone_inline(scorer, gb_model, frame):
+    stale = scorer.stale_batches
+    probs = scorer.predict(frame, gb_model, fingerprint="swapped-model")
+    assert scorer.stale_batches == stale + 1
+    np.testing.assert_array_equal(probs, predict_probabilities(frame, gb_model))
+
+
+def test_pool_with_another_model_is_restarted(model_file, gb_model, frame):
+    scorer = ShardedScorer(model_file, workers=2, min_rows=100, fingerprint="expected-model")
+    try:
+        scorer.predict(frame, gb_model)
+        assert not scorer.stats()["pool_running"]
+    finally:
+        scorer.shutdown()
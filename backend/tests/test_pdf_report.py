@@ -0,0 +1,129 @@
+import re
+import time
+
+import pandas as pd
+import pytest
+
+from src.utils.jobs import JobManager, iter_segment_rows
+from src.utils.metrics import metrics
+from src.utils.pdf_report import APPENDIX_ROW_HEIGHT, CustomerAppendix, generate_churn_pdf
+from src.utils.report_renderer import APPENDIX_COLUMNS, ReportRenderer
+from test_jobs import _csv, wait_for
+
+SUMMARY = pd.DataFrame({
+    "risk_segment": ["High Risk", "Medium Risk", "Low Risk"],
+    "customers": [1_000, 0, 0],
+    "revenue_at_risk": [50_000.0, 0.0, 0.0],
+})
+COMPANY = {"name": "Acme", "location": "-", "email": "-", "website": "-"}
+
+
+def _rows(n):
+    return [(f"C{i:05d}", f"Customer {i}", 0.9, 100.0 - i / 100) for i in range(n)]
+
+
+def _chunks(rows, size, pulled):
+    for start in range(0, len(rows), size):
+        pulled.append(start)
+        yield rows[start:start + size]
+
+
+def _pages(path) -> int:
+    with open(path, "rb") as f:
+        return len(re.findall(rb"/Type /Page\b(?!s)", f.read()))
+
+
+def test_appendix_pulls_rows_page_by_page():
+    rows, pulled = _rows(1_000), []
+    flowable = CustomerAppendix(_chunks(rows, 50, pulled), "High Risk")
+    height = 41 * APPENDIX_ROW_HEIGHT
+
+    listed = []
+    while flowable is not None:
+        parts = flowable.split(500, height)
+        table = parts[0]
+        assert len(table._cellvalues) - 1 <= 40
+        listed += [tuple(row) for row in table._cellvalues[1:]]
+        if len(listed) == 40:
+            # One page in, only the chunks it needed were read
+            assert pulled == [0]
+        flowable = parts[1] if len(parts) > 1 else None
+
+    assert [row[0] for row in listed] == [row[0] for row in rows]
+
+
+def test_appendix_lists_every_customer(tmp_path):
+    timings = {}
+    plain, full = str(tmp_path / "plain.pdf"), str(tmp_path / "full.pdf")
+    generate_churn_pdf(COMPANY, SUMMARY, {}, plain)
+    generate_churn_pdf(COMPANY, SUMMARY, {}, full, appendix={"High Risk": _chunks(_rows(1_000), 300, [])},
+                       timings=timings)
+
+    # 1,000 rows at a fixed row height take about 20 more pages
+    assert 15 <= _pages(full) - _pages(plain) <= 30
+    assert set(timings) == {"chart", "build"} and all(seconds > 0 for seconds in timings.values())
+
+
+@pytest.fixture
+def job(api, tmp_path, customers):
+    jobs = JobManager(str(tmp_path / "jobs"), api.score_job_chunk, max_workers=1, chunk_size=300)
+    job_id = jobs.submit(_csv(customers.head(600)), "csv")["job_id"]
+    wait_for(jobs, job_id)
+    yield jobs, job_id
+    jobs.shutdown()
+
+
+def test_segment_rows_come_highest_revenue_first(job):
+    jobs, job_id = job
+    chunks = list(iter_segment_rows(jobs.results_path(job_id), "Low Risk", APPENDIX_COLUMNS, chunk_rows=100))
+    rows = [row for chunk in chunks for row in chunk]
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    low = next(s["customers"] for s in jobs.status(job_id)["summary"] if s["risk_segment"] == "Low Risk")
+    assert len(rows) == low
+    revenue = [row[3] for row in rows]
+    assert revenue == sorted(revenue, reverse=True)
+
+
+def _stage_count(endpoint: str, stage: str) -> float:
+    match = re.search(rf'^churn_stage_seconds_count{{endpoint="{endpoint}",stage="{stage}"}} (\S+)$',
+                      metrics.render(), re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+
+def test_worker_stage_timings_reach_the_parent(job, tmp_path):
+    # A real spawn worker: its own metrics registry is never scraped
+    jobs, job_id = job
+    renderer = ReportRenderer(str(tmp_path / "reports"), workers=1)
+    report = {"company_name": "Acme", "summary_data": jobs.status(job_id)["summary"],
+              "appendix_segments": ["High Risk"], "job_id": job_id}
+    try:
+        with metrics.request("worker_report_test"):
+            future, _ = renderer.submit(report, appendix_path=jobs.results_path(job_id))
+        future.result(timeout=300)
+        deadline = time.monotonic() + 30
+        while _stage_count("worker_report_test", "build") < 1:
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+        assert _stage_count("worker_report_test", "chart") == 1
+    finally:
+        renderer.shutdown()
+
+
+def test_job_report_endpoint(api, client, customers):
+    upload = _csv(customers.head(400)).getvalue()
+    job_id = client.post("/jobs", files={"file": ("customers.csv", upload, "text/csv")}).json()["job_id"]
+    deadline = time.monotonic() + 60
+    while client.get(f"/jobs/{job_id}").json()["status"] != "completed":
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+    builds = _stage_count("generate_job_report", "build")
+    response = client.post(f"/jobs/{job_id}/report", json={"company_name": "Acme", "segments": ["High Risk"]})
+    assert response.status_code == 200 and response.content[:4] == b"%PDF"
+    assert response.headers["x-report-cache"] == "miss"
+    assert _stage_count("generate_job_report", "build") == builds + 1
+
+    again = client.post(f"/jobs/{job_id}/report", json={"company_name": "Acme", "segments": ["High Risk"]})
+    assert again.headers["x-report-cache"] == "hit"
+    assert "Unknown risk segments" in client.post(f"/jobs/{job_id}/report", json={"segments": ["Huge Risk"]}).json()["error"]
+    assert client.post("/jobs/0123abcd/report", json={}).status_code == 404
@@ -0,0 +1,67 @@
+import io
+import json
+
+import pandas as pd
+import pytest
+
+from src.utils.preprocessing import build_features
+
+
+def _csv(df: pd.DataFrame) -> bytes:
+    return df.to_csv(index=False).encode()
+
+
+def _ndjson(text: str):
+    lines = [json.loads(line) for line in text.splitlines()]
+    return pd.DataFrame(lines[:-1]), lines[-1]
+
+
+def test_stream_matches_batch_and_model(client, gb_model, customers):
+    upload = customers.head(1_000)
+    streamed = client.post("/predict-batch/stream?chunk_size=300",
+                           files={"file": ("customers.csv", _csv(upload), "text/csv")})
+    assert streamed.status_code == 200
+    rows, footer = _ndjson(streamed.text)
+
+    batch = client.post("/predict-batch", files={"file": ("customers.csv", _csv(upload), "text/csv")}).json()
+    assert footer["rows"] == len(upload) == len(rows)
+    # Running totals add chunk by chunk, so revenue may differ in the last bits
+    for streamed_segment, batch_segment in zip(footer["summary"], batch["summary"]):
+        assert streamed_segment["risk_segment"] == batch_segment["risk_segment"]
+        assert streamed_segment["customers"] == batch_segment["customers"]
+        assert streamed_segment["revenue_at_risk"] == pytest.approx(batch_segment["revenue_at_risk"], rel=1e-12)
+
+    expected = gb_model.predict_proba(build_features(upload))[:, 1]
+    assert rows["customerID"].tolist() == upload["customerID"].tolist()
+    assert rows["churn_probability"].to_numpy() == pytest.approx(expected, abs=1e-12)
+    batch_probs = pd.DataFrame(batch["all_predictions"]).set_index("customerID")["churn_probability"]
+    assert rows.set_index("customerID")["churn_probability"].to_numpy() == pytest.approx(
+        batch_probs.loc[rows["customerID"]].to_numpy(), abs=1e-12)
+
+
+def test_stream_csv_writes_one_header(client, customers):
+    upload = customers.head(700)
+    response = client.post("/predict-batch/stream?format=csv&chunk_size=250",
+                           files={"file": ("customers.csv", _csv(upload), "text/csv")})
+    out = pd.read_csv(io.StringIO(response.text))
+    assert len(out) == len(upload)
+    assert out["customerID"].tolist() == upload["customerID"].tolist()
+
+
+def test_stream_reports_rejected_rows_with_upload_positions(client, customers):
+    upload = customers.head(600).copy()
+    upload["gender"] = upload["gender"].astype(object)
+    upload.loc[450, "gender"] = "Robot"
+    response = client.post("/predict-batch/stream?chunk_size=200",
+                           files={"file": ("customers.csv", _csv(upload), "text/csv")})
+    rows, footer = _ndjson(response.text)
+
+    assert len(rows) == 599
+    assert footer["rejected"]["rows"] == 1
+    assert footer["rejected"]["sample"][0]["row"] == 450
+
+
+def test_stream_rejects_missing_columns(client, customers):
+    upload = customers.head(10).drop(columns=["tenure"])
+    response = client.post("/predict-batch/stream", files={"file": ("customers.csv", _csv(upload), "text/csv")})
+    assert response.json()["missing_columns"] == ["tenure"]
@@ -0,0 +1,110 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.prediction_cache import PredictionCache, file_fingerprint
+
+
+@pytest.fixture
+def payloads(customers):
+    return customers.head(5).drop(columns=["customerID"]).to_dict(orient="records")
+
+
+def test_payload_and_frame_keys_agree(payloads):
+    # Numeric text is coerced like feature engineering; NaN and None are one key
+    payloads[0]["MonthlyCharges"] = " 70.35 "
+    payloads[1]["TotalCharges"] = " "
+    payloads[2]["Partner"] = None
+    frame = pd.DataFrame(payloads)
+    frame.loc[2, "Partner"] = np.nan
+
+    assert PredictionCache.frame_keys(frame) == [PredictionCache.payload_key(payload) for payload in payloads]
+    assert 70.35 in PredictionCache.payload_key(payloads[0])
+
+
+def test_distinct_customers_never_share_a_key(payloads):
+    method = "Mailed check" if payloads[0]["PaymentMethod"] != "Mailed check" else "Electronic check"
+    changed = dict(payloads[0], PaymentMethod=method)
+    assert PredictionCache.payload_key(changed) != PredictionCache.payload_key(payloads[0])
+    assert PredictionCache.payload_key(dict(payloads[0], tenure=payloads[0]["tenure"] + 1)) \
+        != PredictionCache.payload_key(payloads[0])
+    # Fields outside the model inputs do not split entries
+    assert PredictionCache.payload_key(dict(payloads[0], customerID="other")) == PredictionCache.payload_key(payloads[0])
+
+
+def test_lru_eviction():
+    cache = PredictionCache(max_size=2)
+    cache.put_many([("a",), ("b",)], [0.1, 0.2])
+    assert cache.get(("a",)) == 0.1
+    cache.put(("c",), 0.3)
+
+    assert cache.get(("b",)) is None
+    assert cache.get(("a",)) == 0.1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire():
+    cache = PredictionCache(ttl_seconds=0.01)
+    cache.put(("a",), 0.5)
+    time.sleep(0.02)
+    assert cache.get(("a",)) is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_bind_model_invalidates_other_versions():
+    cache = PredictionCache()
+    cache.bind_model("v1")
+    cache.put(("a",), 0.5, "v1")
+    cache.bind_model("v1")
+    assert cache.get(("a",)) == 0.5
+
+    cache.bind_model("v2")
+    assert cache.get(("a",)) is None
+    assert cache.stats()["invalidations"] == 1
+
+    # A result computed by the swapped-out model is not stored
+    cache.put(("a",), 0.9, "v1")
+    assert cache.get(("a",)) is None
+
+
+def test_model_file_change_invalidates(tmp_path):
+    path = tmp_path / "model.pkl"
+    path.write_bytes(b"one")
+    cache = PredictionCache(model_path=str(path), check_interval=0)
+    assert cache.model_fingerprint == file_fingerprint(str(path))
+    cache.put(("a",), 0.5)
+    assert cache.get(("a",)) == 0.5
+
+    replacement = tmp_path / "model.pkl.new"
+    replacement.write_bytes(b"two!")
+    os.replace(replacement, path)
+    assert cache.get(("a",)) is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_get_many_marks_misses_as_nan():
+    cache = PredictionCache()
+    cache.put(("a",), 0.25)
+    out = cache.get_many([("a",), ("b",)])
+    assert out[0] == 0.25 and np.isnan(out[1])
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_disabled_cache_stores_nothing():
+    cache = PredictionCache(max_size=0)
+    cache.put(("a",), 0.5)
+    assert cache.get(("a",)) is None
+    assert not cache.stats()["enabled"]
+
+
+def test_predict_serves_repeats_from_the_cache(client, payloads):
+    before = client.get("/stats/cache").json()
+    first = client.post("/predict", json=payloads[4]).json()
+    second = client.post("/predict", json=payloads[4]).json()
+    after = client.get("/stats/cache").json()
+
+    assert first == second
+    assert after["hits"] - before["hits"] >= 1
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.feature.feature_engineering import feature_engineering
+from src.utils.preprocessing import (
+    DEFAULT_VALUES, ENGINEERED_COLUMNS, SERVICE_COLUMNS, TENURE_BINS, TENURE_LABELS,
+    apply_feature_engineering, build_features, restore_features,
+)
+
+
+def legacy_feature_engineering(df: pd.DataFrame) -> pd.DataFrame:
+    # The per-column pipeline build_features replaced, kept as the reference
+    df = df.copy()
+    for col, val in DEFAULT_VALUES.items():
+        if col not in df.columns:
+            df[col] = val
+    for col in ["tenure", "MonthlyCharges", "TotalCharges"]:
+        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0)
+    df["charge_per_tenure"] = df["MonthlyCharges"] / (df["tenure"] + 1)
+    df["num_services"] = (df[SERVICE_COLUMNS] == "Yes").sum(axis=1)
+    df["tenure_group"] = pd.cut(df["tenure"], bins=TENURE_BINS, labels=TENURE_LABELS, include_lowest=True)
+    return df
+
+
+@pytest.fixture
+def raw(customers):
+    df = customers.head(1_000).drop(columns=["customerID"]).reset_index(drop=True)
+    # Blank and unparsable numbers, and the bucket edges
+    df["TotalCharges"] = df["TotalCharges"].astype(object)
+    df.loc[0, "TotalCharges"] = " "
+    df.loc[1, "TotalCharges"] = "n/a"
+    df.loc[2:6, "tenure"] = [0, 12, 13, 48, 72]
+    return df
+
+
+def test_features_match_the_legacy_pipeline(raw):
+    built = build_features(raw)
+    legacy = legacy_feature_engineering(raw)
+
+    for col in ["tenure", "MonthlyCharges", "TotalCharges", "charge_per_tenure", "num_services"]:
+        np.testing.assert_array_equal(built[col].to_numpy(dtype=float), legacy[col].to_numpy(dtype=float))
+    assert built["tenure_group"].astype(str).tolist() == legacy["tenure_group"].astype(str).tolist()
+    for col in SERVICE_COLUMNS + ["Contract", "PaymentMethod", "InternetService"]:
+        assert built[col].astype(str).tolist() == raw[col].tolist()
+
+
+def test_model_scores_match_the_legacy_pipeline(raw, gb_model, lr_model):
+    for model in (gb_model, lr_model):
+        np.testing.assert_array_equal(
+            model.predict_proba(build_features(raw))[:, 1],
+            model.predict_proba(legacy_feature_engineering(raw))[:, 1],
+        )
+
+
+def test_input_frame_is_not_modified(raw):
+    before = raw.copy()
+    build_features(raw.drop(columns=["PhoneService"]))
+    pd.testing.assert_frame_equal(raw, before)
+
+
+def test_defaults_and_unknown_categories(raw):
+    built = build_features(raw.drop(columns=list(DEFAULT_VALUES)).assign(Contract="Lifetime"))
+    for col, value in DEFAULT_VALUES.items():
+        assert (built[col] == value).all()
+    # Values outside the vocabulary become missing, which one-hot encodes as all zeros
+    assert built["Contract"].isna().all()
+
+
+def test_aliases_and_long_tenures(raw):
+    raw = raw.head(3).copy()
+    raw["PaymentMethod"] = ["Bank transfer", "Credit card", "Mailed check"]
+    raw["tenure"] = [73, 120, 0]
+    built = build_features(raw)
+    assert built["PaymentMethod"].tolist() == ["Bank transfer (automatic)", "Credit card (automatic)", "Mailed check"]
+    assert built["tenure_group"].tolist() == [TENURE_LABELS[-1], TENURE_LABELS[-1], TENURE_LABELS[0]]
+
+
+def test_restore_features_round_trip(raw):
+    built = build_features(raw)
+    # As read back from storage: plain text and numbers
+    stored = built.astype({col: object for col in built.columns if isinstance(built[col].dtype, pd.CategoricalDtype)})
+    restored = restore_features(stored)
+    pd.testing.assert_frame_equal(restored, built)
+    assert set(ENGINEERED_COLUMNS) <= set(restored.columns)
+
+
+def test_historical_names():
+    assert apply_feature_engineering is build_features
+    assert feature_engineering is build_features
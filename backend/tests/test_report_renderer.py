@@ -0,0 +1,143 @@
+import os
+import threading
+import time
+
+import pytest
+
+from src.utils import report_renderer as renderer_module
+from src.utils.report_renderer import ReportQueueFull, ReportRenderer
+
+SUMMARY = [
+    {"risk_segment": "High Risk", "customers": 2, "revenue_at_risk": 900.0},
+    {"risk_segment": "Medium Risk", "customers": 1, "revenue_at_risk": 200.0},
+    {"risk_segment": "Low Risk", "customers": 0, "revenue_at_risk": 0.0},
+]
+
+
+def _report(name="Acme"):
+    return {
+        "company_name": name,
+        "summary_data": SUMMARY,
+        "customer_lists": {"High Risk": [
+            {"customerID": "C1", "customerName": "Ann", "churn_probability": 0.91, "revenue_at_risk": 500.0},
+            {"customerID": "C2", "customerName": "Bob", "churn_probability": 0.85, "revenue_at_risk": 400.0},
+        ]},
+    }
+
+
+@pytest.fixture
+def gate(monkeypatch):
+    """
+    Replaces the PDF build with one that waits for gate.set() and writes a stub
+    """
+    gate = threading.Event()
+    calls = []
+
+    def render(report, output_path, appendix_path=None):
+        calls.append(report["company_name"])
+        assert gate.wait(30)
+        if report["company_name"] == "broken":
+            raise ValueError("cannot lay out report")
+        with open(output_path, "wb") as f:
+            f.write(b"%PDF-stub")
+        return 0.0, {}
+
+    monkeypatch.setattr(renderer_module, "_render_report", render)
+    gate.calls = calls
+    return gate
+
+
+@pytest.fixture
+def renderer(tmp_path):
+    renderer = ReportRenderer(str(tmp_path / "reports"), workers=0, max_pending=2, max_files=2)
+    yield renderer
+    renderer.shutdown()
+
+
+def test_reports_are_rendered_once_and_cached(renderer):
+    future, cached = renderer.submit(_report())
+    path = future.result(timeout=120)
+    assert not cached
+    with open(path, "rb") as f:
+        assert f.read(4) == b"%PDF"
+
+    again, cached = renderer.submit(_report())
+    assert cached and again.result() == path
+    assert renderer.cache_key(_report("Other")) != renderer.cache_key(_report())
+    stats = renderer.stats()
+    assert (stats["rendered"], stats["cache_hits"], stats["cached_files"]) == (1, 1, 1)
+
+
+def test_identical_requests_share_one_render(renderer, gate):
+    first, _ = renderer.submit(_report())
+    second, cached = renderer.submit(_report())
+    assert second is first and not cached
+    gate.set()
+    assert first.result(timeout=30) == renderer.path(renderer.cache_key(_report()))
+    assert gate.calls == ["Acme"] and renderer.shared == 1
+
+
+def test_full_queue_rejects_new_reports(renderer, gate):
+    renderer.submit(_report("a"))
+    renderer.submit(_report("b"))
+    with pytest.raises(ReportQueueFull):
+        renderer.submit(_report("c"))
+    assert renderer.stats()["rejected"] == 1
+
+    gate.set()
+    deadline = time.monotonic() + 30
+    while renderer.queue_depth():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    renderer.submit(_report("c"))[0].result(timeout=30)
+
+
+def test_failed_renders_leave_no_files(renderer, gate):
+    gate.set()
+    future, _ = renderer.submit(_report("broken"))
+    with pytest.raises(ValueError):
+        future.result(timeout=30)
+    assert renderer.failed == 1 and renderer.queue_depth() == 0
+    assert os.listdir(renderer.cache_dir) == []
+
+
+def test_least_recently_used_reports_are_evicted(renderer, gate):
+    gate.set()
+    paths = {}
+    for name in ("a", "b"):
+        paths[name] = renderer.submit(_report(name))[0].result(timeout=30)
+        time.sleep(0.02)
+    # A cache hit makes "a" the most recently used
+    renderer.submit(_report("a"))
+    renderer.submit(_report("c"))[0].result(timeout=30)
+
+    assert os.path.exists(paths["a"]) and not os.path.exists(paths["b"])
+    assert renderer.stats()["cached_files"] == 2
+
+
+def test_interrupted_renders_are_cleaned_up(tmp_path):
+    cache_dir = tmp_path / "reports"
+    cache_dir.mkdir()
+    (cache_dir / "abc.pdf.123.tmp").write_bytes(b"partial")
+    ReportRenderer(str(cache_dir), workers=0)
+    assert os.listdir(cache_dir) == []
+
+
+def test_report_endpoint(api, client, gate, monkeypatch, tmp_path):
+    gate.set()
+    body = _report("Endpoint Co")
+    response = client.post("/generate-report", json=body)
+    assert response.status_code == 200 and response.headers["content-type"] == "application/pdf"
+    assert response.headers["x-report-cache"] == "miss"
+    assert client.post("/generate-report", json=body).headers["x-report-cache"] == "hit"
+
+    # A full queue answers 503 instead of waiting
+    gate.clear()
+    busy = ReportRenderer(str(tmp_path / "busy"), workers=0, max_pending=1)
+    monkeypatch.setattr(api, "report_renderer", busy)
+    busy.submit(_report("queued"))
+    try:
+        assert client.post("/generate-report", json=_report("Other Co")).status_code == 503
+    finally:
+        gate.set()
+        busy.shutdown()
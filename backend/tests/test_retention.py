@@ -0,0 +1,97 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.batch_scoring import risk_segment, risk_segments
+from src.utils.retention import STRATEGY_MESSAGES, assign_strategy_codes, generate_retention_strategy, strategy_code
+
+
+def legacy_retention_strategy(payload: dict, churn_prob: float) -> str:
+    """
+    The per-row if/else rules the rule table replaced, kept as the reference
+    """
+    tenure = float(payload.get("tenure", 0))
+    monthly_charges = float(payload.get("MonthlyCharges", 0))
+    contract = payload.get("Contract", "Month-to-month")
+    tech_support = payload.get("TechSupport", "No")
+    payment_method = payload.get("PaymentMethod", "Electronic check")
+
+    if churn_prob > 0.7:
+        if monthly_charges > 80:
+            return STRATEGY_MESSAGES["VIP_INTERVENTION"]
+        elif tenure < 6:
+            return STRATEGY_MESSAGES["EARLY_STAGE_RESCUE"]
+        elif contract == "Month-to-month":
+            return STRATEGY_MESSAGES["CONTRACT_LOCK_IN"]
+        return STRATEGY_MESSAGES["URGENT_ACCOUNT_REVIEW"]
+    elif churn_prob > 0.4:
+        if tech_support == "No":
+            return STRATEGY_MESSAGES["SERVICE_CONFIDENCE_BOOST"]
+        elif tenure > 24:
+            return STRATEGY_MESSAGES["LOYALTY_APPRECIATION"]
+        elif payment_method in ["Electronic check", "Mailed check"]:
+            return STRATEGY_MESSAGES["PAYMENT_FRICTION_REDUCTION"]
+        return STRATEGY_MESSAGES["ENGAGEMENT_NUDGE"]
+    if monthly_charges < 50:
+        return STRATEGY_MESSAGES["GROWTH_UPSELL"]
+    elif tenure > 12 and monthly_charges > 70:
+        return STRATEGY_MESSAGES["ADVOCACY_ACTIVATION"]
+    return STRATEGY_MESSAGES["MAINTAIN_SATISFACTION"]
+
+
+# Every rule boundary, on both sides
+PROBABILITIES = [0.0, 0.3, 0.4, 0.4000001, 0.55, 0.7, 0.7000001, 0.95, 1.0]
+TENURES = [0, 5, 6, 12, 13, 24, 25, 60]
+CHARGES = [20.0, 49.99, 50.0, 70.0, 70.01, 80.0, 80.01, 110.0]
+CONTRACTS = ["Month-to-month", "One year", "Two year"]
+TECH_SUPPORT = ["No", "Yes", "No internet service"]
+PAYMENT_METHODS = ["Electronic check", "Mailed check", "Bank transfer (automatic)", "Credit card (automatic)"]
+
+
+@pytest.fixture(scope="module")
+def grid():
+    rows = list(itertools.product(PROBABILITIES, TENURES, CHARGES, CONTRACTS, TECH_SUPPORT, PAYMENT_METHODS))
+    return pd.DataFrame(rows, columns=["churn_probability", "tenure", "MonthlyCharges", "Contract",
+                                       "TechSupport", "PaymentMethod"])
+
+
+def test_vectorized_rules_match_legacy_rules(grid):
+    codes = assign_strategy_codes(grid, grid["churn_probability"])
+    payloads = grid.drop(columns=["churn_probability"]).to_dict(orient="records")
+    expected = [legacy_retention_strategy(payload, prob) for payload, prob in zip(payloads, grid["churn_probability"])]
+    assert [STRATEGY_MESSAGES[code] for code in codes] == expected
+
+
+def test_single_payload_rules_match_legacy_rules(grid):
+    for payload, prob in zip(grid.drop(columns=["churn_probability"]).to_dict(orient="records"),
+                             grid["churn_probability"]):
+        assert generate_retention_strategy(payload, prob) == legacy_retention_strategy(payload, prob)
+
+
+def test_missing_columns_use_rule_defaults():
+    payload = {"MonthlyCharges": 60.0}
+    frame = pd.DataFrame([payload])
+    for prob in PROBABILITIES:
+        expected = legacy_retention_strategy(payload, prob)
+        assert generate_retention_strategy(payload, prob) == expected
+        assert STRATEGY_MESSAGES[assign_strategy_codes(frame, [prob])[0]] == expected
+    assert strategy_code({"tenure": "bad"}, 0.9) == "EARLY_STAGE_RESCUE"
+
+
+def test_risk_segments_include_their_upper_bound():
+    probabilities = np.array([0.0, 0.2, 0.4, 0.4000001, 0.7, 0.7000001, 1.0])
+    expected = ["Low Risk", "Low Risk", "Low Risk", "Medium Risk", "Medium Risk", "High Risk", "High Risk"]
+    assert [risk_segment(p) for p in probabilities] == expected
+    assert list(risk_segments(probabilities)) == expected
+    assert pd.isna(risk_segments([np.nan])[0])
+
+
+def test_risk_segments_follow_the_retention_tiers():
+    # With the default columns each tier's rules end in one known strategy
+    tier_strategy = {"High Risk": "EARLY_STAGE_RESCUE", "Medium Risk": "SERVICE_CONFIDENCE_BOOST",
+                     "Low Risk": "GROWTH_UPSELL"}
+    probabilities = np.array(PROBABILITIES)
+    codes = assign_strategy_codes(pd.DataFrame(index=range(len(probabilities))), probabilities)
+    assert list(codes) == [tier_strategy[segment] for segment in risk_segments(probabilities)]
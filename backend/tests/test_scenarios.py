@@ -0,0 +1,146 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.batch_scoring import (
+    REVENUE_HORIZON_MONTHS, RISK_LABELS, predict_feature_probabilities, predict_probabilities, score_frame,
+)
+from src.utils.preprocessing import build_features
+from src.utils.scenarios import Portfolio, ScenarioEngine, apply_update, row_mask
+
+SCENARIO = {
+    "name": "Tech support and a discount",
+    "interventions": [
+        {"where": [["Contract", "==", "Month-to-month"], ["TechSupport", "==", "No"]],
+         "set": {"TechSupport": "Yes"}},
+        {"where": [["tenure", "<", 12]], "set": {"MonthlyCharges": ["*", 0.9]}},
+    ],
+}
+
+
+@pytest.fixture(scope="module")
+def portfolio_frame(customers, gb_model):
+    frame = customers.head(1_000).reset_index(drop=True)
+    return score_frame(frame.copy(), lambda df: predict_probabilities(df, gb_model))
+
+
+def _counting(model, calls):
+    def predict(features):
+        calls.append(len(features))
+        return predict_feature_probabilities(features, model)
+    return predict
+
+
+def full_rescore(frame, model):
+    # The scenario applied to the raw rows, and every row scored again
+    edited = frame.copy()
+    first = (frame["Contract"] == "Month-to-month") & (frame["TechSupport"] == "No")
+    edited.loc[first, "TechSupport"] = "Yes"
+    second = frame["tenure"] < 12
+    edited.loc[second, "MonthlyCharges"] *= 0.9
+
+    before = predict_probabilities(frame, model)
+    after = predict_probabilities(edited, model)
+    delta = REVENUE_HORIZON_MONTHS * (after * edited["MonthlyCharges"] - before * frame["MonthlyCharges"])
+    by_segment = delta.groupby(frame["risk_segment"], observed=False).sum()
+    changed = (edited["TechSupport"] != frame["TechSupport"]) | (edited["MonthlyCharges"] != frame["MonthlyCharges"])
+    return changed, by_segment
+
+
+def test_deltas_match_a_full_rescore(portfolio_frame, gb_model):
+    calls = []
+    result = Portfolio(portfolio_frame).run(SCENARIO, _counting(gb_model, calls), "model-a")
+    changed, by_segment = full_rescore(portfolio_frame, gb_model)
+
+    assert result["affected_customers"] == changed.sum()
+    # Only the edited rows reach the model: once edited, once as the baseline
+    assert calls == [result["affected_customers"]] * 2
+    for segment in result["segments"]:
+        assert segment["revenue_at_risk_delta"] == pytest.approx(by_segment[segment["risk_segment"]], rel=1e-9, abs=1e-9)
+    assert result["revenue_at_risk_delta"] == pytest.approx(by_segment.sum(), rel=1e-9)
+    assert result["baseline_revenue_at_risk"] == pytest.approx(portfolio_frame["revenue_at_risk"].sum(), rel=1e-12)
+    assert sum(s["scenario_customers"] for s in result["segments"]) == len(portfolio_frame)
+
+
+def test_baselines_are_reused_across_scenarios(portfolio_frame, gb_model):
+    portfolio = Portfolio(portfolio_frame)
+    calls = []
+    first = portfolio.run(SCENARIO, _counting(gb_model, calls), "model-a")
+    portfolio.run(SCENARIO, _counting(gb_model, calls), "model-a")
+    assert calls == [first["affected_customers"]] * 3
+
+    # Another model needs new baselines
+    portfolio.run(SCENARIO, _counting(gb_model, calls), "model-b")
+    assert len(calls) == 5
+
+
+def test_no_op_interventions_score_nothing(portfolio_frame, gb_model):
+    calls = []
+    scenario = {"name": "already", "interventions": [
+        {"where": [["TechSupport", "==", "Yes"]], "set": {"TechSupport": "Yes"}},
+        {"where": [["tenure", ">", 1_000]], "set": {"MonthlyCharges": 10}},
+    ]}
+    result = Portfolio(portfolio_frame).run(scenario, _counting(gb_model, calls), "model-a")
+    assert calls == [] and result["affected_customers"] == 0
+    assert result["revenue_at_risk_delta"] == 0.0
+
+
+def test_row_mask_matches_pandas(portfolio_frame):
+    features = build_features(portfolio_frame)
+    where = [["PaymentMethod", "in", ["Electronic check", "Mailed check"]], ["tenure", ">=", 24],
+             ["MonthlyCharges", "!=", 70.0], ["InternetService", "not in", ["No"]]]
+    expected = (
+        portfolio_frame["PaymentMethod"].isin(["Electronic check", "Mailed check"])
+        & (portfolio_frame["tenure"] >= 24)
+        & (portfolio_frame["MonthlyCharges"] != 70.0)
+        & (portfolio_frame["InternetService"] != "No")
+    )
+    np.testing.assert_array_equal(row_mask(features, where), expected.to_numpy())
+    assert row_mask(features, []).all()
+
+    for bad in ([["Contract", "<", "Two year"]], [["Contract", "==", "Forever"]], [["Churn", "==", "Yes"]],
+                [["tenure", "~", 3]]):
+        with pytest.raises(ValueError):
+            row_mask(features, bad)
+
+
+def test_apply_update(portfolio_frame):
+    features = build_features(portfolio_frame.head(4))
+    mask = np.array([True, False, True, False])
+    charges = features["MonthlyCharges"].to_numpy(copy=True)
+
+    apply_update(features, mask, "MonthlyCharges", ["+", 5])
+    np.testing.assert_array_equal(features["MonthlyCharges"].to_numpy(), np.where(mask, charges + 5, charges))
+    apply_update(features, mask, "Contract", "Two year")
+    assert (features["Contract"][mask] == "Two year").all()
+    assert isinstance(features["Contract"].dtype, pd.CategoricalDtype)
+
+    with pytest.raises(ValueError):
+        apply_update(features, mask, "MonthlyCharges", ["/", 2])
+    with pytest.raises(ValueError):
+        apply_update(features, mask, "Contract", "Lifetime")
+
+
+def test_engine_keeps_recent_portfolios(portfolio_frame):
+    loads = []
+    engine = ScenarioEngine(lambda key: loads.append(key) or portfolio_frame, max_portfolios=2)
+    for key in ("a", "b", "a", "c", "a", "b"):
+        engine.portfolio(key)
+    assert loads == ["a", "b", "c", "b"]
+    assert [segment["risk_segment"] for segment in engine.run("a", [SCENARIO], lambda f: np.zeros(len(f)), "m")[0]["segments"]] == RISK_LABELS
+
+
+def test_scenario_endpoint(client, customers):
+    upload = customers.head(500).to_csv(index=False).encode()
+    job_id = client.post("/jobs", files={"file": ("customers.csv", upload, "text/csv")}).json()["job_id"]
+    deadline = time.monotonic() + 60
+    while client.get(f"/jobs/{job_id}").json()["status"] != "completed":
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+    body = client.post(f"/jobs/{job_id}/scenarios", json={"scenarios": [SCENARIO]}).json()
+    (result,) = body["scenarios"]
+    assert result["name"] == SCENARIO["name"] and result["affected_customers"] > 0
+    assert client.post("/jobs/0123abcd/scenarios", json={"scenarios": [SCENARIO]}).status_code == 404
@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.batch_scoring import predict_probabilities, validate_frame
+from src.utils.scorer import CompiledScorer
+from src.utils.schema import COLUMN_SPECS, ColumnSpec, SchemaValidator, schema_validator
+
+
+@pytest.fixture(scope="module")
+def frame(customers):
+    return customers.head(200).reset_index(drop=True)
+
+
+def _reference_mask(df: pd.DataFrame) -> np.ndarray:
+    # Value-by-value checks with ColumnSpec.check
+    return np.array([
+        all(spec.check(row[col]) is None for col, spec in COLUMN_SPECS.items())
+        for row in df.to_dict(orient="records")
+    ])
+
+
+def test_clean_rows_are_accepted(frame):
+    result = schema_validator.validate(frame)
+    assert result.valid.all() and result.rejected == 0
+    assert result.problems == {} and result.by_column() == {}
+    assert result.columns["Contract"].dtype == pd.CategoricalDtype(COLUMN_SPECS["Contract"].values)
+    assert result.columns["tenure"].dtype == float
+
+
+def test_invalid_values_are_rejected(frame):
+    df = frame.head(8).copy()
+    df["TotalCharges"] = df["TotalCharges"].astype(object)
+    df["tenure"] = df["tenure"].astype(object)
+    df.loc[0, "gender"] = "Unknown"
+    df.loc[1, "MonthlyCharges"] = 500.0
+    df.loc[2, "tenure"] = -1
+    df.loc[3, "TotalCharges"] = "abc"
+    df.loc[4, "TotalCharges"] = " "
+    df.loc[5, "Contract"] = None
+    df.loc[6, "tenure"] = "twelve"
+
+    result = schema_validator.validate(df)
+    assert result.valid.tolist() == [False, False, False, False, True, False, False, True]
+    np.testing.assert_array_equal(result.valid, _reference_mask(df))
+    assert result.by_column() == {"gender": 1, "Contract": 1, "tenure": 2, "MonthlyCharges": 1, "TotalCharges": 1}
+    # A blank TotalCharges is missing, which the column allows, and scored as 0
+    assert np.isnan(result.columns["TotalCharges"].iloc[4])
+
+
+def test_aliases_and_long_tenures_are_accepted(frame):
+    df = frame.head(4).copy()
+    df["PaymentMethod"] = ["Bank transfer", "Credit card", "Bank transfer (automatic)", "Electronic check"]
+    df.loc[0, "tenure"] = 120
+
+    result = schema_validator.validate(df)
+    assert result.valid.all()
+    assert result.columns["PaymentMethod"].tolist() == [
+        "Bank transfer (automatic)", "Credit card (automatic)", "Bank transfer (automatic)", "Electronic check"
+    ]
+    assert schema_validator.check_record({"PaymentMethod": "Credit card", "tenure": 120}) == []
+
+
+def test_aliases_score_as_their_vocabulary_value(frame, gb_model):
+    canonical = frame.head(2).copy()
+    canonical["PaymentMethod"] = ["Bank transfer (automatic)", "Credit card (automatic)"]
+    aliased = canonical.assign(PaymentMethod=["Bank transfer", "Credit card"])
+    valid, _ = validate_frame(aliased)
+    np.testing.assert_array_equal(predict_probabilities(valid, gb_model), predict_probabilities(canonical, gb_model))
+
+    scorer = CompiledScorer(gb_model)
+    payloads = aliased.drop(columns=["customerID"]).to_dict(orient="records")
+    expected = canonical.drop(columns=["customerID"]).to_dict(orient="records")
+    assert [scorer.predict_one(p) for p in payloads] == [scorer.predict_one(p) for p in expected]
+
+
+def test_rejected_rows_and_records(frame):
+    df = frame.head(5).copy()
+    df.loc[1, "gender"] = "Unknown"
+    df.loc[1, "MonthlyCharges"] = 1.0
+    df.loc[3, "Contract"] = "Lifetime"
+
+    result = schema_validator.validate(df)
+    rows = result.rejected_rows(row_offset=1_000)
+    assert [row["row"] for row in rows] == [1_001, 1_003]
+    assert rows[0]["customerID"] == df.loc[1, "customerID"]
+    assert rows[0]["reasons"] == ["gender: 'Unknown' is not an allowed value", "MonthlyCharges: 1.0 is outside [8.2, 128.8]"]
+    assert rows[1]["reasons"] == ["Contract: 'Lifetime' is not an allowed value"]
+    assert result.rejected_rows(limit=1) == result.rejected_rows()[:1]
+    assert result.rejected_rows(id_column="accountID")[0]["customerID"] is None
+
+    records = result.records(sample=1)
+    assert records["rows"] == 2 and len(records["sample"]) == 1
+    assert records["by_column"] == {"gender": 1, "Contract": 1, "MonthlyCharges": 1}
+
+
+def test_column_spec_checks():
+    charges = ColumnSpec("numeric", min=0, max=10, nullable=True)
+    assert [charges.check(v) for v in (None, float("nan"), " ", "5", 10, True)] == [None] * 6
+    assert charges.check("abc") == "'abc' is not a number"
+    assert charges.check(11) == "11 is outside [0, 10]"
+    assert ColumnSpec("numeric", min=0).check("") == "missing value"
+
+    method = COLUMN_SPECS["PaymentMethod"]
+    assert method.check("Credit card") is None and method.check(["Credit card"]) is not None
+    assert method.check(None) == "missing value"
+    with pytest.raises(ValueError):
+        ColumnSpec("date")
+
+
+def test_unspecified_columns_are_not_checked(frame):
+    validator = SchemaValidator({"tenure": COLUMN_SPECS["tenure"]})
+    df = frame.head(3).assign(gender="Unknown")
+    assert validator.validate(df).valid.all()
+    assert validator.validate(df.drop(columns=["tenure"])).valid.all()
+
+
+def test_batch_response_reports_rejected_rows(api, client, frame):
+    df = frame.head(50).copy()
+    df.loc[[4, 9], "InternetService"] = "Satellite"
+    upload = df.to_csv(index=False).encode()
+    body = client.post("/predict-batch", files={"file": ("customers.csv", upload, "text/csv")}).json()
+
+    assert body["rejected"]["rows"] == 2
+    assert body["rejected"]["by_column"] == {"InternetService": 2}
+    assert [row["row"] for row in body["rejected"]["sample"]] == [4, 9]
+    assert len(body["all_predictions"]) == 48
+
+    payload = df.drop(columns=["customerID"]).iloc[4].to_dict()
+    assert client.post("/predict", json=payload).json()["invalid_values"] == [
+        "InternetService: 'Satellite' is not an allowed value"
+    ]
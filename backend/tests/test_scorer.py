@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from sklearn.pipeline import Pipeline
+
+from src.utils.scorer import (
+    PARITY_TOLERANCE,
+    CompiledScorer,
+    PipelineScorer,
+    build_scorer,
+    check_parity,
+    frame_scorer,
+)
+from src.utils.preprocessing import build_features
+
+
+def _payloads(customers, n=300):
+    payloads = customers.head(n).drop(columns=["customerID"]).to_dict(orient="records")
+    # Values the API has to tolerate: text numbers, blanks and unknown categories
+    payloads[0]["TotalCharges"] = " "
+    payloads[1]["MonthlyCharges"] = " 70.35 "
+    payloads[2]["InternetService"] = "Satellite"
+    payloads[3]["tenure"] = "bad"
+    return payloads
+
+
+@pytest.mark.parametrize("model_name", ["gb_model", "lr_model", "rf_model"])
+def test_compiled_scorer_matches_pipeline(request, customers, model_name):
+    model = request.getfixturevalue(model_name)
+    scorer = CompiledScorer(model)
+    payloads = _payloads(customers) + scorer.probe_payloads(48)
+
+    assert check_parity(scorer, PipelineScorer(model), payloads) <= PARITY_TOLERANCE
+
+
+def test_missing_fields_use_default_values(gb_model, customers):
+    payload = _payloads(customers, 5)[-1]
+    for col in ("PhoneService", "MultipleLines", "OnlineBackup", "StreamingMovies"):
+        payload.pop(col)
+    assert CompiledScorer(gb_model).predict_one(payload) == pytest.approx(
+        PipelineScorer(gb_model).predict_one(payload), abs=PARITY_TOLERANCE)
+
+
+def test_predict_one_matches_predict_many(gb_model, customers):
+    scorer = CompiledScorer(gb_model)
+    payloads = _payloads(customers, 20)
+    many = scorer.predict_many(payloads)
+    assert [scorer.predict_one(payload) for payload in payloads] == pytest.approx(many, abs=0)
+
+
+def test_transform_frame_matches_preprocessor(gb_model, customers):
+    features = build_features(customers.head(500))
+    reference = gb_model.named_steps["preprocessor"].transform(features)
+    reference = reference.toarray() if hasattr(reference, "toarray") else reference
+
+    scorer = frame_scorer(gb_model)
+    assert scorer is not None
+    np.testing.assert_array_equal(scorer.transform_frame(features), reference)
+
+
+def test_build_scorer_uses_compiled_path(gb_model):
+    assert build_scorer(gb_model).name == "compiled"
+    assert build_scorer(gb_model, compiled=False).name == "pipeline"
+
+
+def test_build_scorer_falls_back_without_preprocessor(gb_model):
+    # A pipeline whose preprocessor step is named differently cannot be compiled
+    renamed = Pipeline(steps=[("prep", gb_model.named_steps["preprocessor"]),
+                              ("classifier", gb_model.named_steps["classifier"])])
+    assert build_scorer(renamed).name == "pipeline"
+    assert frame_scorer(renamed) is None
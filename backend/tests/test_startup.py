@@ -0,0 +1,36 @@
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_api_import_skips_report_libraries(api):
+    # api has pointed the environment at the test registry and data directories
+    code = (
+        "import json, sys; import src.api.main; "
+        "print(json.dumps([name in sys.modules for name in ('reportlab', 'matplotlib')]))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=dict(os.environ),
+                         capture_output=True, text=True, check=True)
+    assert json.loads(out.stdout.strip().splitlines()[-1]) == [False, False]
+
+
+def test_served_model_is_memory_mapped(api):
+    scaler = api.model_server.current.model.named_steps["preprocessor"].named_transformers_["num"]
+    assert isinstance(scaler.mean_, np.memmap)
+
+
+def test_ready_after_warm_up(api, client):
+    api.model_ready.clear()
+    assert client.get("/ready").status_code == 503
+
+    api.warm_up()
+    response = client.get("/ready")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["ready"] and body["model_version"] == api.model_server.current.version
+    assert {"imports", "model_load", "cache_init", "warmup"} <= set(body["startup_timings"])
@@ -0,0 +1,131 @@
+import json
+import sqlite3
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.batch_scoring import (
+    RISK_LABELS, TopRevenueAtRisk, predict_probabilities, prepare_frame, score_frame, top_k_positions, validate_frame
+)
+from src.utils.jobs import JobManager
+from test_jobs import _csv, wait_for
+
+
+def _sorted_positions(values: np.ndarray, k: int) -> np.ndarray:
+    # Full stable sort: largest first, NaN last, ties in input order
+    values = np.where(np.isnan(values), -np.inf, values)
+    return np.argsort(-values, kind="stable")[:k]
+
+
+@pytest.mark.parametrize("k", [0, 1, 7, 50, 99, 100, 250])
+def test_top_k_positions_match_a_full_sort(k):
+    rng = np.random.default_rng(k)
+    # Few distinct values, so most of the k-th value's ties are cut
+    values = rng.integers(0, 12, size=100).astype(float)
+    values[rng.integers(0, 100, size=5)] = np.nan
+    np.testing.assert_array_equal(top_k_positions(values, k), _sorted_positions(values, k))
+
+
+def test_top_k_positions_of_distinct_values():
+    values = np.random.default_rng(0).random(10_000)
+    np.testing.assert_array_equal(top_k_positions(values, 25), _sorted_positions(values, 25))
+    assert top_k_positions(np.array([]), 3).tolist() == []
+
+
+@pytest.fixture(scope="module")
+def scored(customers, gb_model):
+    # Every customer twice, so revenue at risk has ties across chunks
+    df = pd.concat([customers, customers], ignore_index=True)
+    df["customerID"] = [f"C{i:05d}" for i in range(len(df))]
+    df, _ = validate_frame(prepare_frame(df))
+    return score_frame(df, lambda frame: predict_probabilities(frame, gb_model))
+
+
+def _expected(df: pd.DataFrame, k: int) -> list:
+    return df["customerID"].iloc[_sorted_positions(df["revenue_at_risk"].to_numpy(), k)].tolist()
+
+
+@pytest.mark.parametrize("chunk_rows", [137, 1_000, 10_000])
+def test_running_top_k_matches_a_full_sort(scored, chunk_rows):
+    top = TopRevenueAtRisk(40)
+    segments = TopRevenueAtRisk(40, per_segment=True)
+    for start in range(0, len(scored), chunk_rows):
+        chunk = scored.iloc[start:start + chunk_rows]
+        top.add(chunk)
+        segments.add(chunk)
+    top.add(scored.iloc[:0])
+
+    assert [row["customerID"] for row in top.records()] == _expected(scored, 40)
+    assert top.frame()["customerID"].tolist() == _expected(scored, 40)
+
+    by_segment = segments.records()
+    assert list(by_segment) == RISK_LABELS[::-1]
+    for label in RISK_LABELS:
+        rows = scored[scored["risk_segment"] == label]
+        assert [row["customerID"] for row in by_segment[label]] == _expected(rows, 40)
+
+
+def test_empty_segments_and_k_larger_than_the_batch(scored):
+    low = scored[scored["risk_segment"] == "Low Risk"].head(10)
+    top = TopRevenueAtRisk(100, per_segment=True)
+    top.add(low)
+    assert top.records()["High Risk"] == [] and len(top.records()["Low Risk"]) == 10
+    assert len(top.frame()) == 10
+    assert TopRevenueAtRisk(5).records() == [] and TopRevenueAtRisk(5).frame().empty
+
+
+def _upload(df: pd.DataFrame) -> dict:
+    return {"file": ("customers.csv", df.to_csv(index=False).encode(), "text/csv")}
+
+
+def test_batch_top_k_matches_the_full_response(api, client, customers):
+    df = pd.concat([customers.head(400), customers.head(100)], ignore_index=True)
+    df["customerID"] = [f"C{i:05d}" for i in range(len(df))]
+    full = pd.DataFrame(client.post("/predict-batch", files=_upload(df)).json()["all_predictions"])
+
+    body = client.post("/predict-batch", params={"top_k": 25}, files=_upload(df)).json()
+    assert body["top_k"] == 25
+    assert [row["customerID"] for row in body["top_customers"]] == _expected(full, 25)
+
+    body = client.post("/predict-batch", params={"top_k": 10, "per_segment": True}, files=_upload(df)).json()
+    for label, rows in body["top_customers"].items():
+        assert [row["customerID"] for row in rows] == _expected(full[full["risk_segment"] == label], 10)
+
+    assert "error" in client.post("/predict-batch", params={"top_k": 0}, files=_upload(df)).json()
+
+
+def test_stream_top_k_matches_the_batch_response(api, client, customers):
+    df = customers.head(500)
+    body = client.post("/predict-batch", params={"top_k": 15}, files=_upload(df)).json()
+    response = client.post("/predict-batch/stream", params={"top_k": 15, "chunk_size": 120}, files=_upload(df))
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["customerID"] for line in lines[:-1]] == [row["customerID"] for row in body["top_customers"]]
+    assert lines[-1]["top_k"] == 15
+
+
+@pytest.fixture
+def job(api, tmp_path, customers):
+    jobs = JobManager(str(tmp_path / "jobs"), api.score_job_chunk, max_workers=1, chunk_size=300)
+    df = pd.concat([customers.head(600), customers.head(300)], ignore_index=True)
+    df["customerID"] = [f"C{i:05d}" for i in range(len(df))]
+    job_id = jobs.submit(_csv(df), "csv")["job_id"]
+    wait_for(jobs, job_id)
+    yield jobs, job_id
+    jobs.shutdown()
+
+
+def test_job_top_customers_match_a_full_sort(job):
+    jobs, job_id = job
+    with closing(sqlite3.connect(jobs.results_path(job_id))) as conn:
+        stored = pd.read_sql("SELECT * FROM predictions ORDER BY row_id", conn)
+
+    result = jobs.top_customers(job_id, k=30)
+    assert result["k"] == 30
+    assert [row["customerID"] for row in result["top_customers"]] == _expected(stored, 30)
+
+    by_segment = jobs.top_customers(job_id, k=5, per_segment=True)["top_customers"]
+    for label in RISK_LABELS:
+        rows = stored[stored["risk_segment"] == label].reset_index(drop=True)
+        assert [row["customerID"] for row in by_segment[label]] == _expected(rows, 5)
@@ -0,0 +1,61 @@
+import functools
+import json
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression, RidgeClassifier
+from sklearn.tree import DecisionTreeClassifier
+
+from src import train_models
+from src.utils.model_registry import ModelRegistry
+
+
+def _strict_json(text: str):
+    def reject(constant):
+        raise ValueError(f"{constant} is not valid JSON")
+    return json.loads(text, parse_constant=reject)
+
+
+@pytest.fixture
+def tournament(tmp_path, monkeypatch, training_data):
+    data_path = tmp_path / "Dataset.csv"
+    training_data.to_csv(data_path, index=False)
+    registry_dir = str(tmp_path / "registry")
+
+    monkeypatch.setattr(train_models, "CACHE_DIR", str(tmp_path / "processed"))
+    monkeypatch.setattr(train_models, "RESULTS_PATH", str(tmp_path / "tournament_results.json"))
+    monkeypatch.setattr(train_models, "publish_model",
+                        functools.partial(train_models.publish_model, registry_dir=registry_dir))
+    # A small field: one model without predict_proba, which must not win
+    monkeypatch.setattr(train_models, "build_models", lambda: {
+        "Logistic Regression": LogisticRegression(max_iter=1000),
+        "Decision Tree": DecisionTreeClassifier(max_depth=5, random_state=42),
+        "Ridge Classifier": RidgeClassifier(),
+    })
+    return str(data_path), registry_dir, tmp_path
+
+
+def test_tournament_publishes_the_best_model(tournament):
+    data_path, registry_dir, tmp_path = tournament
+    train_models.train_and_evaluate(data_path, workers=2, time_budget=60)
+
+    results = _strict_json((tmp_path / "tournament_results.json").read_text())
+    by_model = {row["model"]: row for row in results["results"]}
+    assert results["best_model"] in ("Logistic Regression", "Decision Tree")
+    assert by_model["Ridge Classifier"]["status"] == "no predict_proba"
+    # Metrics a model has no value for are null, not NaN
+    assert by_model["Ridge Classifier"]["auc"] is None
+
+    registry = ModelRegistry(registry_dir)
+    assert registry.current_version() == results["version"] == "v0001"
+    assert registry.metadata("v0001")["model"] == results["best_model"]
+
+
+def test_preprocessed_matrices_are_cached(tournament):
+    data_path, _, _ = tournament
+    cache_path, cache = train_models.prepare_matrices(data_path)
+    cached_path, cached = train_models.prepare_matrices(data_path)
+
+    assert cached_path == cache_path
+    np.testing.assert_array_equal(cached["X_train"], cache["X_train"])
+    np.testing.assert_array_equal(cached["y_test"], cache["y_test"])
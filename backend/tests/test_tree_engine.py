@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression, RidgeClassifier
+from sklearn.tree import DecisionTreeClassifier
+
+from conftest import fit_pipeline, transformed
+from src.utils.scorer import PipelineScorer, build_scorer
+from src.utils.tree_engine import (
+    TreeEnsemble, check_exactness, export_ensemble, flatten_ensemble, supports,
+)
+
+
+@pytest.fixture(scope="module")
+def dt_model(training_data):
+    return fit_pipeline(training_data, DecisionTreeClassifier(max_depth=10, random_state=0))
+
+
+@pytest.fixture(scope="module")
+def X(gb_model, customers):
+    return transformed(gb_model, customers)
+
+
+@pytest.mark.parametrize("model_name", ["gb_model", "rf_model", "dt_model"])
+def test_engine_matches_sklearn(request, X, model_name):
+    classifier = request.getfixturevalue(model_name).named_steps["classifier"]
+    engine = TreeEnsemble(flatten_ensemble(classifier))
+    assert check_exactness(engine, classifier, X) <= 1e-12
+
+
+@pytest.mark.parametrize("model_name", ["gb_model", "rf_model"])
+def test_float32_values_stay_close(request, X, model_name):
+    classifier = request.getfixturevalue(model_name).named_steps["classifier"]
+    engine = TreeEnsemble(flatten_ensemble(classifier, float32=True))
+    assert engine.value.dtype == np.float32
+    assert check_exactness(engine, classifier, X) <= 1e-6
+
+
+def test_values_on_the_thresholds_take_the_same_branch(dt_model, X):
+    # Rows that sit exactly on (and just either side of) every float32 split
+    classifier = dt_model.named_steps["classifier"]
+    tree = classifier.tree_
+    rows = []
+    for node in np.flatnonzero(tree.children_left >= 0):
+        at = np.float32(tree.threshold[node])
+        for value in (np.nextafter(at, np.float32(-np.inf)), at, np.nextafter(at, np.float32(np.inf))):
+            row = X[node % len(X)].copy()
+            row[tree.feature[node]] = value
+            rows.append(row)
+    edges = np.array(rows)
+
+    engine = TreeEnsemble(flatten_ensemble(classifier))
+    assert check_exactness(engine, classifier, edges) == 0.0
+    np.testing.assert_array_equal(engine.apply(edges)[:, 0], classifier.apply(edges.astype(np.float32)))
+
+
+def test_apply_reaches_the_sklearn_leaves(rf_model, X):
+    classifier = rf_model.named_steps["classifier"]
+    engine = TreeEnsemble(flatten_ensemble(classifier))
+    np.testing.assert_array_equal(engine.apply(X), classifier.apply(X.astype(np.float32)) + engine.roots)
+
+
+def test_export_round_trip(tmp_path, gb_model, X):
+    classifier = gb_model.named_steps["classifier"]
+    path = export_ensemble(classifier, str(tmp_path / "trees.npz"))
+    engine = TreeEnsemble.load(path)
+
+    assert (engine.kind, engine.n_trees, engine.n_features) == ("gbdt", 30, X.shape[1])
+    np.testing.assert_array_equal(engine.predict_proba(X), TreeEnsemble(flatten_ensemble(classifier)).predict_proba(X))
+    with pytest.raises(ValueError):
+        engine.predict_proba(X[:, :-1])
+
+
+def test_supports(gb_model, rf_model):
+    assert supports(gb_model.named_steps["classifier"])
+    assert supports(rf_model.named_steps["classifier"])
+    assert not supports(LogisticRegression())
+    assert not supports(RidgeClassifier().fit([[0], [1]], [0, 1]))
+    with pytest.raises(ValueError):
+        flatten_ensemble(LogisticRegression().fit([[0], [1]], [0, 1]))
+
+
+def test_scorer_uses_the_engine_for_small_batches(gb_model, customers):
+    engine = TreeEnsemble(flatten_ensemble(gb_model.named_steps["classifier"]))
+    scorer = build_scorer(gb_model, tree_engine=engine, engine_max_rows=16)
+    assert scorer.name == "compiled+trees"
+
+    payloads = customers.head(40).drop(columns=["customerID"]).to_dict(orient="records")
+    reference = PipelineScorer(gb_model)
+    # 8 rows go through the engine, 40 through sklearn
+    for batch in (payloads[:8], payloads):
+        np.testing.assert_allclose(scorer.predict_many(batch), reference.predict_many(batch), rtol=0, atol=1e-12)
@@ -0,0 +1,82 @@
+import joblib
+import numpy as np
+import pytest
+from sklearn.linear_model import SGDClassifier
+from sklearn.tree import DecisionTreeClassifier
+
+from benchmarks.synthetic import generate_customers
+from conftest import transformed
+from src.train_models import publish_model
+from src.update_model import update_classifier, update_model
+from src.utils.model_registry import ModelRegistry
+
+
+@pytest.fixture
+def labelled(tmp_path, source):
+    path = tmp_path / "labelled.parquet"
+    generate_customers(1_000, source, seed=11).to_parquet(path)
+    return str(path)
+
+
+def _registry(tmp_path, model, customers):
+    registry_dir = str(tmp_path / "registry")
+    classifier = model.named_steps["classifier"]
+    publish_model(model, classifier, transformed(model, customers.head(200)),
+                  {"model": type(classifier).__name__, "train_rows": 3_000}, registry_dir=registry_dir)
+    return registry_dir
+
+
+def test_boosting_grows_new_trees(tmp_path, gb_model, customers, labelled):
+    registry_dir = _registry(tmp_path, gb_model, customers)
+    version = update_model(labelled, add_trees=5, registry_dir=registry_dir)
+
+    registry = ModelRegistry(registry_dir)
+    assert version == registry.current_version() == "v0002"
+    metadata = registry.metadata(version)
+    assert metadata["parent_version"] == "v0001"
+    assert metadata["update_method"] == "warm_start (+5 trees)"
+    assert (metadata["rows_added"], metadata["train_rows"]) == (800, 3_800)
+    # The exported engine still matches the grown ensemble
+    assert metadata["tree_engine_max_gap"] <= 1e-12
+
+    updated = joblib.load(registry.model_path(version)).named_steps["classifier"]
+    original = gb_model.named_steps["classifier"]
+    assert len(updated.estimators_) == len(original.estimators_) + 5
+    # The existing stages are untouched
+    np.testing.assert_array_equal(updated.estimators_[0, 0].tree_.value, original.estimators_[0, 0].tree_.value)
+
+
+def test_linear_model_moves_from_its_coefficients(tmp_path, lr_model, customers, labelled):
+    registry_dir = _registry(tmp_path, lr_model, customers)
+    version = update_model(labelled, epochs=3, promote=False, registry_dir=registry_dir)
+
+    registry = ModelRegistry(registry_dir)
+    assert registry.current_version() == "v0001"
+    updated = joblib.load(registry.model_path(version)).named_steps["classifier"]
+    original = lr_model.named_steps["classifier"]
+    assert type(updated) is type(original)
+    assert not np.array_equal(updated.coef_, original.coef_)
+    # A few small steps, not a refit from scratch
+    assert np.max(np.abs(updated.coef_ - original.coef_)) < 0.5
+
+
+def test_update_strategies(gb_model, customers):
+    X = transformed(gb_model, customers.head(200))
+    y = np.arange(200) % 2
+
+    sgd = SGDClassifier(loss="log_loss", random_state=0).fit(X, y)
+    assert update_classifier(sgd, X, y, add_trees=5) == "partial_fit"
+
+    with pytest.raises(ValueError, match="churned and retained"):
+        update_classifier(DecisionTreeClassifier().fit(X, y), X, np.ones(200, dtype=int), add_trees=5)
+    with pytest.raises(ValueError, match="retrain"):
+        update_classifier(DecisionTreeClassifier().fit(X, y), X, y, add_trees=5)
+
+
+def test_unlabelled_rows_are_rejected(tmp_path, gb_model, customers):
+    registry_dir = _registry(tmp_path, gb_model, customers)
+    path = str(tmp_path / "unlabelled.csv")
+    customers.head(100).to_csv(path, index=False)
+    with pytest.raises(ValueError, match="Churn"):
+        update_model(path, registry_dir=registry_dir)
+    assert ModelRegistry(registry_dir).versions() == ["v0001"]
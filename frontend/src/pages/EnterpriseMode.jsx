@@ -53,7 +53,8 @@ const EnterpriseMode = () => {
   // Results State
   const [summaryData, setSummaryData] = useState(null);
   const [sampleData, setSampleData] = useState(null);
-  const [allPredictions, setAllPredictions] = useState(null);
+  const [topCustomers, setTopCustomers] = useState(null);
+  const [rejected, setRejected] = useState(null);
 
   // Form State
   const [companyInfo, setCompanyInfo] = useState({
@@ -86,7 +87,8 @@ const EnterpriseMode = () => {
     formData.append("file", file);
 
     try {
-      const response = await axios.post(`${API_URL}/predict-batch`, formData, {
+      // Only the 50 customers per segment the PDF report lists are returned
+      const response = await axios.post(`${API_URL}/predict-batch?top_k=50&per_segment=true`, formData, {
         headers: { 'Content-Type': 'multipart/form-data' }
       });
       
@@ -94,8 +96,10 @@ const EnterpriseMode = () => {
         setError(response.data.error);
       } else {
         setSummaryData(response.data.summary);
-        setSampleData(response.data.sample_predictions);
-        setAllPredictions(response.data.all_predictions);
+        setSampleData(Object.values(response.data.top_customers).flat());
+        setTopCustomers(response.data.top_customers);
+        // Rows with invalid values are left out of the analysis
+        setRejected(response.data.rejected?.rows ? response.data.rejected : null);
         setActiveTab('dashboard');
       }
     } catch (err) {
@@ -110,23 +114,13 @@ const EnterpriseMode = () => {
     setError(null);
 
     try {
-      // Group customers by risk for the PDF
-      const grouped = { 'High Risk': [], 'Medium Risk': [], 'Low Risk': [] };
-      if (allPredictions) {
-        allPredictions.forEach(p => {
-          if (grouped[p.risk_segment]) {
-            grouped[p.risk_segment].push(p);
-          }
-        });
-      }
-
       const response = await axios.post(`${API_URL}/generate-report`, {
         company_name: companyInfo.name,
         company_email: companyInfo.email,
         company_location: companyInfo.location,
         company_website: companyInfo.website,
         summary_data: summaryData,
-        customer_lists: grouped
+        customer_lists: topCustomers || {}
       }, {
         responseType: 'blob'
       });
@@ -311,12 +305,34 @@ const EnterpriseMode = () => {
               </div>
               <div className="bg-gradient-to-br from-emerald-900/40 to-black/40 p-6 rounded-2xl border border-emerald-500/20 shadow-[0_4px_20px_rgba(16,185,129,0.15)] relative overflow-hidden hover:scale-105 transition-transform duration-300">
                 <div className="text-sm text-emerald-300/80 uppercase font-semibold tracking-wider mb-2">Analyzed Profiles</div>
-                <div className="text-4xl font-black text-emerald-400 drop-shadow-md">{allPredictions?.length || 0}</div>
+                <div className="text-4xl font-black text-emerald-400 drop-shadow-md">{summaryData?.reduce((total, s) => total + s.customers, 0) || 0}</div>
+                {rejected && (
+                  <div className="text-sm text-amber-400 mt-1">{rejected.rows} rejected</div>
+                )}
                 <User className="absolute -right-4 -bottom-4 w-24 h-24 text-emerald-500/10" />
               </div>
             </div>
           </div>
 
+          {rejected && (
+            <div className="glass border-t-4 border-t-amber-500/50">
+              <h3 className="text-xl font-bold mb-4 flex items-center gap-2">
+                <AlertTriangle className="text-amber-400" /> {rejected.rows} Rows Rejected
+              </h3>
+              <p className="text-sm text-gray-400 mb-4">
+                These rows have invalid values and were left out of the analysis:{' '}
+                {Object.entries(rejected.by_column).map(([column, count]) => `${column} (${count})`).join(', ')}
+              </p>
+              <ul className="space-y-1 text-sm font-mono text-amber-200/80 max-h-48 overflow-y-auto">
+                {rejected.sample.map((row) => (
+                  <li key={row.row}>
+                    Row {row.row + 1}{row.customerID ? ` (${row.customerID})` : ''}: {row.reasons.join('; ')}
+                  </li>
+                ))}
+              </ul>
+            </div>
+          )}
+
           <div className="grid grid-cols-1 lg:grid-cols-2 gap-6">
             <div className="glass border-t-4 border-t-indigo-500/50">
               <h3 className="text-xl font-bold mb-6 flex items-center gap-2">
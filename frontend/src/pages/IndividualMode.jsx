@@ -126,7 +126,7 @@ const IndividualMode = () => {
             </div>
             <div>
               <label className="block text-sm text-gray-400 mb-2">Tenure (Months)</label>
-              <input type="number" name="tenure" value={formData.tenure} onChange={handleChange} className="w-full bg-black/30 border border-white/10 rounded-lg p-3 text-white outline-none focus:border-blue-500 transition-colors" min="0" max="72" />
+              <input type="number" name="tenure" value={formData.tenure} onChange={handleChange} className="w-full bg-black/30 border border-white/10 rounded-lg p-3 text-white outline-none focus:border-blue-500 transition-colors" min="0" />
             </div>
           </div>
         )}